@@ -0,0 +1,6 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pywf import pywf
+
+pywf.doctor(verbose=True)
@@ -8,4 +8,5 @@ We primarily use poetry to build the package.
 from pywf import pywf
 
 # pywf.python_build(real_run=True, verbose=True)
+# pywf.pep517_build(real_run=True, verbose=True)
 pywf.poetry_build(real_run=True, verbose=True)
@@ -8,3 +8,4 @@ We primarily use twine to publish the package for open source project.
 from pywf import pywf
 
 pywf.twine_upload()
+# pywf.pypi_upload(real_run=True, verbose=True)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run a PyWf operation on all projects next to this one, for example::
+
+    make fleet OP=poetry_export
+"""
+
+import sys
+
+from pywf import pywf
+from pywf_open_source.fleet import (
+    FleetStatus,
+    discover_projects,
+    run_fleet,
+    format_summary_table,
+)
+
+operation = sys.argv[1] if len(sys.argv) > 1 else "doctor"
+dir_project_roots = discover_projects(pywf.dir_project_root.parent)
+results = run_fleet(dir_project_roots, operation)
+print(format_summary_table(results))
+if any(result.status == FleetStatus.failed for result in results):
+    sys.exit(1)
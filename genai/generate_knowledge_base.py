@@ -6,21 +6,42 @@ Generate the AI knowledge base for the project.
 .. code-block:: bash
 
     pip install "docpack>=0.1.2,<1.0.0"
+
+By default, only the documents of the changed source files are regenerated,
+the ``genai/tmp/manifest.json`` file tracks the digest of each source file
+and its document. Use ``--no-cache`` to regenerate everything.
+
+Use ``--index`` to also build a BM25 search index of the documents at
+``genai/tmp/knowledge_base.bm25``, see :mod:`pywf_open_source.search_index`.
+
+.. code-block:: bash
+
+    python genai/generate_knowledge_base.py [--no-cache] [--index]
+    python -m pywf_open_source.search_index search genai/tmp/knowledge_base.bm25 "query"
 """
 
+import typing as T
+import os
+import json
 import shutil
+import hashlib
+import argparse
 from pathlib import Path
 
+from pydantic import Field
+from pathpick.api import PathPick
 from pywf_open_source.paths import dir_project_root, PACKAGE_NAME
+from pywf_open_source.search_index import build_index
 from docpack.api import GitHubPipeline
 
 dir_here = Path(__file__).absolute().parent
 dir_tmp = dir_here / "tmp"
 dir_tmp_docs = dir_tmp / "docs"
-shutil.rmtree(dir_tmp, ignore_errors=True)
-dir_tmp.mkdir()
+path_manifest = dir_tmp / "manifest.json"
+path_knowledge_base = dir_tmp / "all_in_one_knowledge_base.txt"
+path_search_index = dir_tmp / "knowledge_base.bm25"
 
-gh_pipeline = GitHubPipeline(
+pipeline_kwargs = dict(
     domain="github.com",
     account="MacHu-GWU",
     repo=f"{PACKAGE_NAME}-project",
@@ -64,11 +85,157 @@ gh_pipeline = GitHubPipeline(
     ],
     dir_out=dir_tmp_docs,
 )
-gh_pipeline.fetch()
-
-filename = "all_in_one_knowledge_base.txt"
-lines = [
-    path.read_text()
-    for path in dir_tmp_docs.glob("*.xml")
-]
-dir_tmp.joinpath(filename).write_text("\n".join(lines), encoding="utf-8")
+
+
+class RecordingGitHubPipeline(GitHubPipeline):
+    """
+    Remember the document path of each source file.
+    """
+
+    path_outs: T.Dict[str, str] = Field(default_factory=dict)
+
+    def post_process_path_out(self, github_file, path_out: Path):
+        self.path_outs[github_file.path] = path_out.name
+
+
+def get_config_digest() -> str:
+    """
+    The digest of the pipeline settings, if it changes, regenerate everything.
+    """
+    data = {k: v for k, v in pipeline_kwargs.items() if not k.startswith("dir_")}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def find_source_files() -> T.Dict[str, os.stat_result]:
+    """
+    Find the source files the same way as ``docpack``.
+    """
+    path_pick = PathPick.new(
+        include=pipeline_kwargs["include"],
+        exclude=pipeline_kwargs["exclude"],
+    )
+    files = dict()
+    for path in dir_project_root.glob("**/*.*"):
+        relpath = path.relative_to(dir_project_root).as_posix()
+        if path_pick.is_match(relpath) and path.is_file():
+            files[relpath] = path.stat()
+    return files
+
+
+def get_file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_manifest() -> T.Dict[str, T.Any]:
+    try:
+        manifest = json.loads(path_manifest.read_text(encoding="utf-8"))
+        if manifest["config"] == get_config_digest():
+            return manifest
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    return {"config": get_config_digest(), "files": {}}
+
+
+def write_knowledge_base(doc_names: T.List[str]):
+    """
+    Concatenate the documents by streaming them one by one to a temp file,
+    then rename it.
+    """
+    path_tmp = path_knowledge_base.with_name(f"{path_knowledge_base.name}.tmp")
+    with path_tmp.open("wb") as f_out:
+        for i, doc_name in enumerate(doc_names):
+            if i:
+                f_out.write(b"\n")
+            with dir_tmp_docs.joinpath(doc_name).open("rb") as f_in:
+                shutil.copyfileobj(f_in, f_out)
+    path_tmp.replace(path_knowledge_base)
+
+
+def write_search_index(files: T.Dict[str, T.Dict[str, T.Any]]):
+    documents = (
+        (relpath, dir_tmp_docs.joinpath(entry["doc"]).read_text(encoding="utf-8"))
+        for relpath, entry in sorted(files.items())
+    )
+    n_chunks = build_index(documents, path_search_index)
+    print(f"indexed {n_chunks} chunks to {path_search_index}")
+
+
+def generate(use_cache: bool = True, index: bool = False):
+    if use_cache:
+        manifest = load_manifest()
+    else:
+        shutil.rmtree(dir_tmp, ignore_errors=True)
+        manifest = {"config": get_config_digest(), "files": {}}
+    old_files: T.Dict[str, T.Dict[str, T.Any]] = manifest["files"]
+    new_files = dict()
+
+    # find the changed files, hash the file only if the size or mtime changed
+    changed = list()
+    for relpath, stat in find_source_files().items():
+        entry = old_files.get(relpath)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and dir_tmp_docs.joinpath(entry["doc"]).exists()
+        ):
+            new_files[relpath] = entry
+            continue
+        sha256 = get_file_digest(dir_project_root / relpath)
+        if (
+            entry is not None
+            and entry["sha256"] == sha256
+            and dir_tmp_docs.joinpath(entry["doc"]).exists()
+        ):
+            new_files[relpath] = {**entry, "mtime_ns": stat.st_mtime_ns}
+            continue
+        new_files[relpath] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+        }
+        changed.append(relpath)
+
+    removed = old_files.keys() - new_files.keys()
+    print(
+        f"{len(changed)} changed, {len(removed)} removed, "
+        f"{len(new_files) - len(changed)} unchanged source files"
+    )
+    if changed:
+        pipeline = RecordingGitHubPipeline(
+            **{
+                **pipeline_kwargs,
+                # the leading "/" anchors the pattern to the repo root
+                "include": [f"/{relpath}" for relpath in changed],
+                "exclude": [],
+            }
+        )
+        pipeline.fetch()
+        for relpath in changed:
+            new_files[relpath]["doc"] = pipeline.path_outs[relpath]
+    for relpath in removed:
+        dir_tmp_docs.joinpath(old_files[relpath]["doc"]).unlink(missing_ok=True)
+
+    if changed or removed or not path_knowledge_base.exists():
+        write_knowledge_base(sorted(entry["doc"] for entry in new_files.values()))
+    if index and (changed or removed or not path_search_index.exists()):
+        write_search_index(new_files)
+    manifest["files"] = new_files
+    dir_tmp.mkdir(parents=True, exist_ok=True)
+    path_manifest.write_text(json.dumps(manifest, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="regenerate all documents",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="also build the BM25 search index",
+    )
+    args = parser.parse_args()
+    generate(use_cache=not args.no_cache, index=args.index)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache the built Python distribution (``.whl`` and ``.tar.gz``) by the digest
+of the files that actually go into it.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import shutil
+import fnmatch
+import hashlib
+from pathlib import Path
+
+# 1980-01-01 00:00:00 UTC, the earliest timestamp a zip file (wheel) supports.
+# Build backends use it as the mtime of every file in the archive,
+# so the same source always produces the same bytes.
+DEFAULT_SOURCE_DATE_EPOCH = "315532800"
+
+
+def get_source_date_epoch() -> str:
+    """
+    Respect the ``SOURCE_DATE_EPOCH`` environment variable if the user set it.
+    """
+    return os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_SOURCE_DATE_EPOCH)
+
+
+def _is_excluded(relpath: str, exclude: T.List[str]) -> bool:
+    if "__pycache__" in relpath.split("/"):
+        return True
+    return any(fnmatch.fnmatch(relpath, pattern) for pattern in exclude)
+
+
+def _get_readme_files(project: T.Dict[str, T.Any]) -> T.List[str]:
+    readme = project.get("readme")
+    if isinstance(readme, str):
+        return [readme]
+    if isinstance(readme, dict) and "file" in readme:  # pragma: no cover
+        return [readme["file"]]
+    return []  # pragma: no cover
+
+
+def iter_dist_source_files(
+    dir_project_root: Path,
+    toml_data: T.Dict[str, T.Any],
+) -> T.List[Path]:
+    """
+    List the files that go into the distribution, it follows the
+    ``[tool.poetry] packages`` and ``[tool.poetry] exclude`` rules, plus the
+    ``pyproject.toml``, readme and license files.
+
+    :return: sorted list of absolute file paths.
+    """
+    project = toml_data.get("project", {})
+    poetry = toml_data.get("tool", {}).get("poetry", {})
+    exclude = poetry.get("exclude", [])
+    packages = poetry.get("packages") or [{"include": project["name"]}]
+
+    candidates: T.Set[Path] = set()
+    for package in packages:
+        dir_from = dir_project_root.joinpath(package.get("from", "."))
+        for path in dir_from.glob(package["include"]):
+            if path.is_dir():
+                candidates.update(p for p in path.rglob("*") if p.is_file())
+            elif path.is_file():  # pragma: no cover
+                candidates.add(path)
+    files = {
+        path
+        for path in candidates
+        if not _is_excluded(path.relative_to(dir_project_root).as_posix(), exclude)
+    }
+
+    files.add(dir_project_root.joinpath("pyproject.toml"))
+    for readme in _get_readme_files(project):
+        files.add(dir_project_root.joinpath(readme))
+    for pattern in project.get("license-files", []):
+        files.update(p for p in dir_project_root.glob(pattern) if p.is_file())
+    return sorted(path for path in files if path.exists())
+
+
+def get_dist_source_digest(
+    dir_project_root: Path,
+    toml_data: T.Dict[str, T.Any],
+    salt: str = "",
+) -> str:
+    """
+    Calculate the sha256 digest of the files that go into the distribution.
+
+    :param salt: additional string to mix in, for example the build tool name,
+        because different tools may produce different artifacts.
+    """
+    sha256 = hashlib.sha256()
+    sha256.update(salt.encode("utf-8"))
+    sha256.update(get_source_date_epoch().encode("utf-8"))
+    for path in iter_dist_source_files(dir_project_root, toml_data):
+        relpath = path.relative_to(dir_project_root).as_posix()
+        sha256.update(relpath.encode("utf-8"))
+        sha256.update(hashlib.sha256(path.read_bytes()).digest())
+    return sha256.hexdigest()
+
+
+class DistCache:
+    """
+    The on disk store of the built distribution, each cache entry is
+    a ``${digest}`` folder that contains the artifacts.
+
+    :param dir_cache: the directory to store the cache entries.
+    """
+
+    def __init__(self, dir_cache: Path):
+        self.dir_cache = dir_cache
+
+    def get_dir(self, digest: str) -> Path:
+        return self.dir_cache.joinpath(digest)
+
+    def has(self, digest: str) -> bool:
+        dir_entry = self.get_dir(digest)
+        return dir_entry.is_dir() and any(dir_entry.iterdir())
+
+    def restore(self, digest: str, dir_dist: Path) -> T.List[Path]:
+        """
+        Copy the cached artifacts into the ``dist`` folder, the existing
+        ``dist`` folder is removed first.
+        """
+        shutil.rmtree(dir_dist, ignore_errors=True)
+        dir_dist.mkdir(parents=True)
+        return [
+            Path(shutil.copy2(path, dir_dist.joinpath(path.name)))
+            for path in sorted(self.get_dir(digest).iterdir())
+        ]
+
+    def save(self, digest: str, dir_dist: Path):
+        """
+        Copy the artifacts in the ``dist`` folder into the cache.
+        """
+        dir_entry = self.get_dir(digest)
+        # copy to a temp folder then rename, so a half written entry is never used
+        dir_tmp = dir_entry.with_name(f"{digest}.tmp")
+        shutil.rmtree(dir_tmp, ignore_errors=True)
+        dir_tmp.mkdir(parents=True)
+        for path in dir_dist.iterdir():
+            if path.is_file():
+                shutil.copy2(path, dir_tmp.joinpath(path.name))
+        shutil.rmtree(dir_entry, ignore_errors=True)
+        dir_tmp.rename(dir_entry)
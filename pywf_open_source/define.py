@@ -15,6 +15,7 @@ namespace classes to provide a comprehensive project management toolkit.
 """
 
 import typing as T
+import os
 
 try:
     import tomllib
@@ -34,6 +35,7 @@ from .define_05_docs import PyWfDocs
 from .define_06_build import PyWfBuild
 from .define_07_publish import PyWfPublish
 from .define_08_saas import PyWfSaas
+from .define_09_ops import PyWfOps
 
 
 @dataclasses.dataclass
@@ -46,6 +48,7 @@ class PyWf(
     PyWfBuild,
     PyWfPublish,
     PyWfSaas,
+    PyWfOps,
 ):
     """
     Unified Automation Interface for Python Project Management
@@ -119,6 +122,18 @@ class PyWf(
         """Extract micro version number from development Python version."""
         return int(self.toml_data["tool"]["pywf"]["dev_python"].split(".")[2])
 
+    @property
+    def remote_cache_url(self) -> T.Optional[str]:
+        """
+        The shared remote cache location of the step outputs, a folder path
+        or an HTTP URL. The ``PYWF_REMOTE_CACHE`` environment variable
+        overrides the optional ``[tool.pywf] remote_cache`` field. See
+        :mod:`pywf_open_source.remote_cache`.
+        """
+        return os.environ.get("PYWF_REMOTE_CACHE") or self.toml_data["tool"][
+            "pywf"
+        ].get("remote_cache")
+
     # --- GitHub.com
     @property
     def github_account(self) -> str:
@@ -224,14 +239,17 @@ class PyWf(
                 f"PyWf tool only support Python3.11+, but got {self.py_ver_major}.{self.py_ver_minor}"
             )
 
-    def _update_version_file(self):
+    def _render_version_file(self, version: T.Optional[str] = None) -> str:
         """
-        Update the version file with current project metadata in ``pyproject.toml``.
+        Render the version file content from the project metadata in
+        ``pyproject.toml``.
+
+        :param version: override the version, default is the current one.
         """
         dir_here = Path(__file__).absolute().parent
         path_version_tpl = dir_here / "_version.tpl"
-        content = path_version_tpl.read_text(encoding="utf-8").format(
-            version=self.package_version,
+        return path_version_tpl.read_text(encoding="utf-8").format(
+            version=self.package_version if version is None else version,
             description=self.package_description,
             license=self.package_license,
             author=self.package_author_name,
@@ -239,7 +257,12 @@ class PyWf(
             maintainer=self.package_maintainer_name,
             maintainer_email=self.package_maintainer_email,
         )
-        self.path_version_py.write_text(content, encoding="utf-8")
+
+    def _update_version_file(self):
+        """
+        Update the version file with current project metadata in ``pyproject.toml``.
+        """
+        self.path_version_py.write_text(self._render_version_file(), encoding="utf-8")
 
     def __post_init__(self):
         self._validate_paths()
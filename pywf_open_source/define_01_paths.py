@@ -5,14 +5,19 @@ Enumeration of important paths on local file system.
 """
 
 import typing as T
+import os
 import sys
-import subprocess
+import time
+import sqlite3
 import dataclasses
 from pathlib import Path
 from functools import cached_property
 
 from .helpers import print_command
 from .logger import logger
+from .trace import tracer
+from .run_ledger import run_with_rusage, RunRecord
+from .output_capture import get_log_file_name, CapturedProcessError, OutputCapture
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
@@ -30,6 +35,8 @@ class PyWfPaths:
         real_run: bool,
         cwd: T.Optional[Path] = None,
         check: bool = True,
+        env: T.Optional[T.Dict[str, str]] = None,
+        capture: bool = False,
     ):
         """
         Run a command in a subprocess, also print the command for debug,
@@ -39,13 +46,82 @@ class PyWfPaths:
         :param real_run: If True, actually run the command; if False, just print it.
         :param cwd: The directory to change to before running the command.
         :param check: If True, raise an exception if the command fails.
+        :param env: Additional environment variables for the command.
+        :param capture: If True, stream the output line by line through the
+            logger instead of inheriting stdout, so it is hidden when the logger
+            is disabled. The full output is saved to a gzip file in
+            :meth:`dir_run_log_cache` named after the step, only the last lines
+            are kept in memory, they are the ``stdout`` of the result and are
+            shown in the error message if the command fails.
+
+        The wall time, CPU time and peak memory of the command are appended to
+        the run ledger, see
+        :meth:`~pywf_open_source.define_09_ops.PyWfOps.show_run_stats`.
         """
         if cwd is None:
             cwd = self.dir_project_root
         logger.info(f"cd to: {cwd}")
         print_command(args)
         if real_run is True:
-            return subprocess.run(args, cwd=cwd, check=check)
+            # the subprocess writes to the same stdout, flush the buffered log first
+            logger.flush()
+            command_name = Path(args[0]).name
+            step = logger.current_block or command_name
+            kwargs = dict()
+            if env is not None:
+                kwargs["env"] = {**os.environ, **env}
+            output_capture = None
+            if capture:
+                output_capture = OutputCapture(
+                    log_func=logger.info,
+                    path_log=self.dir_run_log_cache.joinpath(get_log_file_name(step)),
+                )
+                kwargs["read_output"] = output_capture.read_stream
+            started_at = time.time()
+            try:
+                with tracer.span(
+                    name=f"run command: {command_name}",
+                    cat="subprocess",
+                    args={"command": " ".join(map(str, args)), "cwd": str(cwd)},
+                ) as span_args:
+                    if output_capture is None:
+                        result, usage = run_with_rusage(args, cwd=cwd, **kwargs)
+                    else:
+                        with output_capture:
+                            result, usage = run_with_rusage(args, cwd=cwd, **kwargs)
+                        result.stdout = output_capture.tail
+                    span_args["returncode"] = result.returncode
+            except OSError:
+                # the resolved binary is gone or broken, check the tools
+                # again on the next access
+                self.tool_table.invalidate()
+                raise
+            record = RunRecord(
+                started_at=started_at,
+                step=step,
+                command=" ".join(map(str, args)),
+                cwd=str(cwd),
+                exit_code=result.returncode,
+                wall_time=usage.wall_time,
+                user_time=usage.user_time,
+                sys_time=usage.sys_time,
+                max_rss_kb=usage.max_rss_kb,
+            )
+            try:
+                self.run_ledger.append(record)
+            except (OSError, sqlite3.Error) as e:  # pragma: no cover
+                # the ledger is nice to have, never fail the command because of it
+                logger.info(f"failed to write run ledger: {e!r}")
+            if check and result.returncode != 0:
+                if output_capture is None:
+                    result.check_returncode()
+                raise CapturedProcessError(
+                    result.returncode,
+                    args,
+                    output=result.stdout,
+                    path_log=output_capture.path_log,
+                )
+            return result
 
     @cached_property
     def dir_home(self: "PyWf") -> Path:
@@ -146,16 +222,18 @@ class PyWfPaths:
 
         1. the bin folder in virtualenv.
         2. the global Python's bin folder.
-        3. Then use the raw command name (string) as the path.
+        3. the ``$PATH``.
+        4. Then use the raw command name (string) as the path.
+
+        The result is cached in
+        :meth:`~pywf_open_source.define_09_ops.PyWfOps.tool_table`, the file
+        system is checked once per process.
 
         Example: ``${dir_project_root}/.venv/bin/${cmd}`` or ``${global_python_bin}/${cmd}``
         """
-        p = self.dir_venv_bin.joinpath(cmd)
-        if p.exists():
-            return p
-        p = self.path_sys_executable.parent.joinpath(cmd)
-        if p.exists():
-            return p
+        info = self.tool_table.resolve(cmd, self.tool_search_dirs)
+        if info.is_found:
+            return Path(info.path)
         return Path(cmd)
 
     @property
@@ -256,6 +334,15 @@ class PyWfPaths:
         """
         return self.dir_htmlcov.joinpath("index.html")
 
+    @property
+    def path_github_workflow_main(self: "PyWf") -> Path:
+        """
+        The GitHub Actions CI workflow file, it has the Python version matrix.
+
+        Example: ``${dir_project_root}/.github/workflows/main.yml``
+        """
+        return self.dir_project_root.joinpath(".github", "workflows", "main.yml")
+
     # --------------------------------------------------------------------------
     # Sphinx doc
     # --------------------------------------------------------------------------
@@ -297,6 +384,16 @@ class PyWfPaths:
         """
         return self.dir_sphinx_doc_source.joinpath(self.package_name)
 
+    @property
+    def dir_sphinx_doc_source_api(self: "PyWf") -> Path:
+        """
+        The API reference Sphinx docs folder generated by ``docfly`` in
+        ``conf.py`` on every build.
+
+        Example: ``${dir_project_root}/docs/source/api``
+        """
+        return self.dir_sphinx_doc_source.joinpath("api")
+
     @property
     def dir_sphinx_doc_build(self: "PyWf") -> Path:
         """
@@ -434,6 +531,94 @@ class PyWfPaths:
         """
         return self.dir_project_root.joinpath("dist")
 
+    # ------------------------------------------------------------------------------
+    # Cache Related
+    # ------------------------------------------------------------------------------
+    _CACHE_RELATED = None
+
+    @property
+    def dir_cache(self: "PyWf") -> Path:
+        """
+        The local cache folder for incremental steps, it is safe to delete.
+
+        Example: ``${dir_project_root}/.cache``
+        """
+        return self.dir_project_root.joinpath(".cache")
+
+    @property
+    def dir_notebook_cache(self: "PyWf") -> Path:
+        """
+        The Jupyter notebook execution cache folder.
+
+        Example: ``${dir_project_root}/.cache/notebook``
+        """
+        return self.dir_cache.joinpath("notebook")
+
+    @property
+    def dir_build_cache(self: "PyWf") -> Path:
+        """
+        The built Python distribution cache folder.
+
+        Example: ``${dir_project_root}/.cache/build``
+        """
+        return self.dir_cache.joinpath("build")
+
+    @property
+    def dir_build_env_cache(self: "PyWf") -> Path:
+        """
+        The reusable isolated PEP 517 build environment folder.
+
+        Example: ``${dir_project_root}/.cache/build-env``
+        """
+        return self.dir_cache.joinpath("build-env")
+
+    @property
+    def dir_http_cache(self: "PyWf") -> Path:
+        """
+        The SaaS API conditional request (ETag) cache folder.
+
+        Example: ``${dir_project_root}/.cache/http``
+        """
+        return self.dir_cache.joinpath("http")
+
+    @property
+    def path_run_ledger(self: "PyWf") -> Path:
+        """
+        The SQLite database of the :meth:`run_command` resource usage history.
+
+        Example: ``${dir_project_root}/.cache/run_ledger.sqlite``
+        """
+        return self.dir_cache.joinpath("run_ledger.sqlite")
+
+    @property
+    def path_tool_table(self: "PyWf") -> Path:
+        """
+        The resolved CLI tool paths and versions, see :meth:`tool_table`.
+
+        Example: ``${dir_project_root}/.cache/tools.json``
+        """
+        return self.dir_cache.joinpath("tools.json")
+
+    @property
+    def dir_run_log_cache(self: "PyWf") -> Path:
+        """
+        The folder of the gzip compressed full output of the
+        ``run_command(..., capture=True)`` commands, one file per step.
+
+        Example: ``${dir_project_root}/.cache/run-log``
+        """
+        return self.dir_cache.joinpath("run-log")
+
+    @property
+    def dir_matrix_venv_cache(self: "PyWf") -> Path:
+        """
+        The reusable virtualenv folder of each Python version for
+        :meth:`~pywf_open_source.define_04_tests.PyWfTests.run_matrix_test`.
+
+        Example: ``${dir_project_root}/.cache/matrix``
+        """
+        return self.dir_cache.joinpath("matrix")
+
     # ------------------------------------------------------------------------------
     # AWS Related
     # ------------------------------------------------------------------------------
@@ -524,19 +524,25 @@ class PyWfDeps:
 
         # write the ``poetry.lock`` hash to the cache file
         if real_run:
-            self.path_poetry_lock_hash_json.write_text(
-                json.dumps(
-                    {
-                        "hash": current_poetry_lock_hash,
-                        "description": (
-                            "DON'T edit this file manually! This file is the cache of "
-                            "the poetry.lock file hash. It is used to avoid unnecessary "
-                            "expansive 'poetry export ...' command."
-                        ),
-                    },
-                    indent=4,
-                )
+            self._write_poetry_lock_hash(current_poetry_lock_hash)
+
+    def _write_poetry_lock_hash(
+        self: "PyWf",
+        poetry_lock_hash: str,
+    ):
+        self.path_poetry_lock_hash_json.write_text(
+            json.dumps(
+                {
+                    "hash": poetry_lock_hash,
+                    "description": (
+                        "DON'T edit this file manually! This file is the cache of "
+                        "the poetry.lock file hash. It is used to avoid unnecessary "
+                        "expansive 'poetry export ...' command."
+                    ),
+                },
+                indent=4,
             )
+        )
 
     @logger.emoji_block(
         msg="Export all dependencies to requirements-***.txt",
@@ -549,15 +555,34 @@ class PyWfDeps:
         quiet: bool = False,
     ) -> bool:
         """
+        The exported files are restored from the shared remote cache if
+        :meth:`~pywf_open_source.define.PyWf.remote_cache_url` is set and it
+        has the files exported from the same ``poetry.lock``.
+
         :return: ``True`` if ``poetry export`` is executed, ``False`` if not.
         """
         poetry_lock_hash = sha256_of_bytes(self.path_poetry_lock.read_bytes())
         if self._do_we_need_poetry_export(poetry_lock_hash):
+            remote_key = f"requirements-{int(with_hash)}-{poetry_lock_hash}"
+            if self._restore_from_remote_cache(remote_key, real_run):
+                self._write_poetry_lock_hash(poetry_lock_hash)
+                return False
             self._poetry_export_logic(
                 current_poetry_lock_hash=poetry_lock_hash,
                 with_hash=with_hash,
                 real_run=real_run,
             )
+            self._save_to_remote_cache(
+                remote_key,
+                [
+                    self.path_requirements,
+                    self.path_requirements_dev,
+                    self.path_requirements_test,
+                    self.path_requirements_doc,
+                    self.path_requirements_automation,
+                ],
+                real_run,
+            )
             return True
         else:
             logger.info("already did, do nothing")
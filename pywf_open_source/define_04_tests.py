@@ -5,14 +5,27 @@ Testing Automation for Python Projects.
 """
 
 import typing as T
+import time
 import subprocess
 import dataclasses
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .vendor.emoji import Emoji
 from .vendor.os_platform import OPEN_COMMAND
 
 from .logger import logger
+from .watch import iter_changes
+from .import_graph import ImportGraph
+from .pytest_worker import PytestWorker
+from .matrix import (
+    get_ci_python_versions,
+    find_interpreters,
+    MatrixStatus,
+    MatrixResult,
+    run_matrix_version,
+    format_matrix_table,
+)
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
@@ -70,7 +83,8 @@ class PyWfTests:
         ]
         if quiet:
             args.append("--quiet")
-        self.run_command(args, real_run)
+        # a large test suite prints a lot, keep only the tail in memory
+        self.run_command(args, real_run, capture=True)
 
     def run_unit_test(
         self: "PyWf",
@@ -85,6 +99,255 @@ class PyWfTests:
 
     run_unit_test.__doc__ = _run_unit_test.__doc__
 
+    def _run_affected_test(
+        self: "PyWf",
+        graph: ImportGraph,
+        changed: T.Iterable[str],
+        worker: T.Optional[PytestWorker] = None,
+        quiet: bool = False,
+    ) -> T.Optional[int]:
+        """
+        Run the test modules that depend on the changed files.
+
+        :return: the pytest exit code, None if no test is affected.
+        """
+        graph.refresh()
+        test_files = graph.get_affected_tests(changed)
+        if not test_files:
+            logger.info("no test module is affected")
+            return None
+        args = [
+            *test_files,
+            "-s",
+            f"--rootdir={self.dir_project_root}",
+        ]
+        if quiet:
+            args.append("--quiet")
+        logger.info(f"run {len(test_files)} affected test module(s)")
+        st = time.time()
+        if worker is None:
+            args = [f"{self.path_venv_bin_pytest}", *args]
+            returncode = self.run_command(args, real_run=True, check=False).returncode
+        else:
+            logger.flush()
+            returncode = worker.run(args)
+        emoji = Emoji.succeeded if returncode == 0 else Emoji.failed
+        logger.info(f"{emoji} exit code {returncode}, elapsed = {time.time() - st:.2f} sec")
+        return returncode
+
+    @logger.emoji_block(
+        msg="Watch and Run Affected Unit Test",
+        emoji=Emoji.test,
+    )
+    def _watch_test(
+        self: "PyWf",
+        use_worker: bool = True,
+        real_run: bool = True,
+        quiet: bool = False,
+    ):
+        """
+        Watch the package source code and the ``tests`` folder, on change,
+        only run the test modules that import the changed files, directly or
+        transitively, based on the static import graph. Bursts of changes are
+        merged into one run.
+
+        With ``use_worker``, the tests run in a warm worker process that has
+        pytest and the third party packages imported already, see
+        :mod:`pywf_open_source.pytest_worker`.
+
+        Press ``Ctrl + C`` to stop.
+
+        Run:
+
+        .. code-block:: bash
+
+            # on every change
+            pytest tests/test_affected_1.py tests/test_affected_2.py -s --rootdir=/path/to/project/root
+        """
+        flag = self._do_we_run_test(self.dir_tests)
+        if not flag:  # pragma: no cover
+            raise RuntimeError(f"{Emoji.red_circle} unit test not run!")
+        dirs = [self.dir_python_lib, self.dir_tests]
+        graph = ImportGraph(dir_root=self.dir_project_root, dirs=dirs)
+        graph.refresh()
+        logger.info(
+            f"found {len(graph.modules)} modules, "
+            f"{len(graph.test_files)} test modules"
+        )
+        if real_run is False:
+            return
+        worker = None
+        if use_worker and PytestWorker.is_supported():  # pragma: no cover
+            worker = PytestWorker(
+                path_python=self.path_venv_bin_python,
+                dir_root=self.dir_project_root,
+                preload=graph.get_external_imports(),
+            )
+            try:
+                worker.start()
+            except RuntimeError as e:
+                logger.error(f"{Emoji.red_circle} {e}, run pytest without worker")
+                worker = None
+        logger.info(f"watching {', '.join(map(str, dirs))}")
+        try:
+            for changed in iter_changes(
+                dirs=dirs,
+                suffixes=[".py"],
+            ):  # pragma: no cover
+                logger.info(f"{len(changed)} file(s) changed")
+                try:
+                    self._run_affected_test(graph, changed, worker, quiet)
+                except RuntimeError as e:
+                    logger.error(f"{Emoji.red_circle} {e}")
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
+        finally:
+            if worker is not None:  # pragma: no cover
+                worker.close()
+
+    def watch_test(
+        self: "PyWf",
+        use_worker: bool = True,
+        real_run: bool = True,
+        verbose: bool = True,
+    ):  # pragma: no cover
+        with logger.disabled(not verbose):
+            return self._watch_test(
+                use_worker=use_worker,
+                real_run=real_run,
+                quiet=not verbose,
+            )
+
+    watch_test.__doc__ = _watch_test.__doc__
+
+    @logger.emoji_block(
+        msg="Run Unit Test on Multiple Python Versions",
+        emoji=Emoji.test,
+    )
+    def _run_matrix_test(
+        self: "PyWf",
+        versions: T.Optional[T.List[str]] = None,
+        max_workers: T.Optional[int] = None,
+        real_run: bool = True,
+        quiet: bool = False,
+    ) -> T.List[MatrixResult]:
+        """
+        Run the unit test on multiple Python versions in parallel, and show
+        a combined pass / fail and timing table.
+
+        Each Python version has a reusable virtualenv in
+        :meth:`~pywf_open_source.define_01_paths.PyWfPaths.dir_matrix_venv_cache`,
+        it is rebuilt only when the interpreter, ``requirements.txt`` or
+        ``requirements-test.txt`` changes, run :meth:`poetry_export` after
+        you update the ``poetry.lock``. The output of each version is saved to
+        :meth:`~pywf_open_source.define_01_paths.PyWfPaths.dir_run_log_cache`.
+
+        Run:
+
+        .. code-block:: bash
+
+            # for each Python version, in parallel
+            # only if the virtualenv is out of date
+            virtualenv -p python3.X .cache/matrix/py3.X
+            .cache/matrix/py3.X/bin/python -m pip install -r requirements.txt -r requirements-test.txt
+            # always
+            .cache/matrix/py3.X/bin/python -m pytest tests -p no:cacheprovider --rootdir=/path/to/project/root
+
+        :param versions: the ``X.Y`` Python versions, by default the
+            ``python-version`` matrix in ``.github/workflows/main.yml``, or the
+            ``dev_python`` version if not found.
+        :param max_workers: the number of versions to run at the same time,
+            by default all of them.
+
+        :raise ValueError: if ``versions`` is an empty list.
+        :raise RuntimeError: if the tests fail on any available version.
+        """
+        if versions is not None and len(versions) == 0:
+            raise ValueError(
+                "versions is an empty list, give at least one Python version, "
+                "or None to use the CI matrix"
+            )
+        flag = self._do_we_run_test(self.dir_tests)
+        if not flag:  # pragma: no cover
+            raise RuntimeError(f"{Emoji.red_circle} unit test not run!")
+        if versions is None:
+            versions = get_ci_python_versions(self.path_github_workflow_main) or [
+                f"{self.py_ver_major}.{self.py_ver_minor}"
+            ]
+        requirements = [self.path_requirements, self.path_requirements_test]
+        for path in requirements:
+            if path.exists() is False:
+                raise RuntimeError(
+                    f"{Emoji.red_circle} {path} not found, run poetry_export first!"
+                )
+        interpreters = find_interpreters(versions, self.tool_table)
+        for version, info in interpreters.items():
+            logger.info(f"python{version}: {info.path if info else 'not found'}")
+        if real_run is False:
+            return []
+
+        info = self.tool_table.resolve("virtualenv", self.tool_search_dirs)
+        path_virtualenv = info.path if info.is_found else None
+        pytest_args = [
+            f"{self.dir_tests}",
+            "-p",
+            "no:cacheprovider",
+            f"--rootdir={self.dir_project_root}",
+        ]
+        if quiet:
+            pytest_args.append("--quiet")
+        logger.info(f"run unit test on {len(versions)} Python versions ...")
+        with ThreadPoolExecutor(max_workers=max_workers or len(versions)) as executor:
+            results = list(
+                executor.map(
+                    lambda version: run_matrix_version(
+                        version=version,
+                        interpreter=interpreters[version],
+                        dir_venv=self.dir_matrix_venv_cache.joinpath(f"py{version}"),
+                        requirements=requirements,
+                        pytest_args=pytest_args,
+                        cwd=self.dir_project_root,
+                        path_log=self.dir_run_log_cache.joinpath(
+                            f"matrix-py{version}.log.gz"
+                        ),
+                        path_virtualenv=path_virtualenv,
+                    ),
+                    versions,
+                )
+            )
+        for line in format_matrix_table(results).splitlines():
+            logger.info(line)
+        failed = [
+            result
+            for result in results
+            if result.status in (MatrixStatus.failed, MatrixStatus.error)
+        ]
+        for result in failed:
+            logger.info(f"python{result.version} full output: {result.path_log}")
+        if failed:
+            raise RuntimeError(
+                f"{Emoji.red_circle} unit test failed on Python "
+                f"{', '.join(result.version for result in failed)}"
+            )
+        return results
+
+    def run_matrix_test(
+        self: "PyWf",
+        versions: T.Optional[T.List[str]] = None,
+        max_workers: T.Optional[int] = None,
+        real_run: bool = True,
+        verbose: bool = True,
+    ) -> T.List[MatrixResult]:
+        with logger.disabled(not verbose):
+            return self._run_matrix_test(
+                versions=versions,
+                max_workers=max_workers,
+                real_run=real_run,
+                quiet=not verbose,
+            )
+
+    run_matrix_test.__doc__ = _run_matrix_test.__doc__
+
     @logger.emoji_block(
         msg="Run Code Coverage Test",
         emoji=Emoji.test,
@@ -120,7 +383,7 @@ class PyWfTests:
         ]
         if quiet:
             args.append("--quiet")
-        self.run_command(args, real_run)
+        self.run_command(args, real_run, capture=True)
 
     def run_cov_test(
         self: "PyWf",
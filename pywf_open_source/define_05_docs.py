@@ -5,13 +5,29 @@ Document Build and Deploy Automation for Python Projects.
 """
 
 import typing as T
+import time
 import shutil
+import tempfile
+import subprocess
 import dataclasses
+from pathlib import Path
 
 from .vendor.emoji import Emoji
 from .vendor.os_platform import OPEN_COMMAND
 
 from .logger import logger
+from .helpers import sha256_of_bytes
+from .watch import DEFAULT_IGNORE_DIRS, iter_changes
+from .doc_server import LiveReloadServer
+from .notebook_cache import (
+    read_notebook,
+    write_notebook,
+    get_kernel_name,
+    get_notebook_cache_key,
+    extract_code_cell_outputs,
+    inject_code_cell_outputs,
+    NotebookCache,
+)
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
@@ -60,14 +76,21 @@ class PyWfDocs:
             f"{self.dir_sphinx_doc_source}",
             f"{self.dir_sphinx_doc_build}",
         ]
-        self.run_command(args, real_run)
+        # sphinx prints a line per document, keep only the tail in memory
+        self.run_command(args, real_run, capture=True)
 
     def build_doc(
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = True,
+        execute_notebook: bool = False,
     ):  # pragma: no cover
         with logger.disabled(not verbose):
+            if execute_notebook:
+                self._execute_notebook(
+                    real_run=real_run,
+                    quiet=not verbose,
+                )
             return self._build_doc(
                 real_run=real_run,
                 quiet=not verbose,
@@ -75,6 +98,110 @@ class PyWfDocs:
 
     build_doc.__doc__ = _build_doc.__doc__
 
+    def _sphinx_build_incremental(
+        self: "PyWf",
+        real_run: bool = True,
+        quiet: bool = False,
+    ):
+        """
+        Run ``sphinx-build`` without removing the previous build, Sphinx only
+        re-reads and re-writes the pages whose source (or the Python module
+        it documents) changed since the last build.
+        """
+        args = [
+            f"{self.path_venv_bin_sphinx_build}",
+            "-M",
+            "html",
+            f"{self.dir_sphinx_doc_source}",
+            f"{self.dir_sphinx_doc_build}",
+        ]
+        if quiet:
+            args.append("--quiet")
+        self.run_command(args, real_run)
+
+    @logger.emoji_block(
+        msg="Serve Documentation Site Locally",
+        emoji=Emoji.doc,
+    )
+    def _serve_doc(
+        self: "PyWf",
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        open_browser: bool = True,
+        real_run: bool = True,
+        quiet: bool = False,
+    ):
+        """
+        Serve the documentation site locally with live reload. It watches the
+        ``docs/source`` folder and the package source code, runs an incremental
+        build on change, and reloads the page in web browser. The API reference
+        folders generated by the build itself are not watched, otherwise each
+        build would trigger the next one.
+
+        Press ``Ctrl + C`` to stop.
+
+        Run:
+
+        .. code-block:: bash
+
+            sphinx-build -M html docs/source docs/build
+            # then on every change
+            sphinx-build -M html docs/source docs/build --quiet
+        """
+        self._sphinx_build_incremental(real_run=real_run, quiet=quiet)
+        if real_run is False:
+            return
+        server = LiveReloadServer(
+            directory=self.dir_sphinx_doc_build_html,
+            host=host,
+            port=port,
+        )
+        server.start()
+        logger.info(f"serving {self.dir_sphinx_doc_build_html} at {server.url}")
+        if open_browser:  # pragma: no cover
+            self.run_command([OPEN_COMMAND, server.url], real_run)
+        ignore_dirs = DEFAULT_IGNORE_DIRS | {
+            str(self.dir_sphinx_doc_source_api),
+            str(self.dir_sphinx_doc_source_python_lib),
+        }
+        try:
+            for changed in iter_changes(
+                dirs=[self.dir_sphinx_doc_source, self.dir_python_lib],
+                ignore_dirs=ignore_dirs,
+            ):  # pragma: no cover
+                logger.info(f"{len(changed)} file(s) changed, rebuild ...")
+                st = time.time()
+                try:
+                    self._sphinx_build_incremental(real_run=True, quiet=True)
+                except subprocess.CalledProcessError:
+                    logger.error(f"{Emoji.red_circle} build failed, see error above.")
+                    continue
+                server.notify_reload()
+                logger.info(f"reloaded, elapsed = {time.time() - st:.2f} sec")
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
+        finally:
+            server.stop()
+
+    def serve_doc(
+        self: "PyWf",
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        open_browser: bool = True,
+        real_run: bool = True,
+        verbose: bool = True,
+    ):  # pragma: no cover
+        with logger.disabled(not verbose):
+            return self._serve_doc(
+                host=host,
+                port=port,
+                open_browser=open_browser,
+                real_run=real_run,
+                quiet=not verbose,
+            )
+
+    serve_doc.__doc__ = _serve_doc.__doc__
+
     @logger.emoji_block(
         msg="View Documentation Site Locally",
         emoji=Emoji.doc,
@@ -114,6 +241,105 @@ class PyWfDocs:
 
     view_doc.__doc__ = _view_doc.__doc__
 
+    def _iter_notebook(self: "PyWf") -> T.Iterable[Path]:
+        for path_notebook in self.dir_sphinx_doc_source.glob("**/*.ipynb"):
+            if ".ipynb_checkpoints" in str(path_notebook):  # pragma: no cover
+                continue
+            yield path_notebook
+
+    def _run_notebook(
+        self: "PyWf",
+        path_notebook: Path,
+        kernel_name: str,
+        real_run: bool = True,
+    ) -> T.Optional[T.Dict[str, T.Any]]:
+        """
+        Execute a notebook with ``jupyter nbconvert --execute`` into a temp
+        folder and return the executed notebook, the source notebook is not touched.
+        """
+        with tempfile.TemporaryDirectory() as dir_tmp:
+            args = [
+                f"{self.path_venv_bin_bin_jupyter}",
+                "nbconvert",
+                "--to",
+                "notebook",
+                "--execute",
+                f"--ExecutePreprocessor.kernel_name={kernel_name}",
+                "--output-dir",
+                dir_tmp,
+                "--output",
+                path_notebook.name,
+                str(path_notebook),
+            ]
+            self.run_command(args, real_run, cwd=path_notebook.parent)
+            if real_run:
+                return read_notebook(Path(dir_tmp, path_notebook.name))
+            return None
+
+    @logger.emoji_block(
+        msg="Execute Jupyter Notebook",
+        emoji=Emoji.doc,
+    )
+    def _execute_notebook(
+        self: "PyWf",
+        real_run: bool = True,
+        quiet: bool = False,
+    ) -> T.List[Path]:
+        """
+        Execute Jupyter notebooks in the ``docs/source`` folder and write the
+        outputs back to the notebook, so both ``nbsphinx`` and ``nbconvert``
+        use the outputs without running the code again.
+
+        Outputs are cached per code cell at ``${dir_project_root}/.cache/notebook``.
+        The cache key is based on the source of the code cells, the kernel name
+        and the ``poetry.lock`` file hash. On cache hit, the cached outputs are
+        injected into the notebook and the execution is skipped.
+
+        :return: the list of notebooks that are actually executed.
+        """
+        if self.path_poetry_lock.exists():
+            poetry_lock_digest = sha256_of_bytes(self.path_poetry_lock.read_bytes())
+        else:  # pragma: no cover
+            poetry_lock_digest = ""
+        cache = NotebookCache(dir_cache=self.dir_notebook_cache)
+        executed = list()
+        for path_notebook in self._iter_notebook():
+            relpath = path_notebook.relative_to(self.dir_project_root)
+            notebook = read_notebook(path_notebook)
+            key = get_notebook_cache_key(notebook, poetry_lock_digest)
+            cell_outputs = cache.get(key)
+            if cell_outputs is None:
+                logger.info(f"cache miss, execute {relpath}")
+                executed.append(path_notebook)
+                executed_notebook = self._run_notebook(
+                    path_notebook=path_notebook,
+                    kernel_name=get_kernel_name(notebook),
+                    real_run=real_run,
+                )
+                if executed_notebook is None:
+                    continue
+                cell_outputs = extract_code_cell_outputs(executed_notebook)
+                cache.put(key, cell_outputs)
+            else:
+                logger.info(f"cache hit, skip {relpath}")
+            if inject_code_cell_outputs(notebook, cell_outputs):
+                if real_run:
+                    write_notebook(path_notebook, notebook)
+        return executed
+
+    def execute_notebook(
+        self: "PyWf",
+        real_run: bool = True,
+        verbose: bool = True,
+    ):
+        with logger.disabled(not verbose):
+            return self._execute_notebook(
+                real_run=real_run,
+                quiet=not verbose,
+            )
+
+    execute_notebook.__doc__ = _execute_notebook.__doc__
+
     @logger.emoji_block(
         msg="Convert Jupyter Notebook to Markdown",
         emoji=Emoji.doc,
@@ -126,9 +352,7 @@ class PyWfDocs:
         Convert Jupyter notebooks to Markdown files so they can be
         more efficiently included in the AI knowledge base.
         """
-        for path_notebook in self.dir_sphinx_doc_source.glob("**/*.ipynb"):
-            if ".ipynb_checkpoints" in str(path_notebook):  # pragma: no cover
-                continue
+        for path_notebook in self._iter_notebook():
             path_markdown = path_notebook.parent / "index.md"
             args = [
                 f"{self.path_venv_bin_bin_jupyter}",
@@ -145,8 +369,14 @@ class PyWfDocs:
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = True,
+        execute_notebook: bool = False,
     ):
         with logger.disabled(not verbose):
+            if execute_notebook:
+                self._execute_notebook(
+                    real_run=real_run,
+                    quiet=not verbose,
+                )
             return self._notebook_to_markdown(
                 real_run=real_run,
             )
@@ -10,11 +10,18 @@ import dataclasses
 
 from .vendor.emoji import Emoji
 from .vendor.build_dist import (
-    build_dist_with_python_build,
-    build_dist_with_poetry_build,
+    build_dist_with_pep517_backend,
+    get_build_env_key,
+    ensure_build_env,
+    install_dynamic_build_requires,
 )
 
 from .logger import logger
+from .build_cache import (
+    get_source_date_epoch,
+    get_dist_source_digest,
+    DistCache,
+)
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
@@ -26,6 +33,58 @@ class PyWfBuild:
     Namespace class for build related automation.
     """
 
+    def _build_with_cache(
+        self: "PyWf",
+        builder: str,
+        build_func: T.Callable[[T.Dict[str, str]], T.Any],
+        real_run: bool = True,
+        use_cache: bool = True,
+    ) -> bool:
+        """
+        Build the distribution with ``build_func`` unless we have the artifacts
+        built from the exact same source in the local cache, or in the shared
+        remote cache if :meth:`~pywf_open_source.define.PyWf.remote_cache_url`
+        is set.
+
+        The cache key is the digest of the files that go into the distribution
+        (package source code after the ``[tool.poetry] exclude`` rules,
+        ``pyproject.toml``, readme and license files). The build runs with a
+        fixed ``SOURCE_DATE_EPOCH``, so the artifacts are byte-reproducible.
+
+        :param builder: the build tool name, it is part of the cache key.
+        :param build_func: a function that takes the environment variables
+            and builds the distribution into the ``dist`` folder.
+
+        :return: ``True`` if the build is executed, ``False`` if the artifacts
+            are restored from cache.
+        """
+        digest = get_dist_source_digest(
+            dir_project_root=self.dir_project_root,
+            toml_data=self.toml_data,
+            salt=builder,
+        )
+        cache = DistCache(dir_cache=self.dir_build_cache)
+        if use_cache and cache.has(digest):
+            logger.info(f"source digest {digest[:12]} is not changed, restore from cache")
+            if real_run:
+                for path in cache.restore(digest, self.dir_dist):
+                    logger.info(f"restored {path.name}", indent=1)
+            return False
+
+        remote_key = f"dist-{builder}-{digest}"
+        if use_cache and self._restore_from_remote_cache(remote_key, real_run):
+            cache.save(digest, self.dir_dist)
+            return False
+
+        if self.dir_dist.exists():
+            if real_run:
+                shutil.rmtree(self.dir_dist, ignore_errors=True)
+        build_func({"SOURCE_DATE_EPOCH": get_source_date_epoch()})
+        if real_run and use_cache:
+            cache.save(digest, self.dir_dist)
+            self._save_to_remote_cache(remote_key, [self.dir_dist], real_run)
+        return True
+
     @logger.emoji_block(
         msg="Build python distribution using pypa-build",
         emoji=Emoji.build,
@@ -34,7 +93,8 @@ class PyWfBuild:
         self: "PyWf",
         real_run: bool = True,
         quiet: bool = False,
-    ):
+        use_cache: bool = True,
+    ) -> bool:
         """
         Build python source distribution using
         `pypa-build <https://pypa-build.readthedocs.io/en/latest/>`_.
@@ -43,28 +103,44 @@ class PyWfBuild:
 
         .. code-block:: bash
 
-            python -m build --sdist --wheel
+            SOURCE_DATE_EPOCH=315532800 python -m build --sdist --wheel
+
+        :param use_cache: if True, restore the artifacts from
+            ``${dir_project_root}/.cache/build`` when the source is not changed.
+
+        :return: ``True`` if the build is executed, ``False`` if the artifacts
+            are restored from cache.
         """
-        if self.dir_dist.exists():
-            if real_run:
-                shutil.rmtree(self.dir_dist, ignore_errors=True)
-        build_dist_with_python_build(
-            dir_project_root=self.dir_project_root,
-            path_bin_python=self.path_venv_bin_python,
-            log_func=logger.info,
+        return self._build_with_cache(
+            builder="python-build",
+            # stream the output instead of buffering it in memory
+            build_func=lambda env: self.run_command(
+                [
+                    f"{self.path_venv_bin_python}",
+                    "-m",
+                    "build",
+                    "--sdist",
+                    "--wheel",
+                ],
+                real_run=real_run,
+                env=env,
+                capture=True,
+            ),
             real_run=real_run,
-            verbose=not quiet,
+            use_cache=use_cache,
         )
 
     def python_build(
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = True,
+        use_cache: bool = True,
     ):
         with logger.disabled(not verbose):
             return self._python_build(
                 real_run=real_run,
                 quiet=not verbose,
+                use_cache=use_cache,
             )
 
     python_build.__doc__ = _python_build.__doc__
@@ -77,7 +153,8 @@ class PyWfBuild:
         self: "PyWf",
         real_run: bool = True,
         quiet: bool = False,
-    ):
+        use_cache: bool = True,
+    ) -> bool:
         """
         Build python source distribution using
 
@@ -87,28 +164,132 @@ class PyWfBuild:
 
         .. code-block:: bash
 
-            poetry build
+            SOURCE_DATE_EPOCH=315532800 poetry build
+
+        :param use_cache: if True, restore the artifacts from
+            ``${dir_project_root}/.cache/build`` when the source is not changed.
+
+        :return: ``True`` if the build is executed, ``False`` if the artifacts
+            are restored from cache.
         """
-        if self.dir_dist.exists():
-            if real_run:
-                shutil.rmtree(self.dir_dist, ignore_errors=True)
-        build_dist_with_poetry_build(
-            dir_project_root=self.dir_project_root,
-            path_bin_poetry=self.path_bin_poetry,
-            log_func=logger.info,
+        return self._build_with_cache(
+            builder="poetry-build",
+            build_func=lambda env: self.run_command(
+                [f"{self.path_bin_poetry}", "build", *(["--quiet"] if quiet else [])],
+                real_run=real_run,
+                env=env,
+                capture=True,
+            ),
             real_run=real_run,
-            verbose=not quiet,
+            use_cache=use_cache,
         )
 
     def poetry_build(
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = True,
+        use_cache: bool = True,
     ):
         with logger.disabled(not verbose):
             return self._poetry_build(
                 real_run=real_run,
                 quiet=not verbose,
+                use_cache=use_cache,
             )
 
     poetry_build.__doc__ = _poetry_build.__doc__
+
+    @logger.emoji_block(
+        msg="Build python distribution using PEP 517 build backend",
+        emoji=Emoji.build,
+    )
+    def _pep517_build(
+        self: "PyWf",
+        real_run: bool = True,
+        quiet: bool = False,
+        use_cache: bool = True,
+        isolated: bool = True,
+    ) -> bool:
+        """
+        Build python source distribution and wheel by calling the
+        ``build-system.build-backend`` hooks directly. It is a lot faster than
+        ``python -m build`` because it doesn't create a fresh isolated
+        environment for each artifact.
+
+        :param use_cache: if True, restore the artifacts from
+            ``${dir_project_root}/.cache/build`` when the source is not changed.
+        :param isolated: if True, run the build backend in an isolated build
+            environment at ``${dir_project_root}/.cache/build-env``, it is created
+            once and reused until ``build-system.requires`` changes, the
+            requirements returned by the backend's ``get_requires_for_build_*``
+            hooks are installed on top of it. If False,
+            run it in the virtualenv, the build backend (for example ``poetry-core``)
+            has to be installed there.
+
+        :return: ``True`` if the build is executed, ``False`` if the artifacts
+            are restored from cache.
+        """
+        build_system = self.toml_data["build-system"]
+
+        def build_func(env: T.Dict[str, str]):
+            if isolated:
+                requires = build_system.get("requires", [])
+                key = get_build_env_key(
+                    requires=requires,
+                    python_version=f"{self.py_ver_major}.{self.py_ver_minor}",
+                )
+                dir_env = self.dir_build_env_cache.joinpath(key)
+                path_bin_python = ensure_build_env(
+                    dir_env=dir_env,
+                    path_bin_python=self.path_venv_bin_python,
+                    requires=requires,
+                    log_func=logger.info,
+                    real_run=real_run,
+                    verbose=not quiet,
+                )
+                install_dynamic_build_requires(
+                    dir_env=dir_env,
+                    dir_project_root=self.dir_project_root,
+                    build_backend=build_system["build-backend"],
+                    backend_path=build_system.get("backend-path"),
+                    log_func=logger.info,
+                    real_run=real_run,
+                    verbose=not quiet,
+                )
+            else:
+                path_bin_python = self.path_venv_bin_python
+            build_dist_with_pep517_backend(
+                dir_project_root=self.dir_project_root,
+                path_bin_python=path_bin_python,
+                build_backend=build_system["build-backend"],
+                backend_path=build_system.get("backend-path"),
+                dir_dist=self.dir_dist,
+                log_func=logger.info,
+                real_run=real_run,
+                verbose=not quiet,
+                env=env,
+            )
+
+        return self._build_with_cache(
+            builder="pep517",
+            build_func=build_func,
+            real_run=real_run,
+            use_cache=use_cache,
+        )
+
+    def pep517_build(
+        self: "PyWf",
+        real_run: bool = True,
+        verbose: bool = True,
+        use_cache: bool = True,
+        isolated: bool = True,
+    ):
+        with logger.disabled(not verbose):
+            return self._pep517_build(
+                real_run=real_run,
+                quiet=not verbose,
+                use_cache=use_cache,
+                isolated=isolated,
+            )
+
+    pep517_build.__doc__ = _pep517_build.__doc__
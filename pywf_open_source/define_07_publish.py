@@ -5,7 +5,14 @@ Publish to Python repository related automation.
 """
 
 import typing as T
+import io
 import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    import toml as tomllib
 
 try:
     from github import (
@@ -21,11 +28,37 @@ except ImportError:  # pragma: no cover
 from .vendor.emoji import Emoji
 
 from .logger import logger
+from .helpers import (
+    get_sha256sums,
+    bump_version as get_bumped_version,
+    set_toml_version,
+    write_text_atomic,
+)
+from .pypi_upload import (
+    DEFAULT_REPOSITORY_URL,
+    DEFAULT_JSON_API_URL,
+    UploadStatus,
+    list_dist_files,
+    upload_dists,
+    get_pypi_token,
+)
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
 
 
+def _get_or_none(func: T.Callable, *args):  # pragma: no cover
+    """
+    Call a PyGithub getter, return None if the object doesn't exist.
+    """
+    try:
+        return func(*args)
+    except GithubException as e:
+        if e.status == 404:
+            return None
+        raise e
+
+
 @dataclasses.dataclass
 class PyWfPublish:
     """
@@ -36,67 +69,207 @@ class PyWfPublish:
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = False,
+        skip_existing: bool = False,
     ):
         """
         Publish to PyPI repository using
         `twine upload <https://twine.readthedocs.io/en/stable/index.html>`_.
+
+        :param skip_existing: continue uploading files if one already exists.
         """
         args = [
             f"{self.path_bin_twine}",
             "upload",
             f"{self.dir_dist}/*",
         ]
+        if skip_existing:
+            args.append("--skip-existing")
         self.run_command(args, real_run)
 
     def poetry_publish(
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = False,
+        skip_existing: bool = False,
     ):
         """
         Publish to PyPI repository using
         `poetry publish <https://python-poetry.org/docs/libraries/#publishing-to-pypi>`_.`
+
+        :param skip_existing: ignore errors from files already existing in the repository.
         """
         args = [
             f"{self.path_bin_poetry}",
             "publish",
         ]
+        if skip_existing:
+            args.append("--skip-existing")
         self.run_command(args, real_run)
 
-    def bump_version(
+    @logger.emoji_block(
+        msg="Publish to PyPI",
+        emoji=Emoji.package,
+    )
+    def _pypi_upload(
+        self: "PyWf",
+        repository_url: str = DEFAULT_REPOSITORY_URL,
+        json_api_url: T.Optional[str] = DEFAULT_JSON_API_URL,
+        username: str = "__token__",
+        password: T.Optional[str] = None,
+        max_workers: int = 4,
+        real_run: bool = True,
+    ) -> bool:
+        """
+        Publish all files in the ``dist`` folder to PyPI repository using the
+        `upload API <https://docs.pypi.org/api/upload/>`_ directly,
+        without spawning ``twine`` or ``poetry``.
+
+        Files are uploaded concurrently and streamed from disk. Files that are
+        already published (checked with the JSON API) are skipped, so it is
+        safe to run it again after a partial failure.
+
+        :param repository_url: the upload API endpoint, default is PyPI.
+        :param json_api_url: the JSON API endpoint, use None to skip the check.
+        :param username: default is ``__token__`` for API token.
+        :param password: the API token, default is the ``TWINE_PASSWORD``
+            environment variable or the ``[pypi]`` password in ``~/.pypirc``.
+        :param max_workers: number of concurrent uploads.
+
+        :returns: a boolean flag to indicate whether all files are published.
+        """
+        paths = list_dist_files(self.dir_dist)
+        for path in paths:
+            logger.info(f"found {path.name}")
+        if real_run is False:
+            return False
+        if password is None:  # pragma: no cover
+            password = get_pypi_token()
+        if password is None:  # pragma: no cover
+            raise ValueError(
+                "PyPI token not found, set the TWINE_PASSWORD environment variable "
+                "or the password in the [pypi] section of ~/.pypirc."
+            )
+        results = upload_dists(
+            paths=paths,
+            username=username,
+            password=password,
+            repository_url=repository_url,
+            json_api_url=json_api_url,
+            max_workers=max_workers,
+        )
+        for result in results:
+            logger.info(f"{result.status}: {result.path.name} {result.message}")
+        failed = [
+            result.path.name
+            for result in results
+            if result.status == UploadStatus.failed
+        ]
+        if failed:
+            raise RuntimeError(f"{Emoji.red_circle} failed to upload {failed}")
+        return True
+
+    def pypi_upload(
+        self: "PyWf",
+        repository_url: str = DEFAULT_REPOSITORY_URL,
+        json_api_url: T.Optional[str] = DEFAULT_JSON_API_URL,
+        username: str = "__token__",
+        password: T.Optional[str] = None,
+        max_workers: int = 4,
+        real_run: bool = True,
+        verbose: bool = True,
+    ):
+        with logger.disabled(not verbose):
+            return self._pypi_upload(
+                repository_url=repository_url,
+                json_api_url=json_api_url,
+                username=username,
+                password=password,
+                max_workers=max_workers,
+                real_run=real_run,
+            )
+
+    pypi_upload.__doc__ = _pypi_upload.__doc__
+
+    @logger.emoji_block(
+        msg="Bump Version",
+        emoji=Emoji.label,
+    )
+    def _bump_version(
         self: "PyWf",
         major: bool = False,
         minor: bool = False,
         patch: bool = False,
+        minor_start_from: int = 0,
+        micro_start_from: int = 0,
         real_run: bool = True,
-        verbose: bool = False,
-    ):
+    ) -> str:
         """
         Bump a semantic version. The current version has to be in x.y.z format,
         where x, y, z are integers.
 
+        It edits the ``version`` field in ``pyproject.toml`` in place, the
+        comments and the formatting are preserved, and renders the
+        ``_version.py`` file with the new version. Both files are written
+        atomically, then :attr:`toml_data` is updated, no ``poetry``
+        subprocess is needed.
+
         :param major: bump major version.
         :param minor: bump minor version.
         :param patch: bump patch version.
         :param minor_start_from: if bumping major version, minor start from this number.
         :param micro_start_from: if bumping minor version, micro start from this number.
+
+        :returns: the new version.
         """
-        # update pyproject.toml file
-        if self.path_pyproject_toml.exists():
-            if major:
-                action = "major"
-            elif minor:
-                action = "minor"
-            elif patch:
-                action = "patch"
-            else:  # pragma: no cover
-                raise NotImplementedError
-            args = [
-                f"{self.path_bin_poetry}",
-                "version",
-                action,
-            ]
-            self.run_command(args, real_run)
+        # keep the original line endings
+        content = self.path_pyproject_toml.read_bytes().decode("utf-8")
+        current_version = tomllib.loads(content)["project"]["version"]
+        new_version = get_bumped_version(
+            current_version,
+            major=major,
+            minor=minor,
+            patch=patch,
+            minor_start_from=minor_start_from,
+            micro_start_from=micro_start_from,
+        )
+        logger.info(f"{current_version} -> {new_version}")
+        new_content = set_toml_version(content, new_version)
+        if real_run:
+            write_text_atomic(
+                {
+                    self.path_pyproject_toml: new_content,
+                    self.path_version_py: self._render_version_file(new_version),
+                }
+            )
+            for table in [
+                self.toml_data.get("project", {}),
+                self.toml_data.get("tool", {}).get("poetry", {}),
+            ]:
+                if "version" in table:
+                    table["version"] = new_version
+        return new_version
+
+    def bump_version(
+        self: "PyWf",
+        major: bool = False,
+        minor: bool = False,
+        patch: bool = False,
+        minor_start_from: int = 0,
+        micro_start_from: int = 0,
+        real_run: bool = True,
+        verbose: bool = False,
+    ) -> str:
+        with logger.disabled(not verbose):
+            return self._bump_version(
+                major=major,
+                minor=minor,
+                patch=patch,
+                minor_start_from=minor_start_from,
+                micro_start_from=micro_start_from,
+                real_run=real_run,
+            )
+
+    bump_version.__doc__ = _bump_version.__doc__
 
     @logger.emoji_block(
         msg="Publish to GitHub Release",
@@ -105,54 +278,63 @@ class PyWfPublish:
     def _publish_to_github_release(
         self: "PyWf",
         real_run: bool = True,
+        upload_assets: bool = False,
+        max_workers: int = 4,
     ) -> T.Optional["GitRelease"]:  # pragma: no cover
         """
         Create a GitHub Release using the current version based on main branch.
 
-        :returns: a boolean flag to indicate whether the operation is performed.
+        The release, tag and default branch lookups are sent concurrently.
+
+        :param upload_assets: if True, attach every artifact in the ``dist``
+            folder and a ``SHA256SUMS`` file to the release. Assets are uploaded
+            in parallel and streamed from disk, assets that are already attached
+            are skipped, so it also completes the assets of an existing release.
+        :param max_workers: number of concurrent requests.
+
+        :returns: the created release, or None if it already exists.
         """
         logger.info(f"preview release at {self.github_versioned_release_url}")
         release_name = self.package_version
 
         repo = self.gh.get_repo(self.github_repo_fullname)
 
+        # these lookups don't depend on each other, send them concurrently.
+        # the branch is only needed when the tag doesn't exist, but fetching
+        # it ahead saves one round trip in that case.
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            future_release = executor.submit(
+                _get_or_none, repo.get_release, release_name
+            )
+            future_ref = executor.submit(
+                _get_or_none, repo.get_git_ref, f"tags/{release_name}"
+            )
+            future_branch = executor.submit(repo.get_branch, repo.default_branch)
+            release = future_release.result()
+            ref = future_ref.result()
+
         # Check if release exists
-        try:
-            repo.get_release(release_name)
+        if release is not None:
             logger.info(f"Release {release_name!r} already exists.")
+            if upload_assets and real_run:
+                self._upload_github_release_assets(release, max_workers)
             return None
-        except GithubException as e:
-            if e.status == 404:
-                pass
-            else:
-                raise e
-        except Exception as e:  # pragma: no cover
-            raise e
 
         # Create Tag if not exists
-        try:
-            repo.get_git_ref(f"tags/{release_name}")
+        if ref is not None:
             logger.info(f"Tag {release_name!r} already exists.")
-        except GithubException as e:
-            if e.status == 404:
-                if real_run:
-                    default_branch = repo.default_branch
-                    commit = repo.get_branch(default_branch).commit
-                    commit_sha = commit.sha
-                    tag = repo.create_git_tag(
-                        tag=release_name,
-                        message=f"Release {release_name}",
-                        object=commit_sha,
-                        type="commit",
-                    )
-                    repo.create_git_ref(
-                        ref=f"refs/tags/{release_name}",
-                        sha=tag.sha,
-                    )
-            else:  # pragma: no cover
-                raise e
-        except Exception as e:  # pragma: no cover
-            raise e
+        elif real_run:
+            commit_sha = future_branch.result().commit.sha
+            tag = repo.create_git_tag(
+                tag=release_name,
+                message=f"Release {release_name}",
+                object=commit_sha,
+                type="commit",
+            )
+            repo.create_git_ref(
+                ref=f"refs/tags/{release_name}",
+                sha=tag.sha,
+            )
 
         # Create Release
         if real_run:
@@ -161,18 +343,65 @@ class PyWfPublish:
                 name=release_name,
                 message=f"Release {release_name}",
             )
+            if upload_assets:
+                self._upload_github_release_assets(release, max_workers)
             return release
         else:
             return None
 
+    def _upload_github_release_assets(
+        self: "PyWf",
+        release: "GitRelease",
+        max_workers: int = 4,
+    ):  # pragma: no cover
+        """
+        Upload the artifacts in the ``dist`` folder and the ``SHA256SUMS``
+        file to a GitHub release in parallel.
+        """
+        existing = {asset.name for asset in release.get_assets()}
+        paths = [
+            path for path in list_dist_files(self.dir_dist) if path.name not in existing
+        ]
+        for path in paths:
+            logger.info(f"upload asset {path.name}")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    release.upload_asset,
+                    path=str(path),
+                    content_type="application/octet-stream",
+                )
+                for path in paths
+            ]
+            if "SHA256SUMS" not in existing:
+                logger.info("upload asset SHA256SUMS")
+                sha256sums = get_sha256sums(list_dist_files(self.dir_dist))
+                b = sha256sums.encode("utf-8")
+                futures.append(
+                    executor.submit(
+                        release.upload_asset_from_memory,
+                        file_like=io.BytesIO(b),
+                        file_size=len(b),
+                        name="SHA256SUMS",
+                        content_type="text/plain",
+                    )
+                )
+            for future in futures:
+                future.result()
+
     def publish_to_github_release(
         self: "PyWf",
         real_run: bool = True,
         verbose: bool = True,
+        upload_assets: bool = False,
+        max_workers: int = 4,
     ):  # pragma: no cover
         with logger.disabled(not verbose):
             return self._publish_to_github_release(
                 real_run=real_run,
+                upload_assets=upload_assets,
+                max_workers=max_workers,
             )
 
     publish_to_github_release.__doc__ = _publish_to_github_release.__doc__
@@ -5,12 +5,14 @@ Setup SaaS services for your Open Source Python project.
 """
 
 import typing as T
+import time
 import dataclasses
 from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    import requests
-    from github import Github, Auth, Repository
+    from github import Github, Repository
+    from .github_client import GITHUB_API_URL, get_github
 except ImportError:  # pragma: no cover
     pass
 
@@ -18,20 +20,83 @@ from .vendor.emoji import Emoji
 
 from .logger import logger
 from .helpers import raise_http_response_error
+from .http_client import HttpClient
+from .rate_limit import default_scheduler
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .define import PyWf
 
 
+class SaasStepStatus:
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclasses.dataclass
+class SaasStepResult:
+    """
+    The result of one SaaS setup step in :meth:`PyWfSaas.bootstrap_saas`.
+    """
+
+    name: str = dataclasses.field()
+    status: str = dataclasses.field()
+    elapsed: float = dataclasses.field(default=0.0)
+    message: str = dataclasses.field(default="")
+
+
+def _run_saas_step(
+    name: str,
+    func: T.Callable[[], T.Any],
+) -> SaasStepResult:
+    st = time.perf_counter()
+    try:
+        func()
+        status, message = SaasStepStatus.succeeded, ""
+    except Exception as e:
+        status, message = SaasStepStatus.failed, f"{type(e).__name__}: {e}"
+    return SaasStepResult(name, status, time.perf_counter() - st, message)
+
+
 @dataclasses.dataclass
 class PyWfSaas:
     """
     Namespace class for SaaS service setup automation.
     """
 
+    @cached_property
+    def http_client(self: "PyWf") -> HttpClient:
+        """
+        The shared HTTP client for the SaaS API calls, with connection pooling,
+        retry, ETag cache and the process wide rate limit scheduler.
+        """
+        return HttpClient(
+            dir_cache=self.dir_http_cache,
+            scheduler=default_scheduler,
+        )
+
+    @property
+    def github_api_url(self: "PyWf") -> str:
+        """
+        The GitHub REST API base URL.
+        """
+        return GITHUB_API_URL
+
     @cached_property
     def gh(self: "PyWf") -> "Github":
-        return Github(auth=Auth.Token(self.github_token))
+        """
+        The PyGithub client, it is shared by all PyWf objects with the same
+        token in this process, and its requests go through the process wide
+        rate limit scheduler, see :mod:`pywf_open_source.github_client`.
+        """
+        return get_github(
+            token=self.github_token,
+            scheduler=default_scheduler,
+            url=self.github_api_url,
+            timeout=self.http_client.timeout,
+            pool_size=self.http_client.pool_size,
+            max_retries=self.http_client.max_retries,
+            backoff=self.http_client.backoff,
+        )
 
     @logger.emoji_block(
         msg="Edit GitHub Repo metadata",
@@ -97,7 +162,7 @@ class PyWfSaas:
         endpoint = "https://api.codecov.io/api/v2"
         url = f"{endpoint}/github/{self.github_account}/repos/{self.git_repo_name}/"
         if real_run:  # pragma: no cover
-            response = requests.get(url, headers=headers)
+            response = self.http_client.get(url, headers=headers)
             response.raise_for_status()
             is_private = response.json()["private"]
             if is_private is True:
@@ -105,7 +170,8 @@ class PyWfSaas:
 
         url = f"{endpoint}/github/{self.github_account}/repos/{self.git_repo_name}/config/"
         if real_run:  # pragma: no cover
-            response = requests.get(url, headers=headers)
+            # the response contains the secret token, don't cache it on disk
+            response = self.http_client.get(url, headers=headers, cache=False)
             response.raise_for_status()
             upload_token = response.json()["upload_token"]
             return upload_token
@@ -195,7 +261,7 @@ class PyWfSaas:
 
         url = f"{endpoint}/projects/{self.readthedocs_project_name_slug}/"
         if real_run: # pragma: no cover
-            response = requests.get(url, headers=headers)
+            response = self.http_client.get(url, headers=headers)
             if response.status_code == 200:
                 url = f"https://app.readthedocs.org/projects/{self.readthedocs_project_name_slug}/"
                 logger.info(
@@ -221,7 +287,7 @@ class PyWfSaas:
             "tags": [],
         }
         if real_run: # pragma: no cover
-            response = requests.post(
+            response = self.http_client.post(
                 url,
                 headers=headers,
                 json=data,
@@ -241,3 +307,89 @@ class PyWfSaas:
             )
 
     setup_readthedocs_project.__doc__ = _setup_readthedocs_project.__doc__
+
+    @logger.emoji_block(
+        msg="Bootstrap SaaS Services",
+        emoji=Emoji.deploy,
+    )
+    def _bootstrap_saas(
+        self: "PyWf",
+        real_run: bool = True,
+    ) -> T.List[SaasStepResult]:
+        """
+        Setup codecov.io, readthedocs.org and the GitHub repo metadata
+        concurrently, the three steps are independent:
+
+        1. :meth:`setup_codecov_io_upload_token_on_github`
+        2. :meth:`setup_readthedocs_project`
+        3. :meth:`edit_github_repo_metadata`, the repo homepage is the
+           readthedocs site URL, it doesn't need the readthedocs project.
+
+        The step logs are suppressed because the steps run in threads,
+        a combined status report is printed at the end.
+
+        :returns: the result of each step.
+
+        :raise RuntimeError: if any step failed, after the status report.
+        """
+        # create the shared clients before entering the threads
+        if real_run:  # pragma: no cover
+            _ = self.http_client
+            _ = self.gh
+
+        steps = [
+            (
+                "codecov.io upload token",
+                lambda: self._setup_codecov_io_upload_token_on_github(
+                    real_run=real_run,
+                ),
+            ),
+            (
+                "readthedocs.org project",
+                lambda: self._setup_readthedocs_project(real_run=real_run),
+            ),
+            (
+                "GitHub repo metadata",
+                lambda: self._edit_github_repo_metadata(real_run=real_run),
+            ),
+        ]
+        with logger.disabled(True):
+            with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+                futures = [
+                    executor.submit(_run_saas_step, name, func)
+                    for name, func in steps
+                ]
+                results = [future.result() for future in futures]
+
+        for result in results:
+            emoji = {
+                SaasStepStatus.succeeded: Emoji.succeeded,
+                SaasStepStatus.failed: Emoji.failed,
+            }[result.status]
+            logger.info(
+                f"{emoji} {result.name}: {result.status}, "
+                f"elapsed = {result.elapsed:.2f} sec"
+            )
+            if result.message:
+                with logger.indent():
+                    logger.info(result.message)
+        failed = [
+            result.name
+            for result in results
+            if result.status == SaasStepStatus.failed
+        ]
+        if failed:
+            raise RuntimeError(f"{Emoji.red_circle} failed to set up {failed}")
+        return results
+
+    def bootstrap_saas(
+        self: "PyWf",
+        real_run: bool = True,
+        verbose: bool = True,
+    ):
+        with logger.disabled(not verbose):
+            return self._bootstrap_saas(
+                real_run=real_run,
+            )
+
+    bootstrap_saas.__doc__ = _bootstrap_saas.__doc__
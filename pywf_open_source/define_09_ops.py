@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+CLI tools, run stats and remote cache related automation, shared by all steps.
+"""
+
+import typing as T
+import os
+import dataclasses
+from pathlib import Path
+from functools import cached_property
+
+from .vendor.emoji import Emoji
+
+from .logger import logger
+from .run_ledger import RunLedger, format_stats_report
+from .tool_table import ToolInfo, ToolTable
+from .remote_cache import RemoteCacheError, RemoteCache, get_store
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .define import PyWf
+
+
+@dataclasses.dataclass
+class PyWfOps:
+    """
+    Namespace class for the CLI tools, run stats and remote cache.
+    """
+
+    # --------------------------------------------------------------------------
+    # CLI tools
+    # --------------------------------------------------------------------------
+    @cached_property
+    def tool_table(self: "PyWf") -> ToolTable:
+        """
+        The CLI tool resolution table, it is persisted at
+        :meth:`~pywf_open_source.define_01_paths.PyWfPaths.path_tool_table`.
+        """
+        return ToolTable(path_cache=self.path_tool_table)
+
+    @property
+    def tool_search_dirs(self: "PyWf") -> T.List[Path]:
+        """
+        The folders to search the CLI tools in order, before ``$PATH``.
+        """
+        return [self.dir_venv_bin, self.path_sys_executable.parent]
+
+    @logger.emoji_block(
+        msg="Check CLI tools",
+        emoji=Emoji.computer,
+    )
+    def _doctor(
+        self: "PyWf",
+        tools: T.Sequence[str] = ("python", "virtualenv", "poetry", "twine"),
+    ) -> T.List[ToolInfo]:
+        """
+        Resolve all CLI tools the workflow needs and probe their versions
+        concurrently, so a missing or broken tool is reported at start-up
+        instead of failing in the middle of a pipeline. The versions are
+        cached until the binary changes.
+
+        The tools are checked against the file system again, even if they
+        are already resolved in this process.
+        """
+        results = self.tool_table.probe_all(
+            tools,
+            self.tool_search_dirs,
+            revalidate=True,
+        )
+        for info in results:
+            if info.is_ok:
+                logger.info(f"{Emoji.succeeded} {info.name} {info.version}: {info.path}")
+            elif info.is_found:
+                logger.info(f"{Emoji.failed} {info.name}: {info.path}, {info.error}")
+            else:
+                logger.info(f"{Emoji.failed} {info.name}: not found")
+        return results
+
+    def doctor(
+        self: "PyWf",
+        verbose: bool = True,
+    ) -> T.List[ToolInfo]:
+        with logger.disabled(not verbose):
+            return self._doctor()
+
+    doctor.__doc__ = _doctor.__doc__
+
+    # --------------------------------------------------------------------------
+    # Run ledger
+    # --------------------------------------------------------------------------
+    @cached_property
+    def run_ledger(self: "PyWf") -> RunLedger:
+        """
+        The history of all commands run by
+        :meth:`~pywf_open_source.define_01_paths.PyWfPaths.run_command`.
+        """
+        return RunLedger(path=self.path_run_ledger)
+
+    @logger.emoji_block(
+        msg="Show run stats",
+        emoji=Emoji.start_timer,
+    )
+    def _show_run_stats(
+        self: "PyWf",
+        top: int = 10,
+        window: int = 10,
+    ) -> str:
+        """
+        Show the slowest and the most memory hungry steps, the trend of the
+        recent runs, and the steps slower than the rolling median of their
+        previous ``window`` runs.
+        """
+        report = format_stats_report(
+            self.run_ledger.get_step_stats(window=window),
+            top=top,
+        )
+        for line in report.splitlines():
+            logger.info(line)
+        return report
+
+    def show_run_stats(
+        self: "PyWf",
+        top: int = 10,
+        window: int = 10,
+        verbose: bool = True,
+    ) -> str:
+        with logger.disabled(not verbose):
+            return self._show_run_stats(
+                top=top,
+                window=window,
+            )
+
+    show_run_stats.__doc__ = _show_run_stats.__doc__
+
+    # --------------------------------------------------------------------------
+    # Remote cache
+    # --------------------------------------------------------------------------
+    @cached_property
+    def remote_cache(self: "PyWf") -> T.Optional[RemoteCache]:
+        """
+        The shared remote cache of the step outputs, None if
+        :meth:`~pywf_open_source.define.PyWf.remote_cache_url` is not set.
+        The ``PYWF_REMOTE_CACHE_TOKEN`` environment variable is sent as the
+        bearer token to an HTTP store.
+        """
+        url = self.remote_cache_url
+        if not url:
+            return None
+        return RemoteCache(
+            store=get_store(url, token=os.environ.get("PYWF_REMOTE_CACHE_TOKEN"))
+        )
+
+    def _restore_from_remote_cache(
+        self: "PyWf",
+        key: str,
+        real_run: bool = True,
+    ) -> bool:
+        """
+        Restore the step outputs from the remote cache.
+
+        :return: True if restored, False if the remote cache is disabled,
+            it doesn't have the key, or it fails.
+        """
+        if self.remote_cache is None or real_run is False:
+            return False
+        key = f"{self.package_name}-{key}"
+        try:
+            paths = self.remote_cache.restore(key, self.dir_project_root)
+        except (OSError, RemoteCacheError) as e:
+            # the remote cache is nice to have, never fail the step because of it
+            logger.info(f"failed to restore {key} from remote cache: {e}")
+            return False
+        if paths is None:
+            logger.info(f"{key} is not in remote cache")
+            return False
+        logger.info(f"restored {len(paths)} file(s) of {key} from remote cache")
+        return True
+
+    def _save_to_remote_cache(
+        self: "PyWf",
+        key: str,
+        outputs: T.List[Path],
+        real_run: bool = True,
+    ):
+        """
+        Save the step outputs to the remote cache, if it is enabled.
+
+        :param outputs: the output folders / files in the project.
+        """
+        if self.remote_cache is None or real_run is False:
+            return
+        key = f"{self.package_name}-{key}"
+        try:
+            self.remote_cache.save(
+                key,
+                self.dir_project_root,
+                [path.relative_to(self.dir_project_root) for path in outputs],
+            )
+        except (OSError, RemoteCacheError) as e:
+            logger.info(f"failed to save {key} to remote cache: {e}")
+            return
+        logger.info(f"saved {key} to remote cache")
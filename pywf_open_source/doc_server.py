@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+A local HTTP server for the built documentation site with live reload.
+
+Every HTML page is served with a tiny script injected, the script polls the
+``/__livereload__`` endpoint and reloads the page when the build version
+changes. Call :meth:`LiveReloadServer.notify_reload` after each rebuild.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import json
+import threading
+import functools
+from pathlib import Path
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+LIVERELOAD_PATH = "/__livereload__"
+
+LIVERELOAD_SCRIPT = """
+<script>
+(function () {
+  var version = null;
+  function poll() {
+    fetch("%s", {cache: "no-store"})
+      .then(function (res) { return res.json(); })
+      .then(function (data) {
+        if (version !== null && data.version !== version) {
+          window.location.reload();
+          return;
+        }
+        version = data.version;
+        setTimeout(poll, 500);
+      })
+      .catch(function () { setTimeout(poll, 1000); });
+  }
+  poll();
+})();
+</script>
+""" % LIVERELOAD_PATH
+
+
+def inject_livereload_script(html: bytes) -> bytes:
+    script = LIVERELOAD_SCRIPT.encode("utf-8")
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + script
+    return html[:index] + script + html[index:]
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serve static files, inject the live reload script into HTML pages and
+    answer the build version on the :data:`LIVERELOAD_PATH` endpoint.
+    """
+
+    server: "LiveReloadServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if path == LIVERELOAD_PATH:
+            return self._send(
+                body=json.dumps({"version": self.server.version}).encode("utf-8"),
+                content_type="application/json",
+            )
+        path_file = Path(self.translate_path(path))
+        if path_file.is_dir():
+            path_file = path_file.joinpath("index.html")
+        if path_file.suffix == ".html" and path_file.is_file():
+            return self._send(
+                body=inject_livereload_script(path_file.read_bytes()),
+                content_type="text/html; charset=utf-8",
+            )
+        return super().do_GET()
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: T.Any):  # pragma: no cover
+        pass
+
+
+class LiveReloadServer(ThreadingHTTPServer):
+    """
+    Serve the ``directory`` over HTTP in a background thread.
+
+    Example:
+
+    .. code-block:: python
+
+        server = LiveReloadServer(directory=Path("docs/build/html"), port=8000)
+        server.start()
+        ...  # rebuild
+        server.notify_reload()
+        ...
+        server.stop()
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        directory: Path,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+    ):
+        handler = functools.partial(LiveReloadHandler, directory=str(directory))
+        super().__init__((host, port), handler)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._thread: T.Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def notify_reload(self):
+        with self._lock:
+            self.version += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
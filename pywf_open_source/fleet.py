@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+Run the same :class:`~pywf_open_source.define.PyWf` operation across many
+projects in parallel, and collect the results into one summary table.
+
+Example:
+
+.. code-block:: python
+
+    from pathlib import Path
+    from pywf_open_source.fleet import discover_projects, run_fleet, format_summary_table
+
+    dir_project_roots = discover_projects(Path.home().joinpath("GitHub"))
+    results = run_fleet(dir_project_roots, "poetry_export", max_workers=8)
+    print(format_summary_table(results))
+"""
+
+import typing as T
+import os
+import time
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import logger
+from .watch import DEFAULT_IGNORE_DIRS
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .define import PyWf
+
+Operation = T.Union[str, T.Callable[["PyWf"], T.Any]]
+
+
+def discover_projects(
+    dir_root: Path,
+    max_depth: int = 3,
+    ignore_dirs: T.Iterable[str] = DEFAULT_IGNORE_DIRS,
+) -> T.List[Path]:
+    """
+    Find the project root folders (the folder has a ``pyproject.toml`` file)
+    under ``dir_root``. It doesn't look into a project root for more projects.
+
+    :param max_depth: how many levels of sub folders to look into,
+        0 means only check ``dir_root`` itself.
+
+    :return: sorted list of project root folders.
+    """
+    ignore_dirs = set(ignore_dirs)
+    dir_project_roots = list()
+    stack = [(str(dir_root), 0)]
+    while stack:
+        dir_path, depth = stack.pop()
+        try:
+            entries = list(os.scandir(dir_path))
+        except (FileNotFoundError, PermissionError, NotADirectoryError):
+            continue
+        if any(e.name == "pyproject.toml" and e.is_file() for e in entries):
+            dir_project_roots.append(Path(dir_path))
+            continue
+        if depth == max_depth:
+            continue
+        for entry in entries:
+            if (
+                entry.is_dir(follow_symlinks=False)
+                and entry.name not in ignore_dirs
+                and not entry.name.startswith(".")
+            ):
+                stack.append((entry.path, depth + 1))
+    return sorted(dir_project_roots)
+
+
+class FleetStatus:
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclasses.dataclass
+class FleetResult:
+    """
+    The result of running an operation on one project.
+    """
+
+    dir_project_root: Path = dataclasses.field()
+    status: str = dataclasses.field()
+    elapsed: float = dataclasses.field(default=0.0)
+    message: str = dataclasses.field(default="")
+    return_value: T.Any = dataclasses.field(default=None)
+
+
+def run_operation(
+    dir_project_root: Path,
+    operation: Operation,
+    kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+) -> FleetResult:
+    """
+    Create a :class:`~pywf_open_source.define.PyWf` from the project root
+    and run the operation on it, the exception is captured in the result.
+
+    :param operation: a ``PyWf`` method name, for example ``"build_package"``,
+        it is called with ``verbose=False``; or a function that takes
+        a ``PyWf`` object.
+    :param kwargs: additional arguments for the ``PyWf`` method.
+    """
+    from .define import PyWf
+
+    st = time.perf_counter()
+    try:
+        pywf = PyWf.from_pyproject_toml(dir_project_root.joinpath("pyproject.toml"))
+        if isinstance(operation, str):
+            return_value = getattr(pywf, operation)(
+                **{"verbose": False, **(kwargs or {})}
+            )
+        else:
+            return_value = operation(pywf, **(kwargs or {}))
+        status, message = FleetStatus.succeeded, ""
+    except Exception as e:
+        return_value = None
+        status, message = FleetStatus.failed, f"{type(e).__name__}: {e}"
+    return FleetResult(
+        dir_project_root=dir_project_root,
+        status=status,
+        elapsed=time.perf_counter() - st,
+        message=message,
+        return_value=return_value,
+    )
+
+
+def run_fleet(
+    dir_project_roots: T.Iterable[Path],
+    operation: Operation,
+    kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    max_workers: int = 8,
+) -> T.List[FleetResult]:
+    """
+    Run the operation on every project with a thread pool.
+
+    The logger is disabled while the pool is running, because the output of
+    concurrent projects would be interleaved and can't be told apart. Use
+    :func:`format_summary_table` to review the results.
+
+    :return: the results in the same order as ``dir_project_roots``.
+    """
+    dir_project_roots = [Path(p) for p in dir_project_roots]
+    with logger.disabled(True):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda p: run_operation(p, operation, kwargs),
+                    dir_project_roots,
+                )
+            )
+
+
+def format_summary_table(
+    results: T.List[FleetResult],
+    max_message_length: int = 80,
+) -> str:
+    """
+    Format the results as a plain text table, with a total line at the end.
+    """
+    rows = [("project", "status", "elapsed", "message")]
+    for result in results:
+        message = result.message.splitlines()[0] if result.message else ""
+        if len(message) > max_message_length:
+            message = message[: max_message_length - 3] + "..."
+        rows.append(
+            (
+                str(result.dir_project_root),
+                result.status,
+                f"{result.elapsed:.2f}s",
+                message,
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(3)]
+    lines = list()
+    for i, row in enumerate(rows):
+        cells = [row[j].ljust(widths[j]) for j in range(3)] + [row[3]]
+        lines.append(" | ".join(cells).rstrip())
+        if i == 0:
+            lines.append("-+-".join("-" * w for w in widths + [len(row[3])]))
+    n_failed = sum(1 for r in results if r.status == FleetStatus.failed)
+    total_elapsed = sum(r.elapsed for r in results)
+    lines.append(
+        f"{len(results)} projects, {len(results) - n_failed} succeeded, "
+        f"{n_failed} failed, total elapsed = {total_elapsed:.2f}s"
+    )
+    return "\n".join(lines)
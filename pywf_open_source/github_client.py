@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+The process wide PyGithub client, its requests go through the rate limit
+scheduler, see :mod:`pywf_open_source.rate_limit`.
+
+PyGithub owns its HTTP connection, so the scheduler is plugged in through
+its extension points:
+
+- the :class:`ScheduledTokenAuth` is called before every request, it waits
+  for the turn of the request, and feeds the ``X-RateLimit-*`` values of the
+  previous response to the scheduler.
+- the :class:`ScheduledGithubRetry` is called on a rate limited (``403`` /
+  ``429``) response, it feeds the ``Retry-After`` and ``X-RateLimit-*``
+  headers to the scheduler, so the other threads wait as well.
+
+There is one ``Github`` object per token and scheduler in the process, so
+many PyWf objects (for example a fleet run) share the same budget.
+
+.. note::
+
+    This module requires ``PyGithub``.
+"""
+
+import typing as T
+import threading
+
+from github import Github, Auth, GithubRetry
+from github.Requester import WithRequester
+
+from .rate_limit import RateLimitScheduler
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+class ScheduledTokenAuth(Auth.Token, WithRequester["ScheduledTokenAuth"]):
+    """
+    The token authentication that waits for the scheduler before every request.
+
+    :param token: the GitHub token.
+    :param scheduler: the rate limit scheduler.
+    :param url: the GitHub API base URL, it is the provider of the scheduler.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        scheduler: RateLimitScheduler,
+        url: str = GITHUB_API_URL,
+    ):
+        Auth.Token.__init__(self, token)
+        WithRequester.__init__(self)
+        self.scheduler = scheduler
+        self.url = url
+        self._last_rate_limit: T.Optional[T.Tuple[T.Any, ...]] = None
+        self._lock = threading.Lock()
+
+    def _feed_rate_limit(self):
+        """
+        Feed the rate limit state of the last response to the scheduler.
+        """
+        requester = self.requester
+        if requester is None:  # pragma: no cover
+            return
+        (remaining, limit), reset = (
+            requester.rate_limiting,
+            requester.rate_limiting_resettime,
+        )
+        if remaining < 0:
+            return
+        rate_limit = (remaining, limit, reset)
+        with self._lock:
+            if rate_limit == self._last_rate_limit:
+                return
+            self._last_rate_limit = rate_limit
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+        }
+        if reset:
+            headers["X-RateLimit-Reset"] = str(reset)
+        self.scheduler.update(self.url, 200, headers)
+
+    def authentication(self, headers: dict) -> None:
+        self._feed_rate_limit()
+        self.scheduler.acquire(self.url)
+        super().authentication(headers)
+
+
+class ScheduledGithubRetry(GithubRetry):
+    """
+    The ``GithubRetry`` that tells the scheduler about the rate limited
+    responses before waiting for the retry.
+
+    :param scheduler: the rate limit scheduler.
+    :param url: the GitHub API base URL, it is the provider of the scheduler.
+    """
+
+    def __init__(
+        self,
+        scheduler: T.Optional[RateLimitScheduler] = None,
+        url: str = GITHUB_API_URL,
+        **kwargs: T.Any,
+    ):
+        self.scheduler = scheduler
+        self.url = url
+        super().__init__(**kwargs)
+
+    def new(self, **kw: T.Any) -> "ScheduledGithubRetry":
+        kw.update(scheduler=self.scheduler, url=self.url)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, *args, **kwargs):
+        if response is not None and self.scheduler is not None:
+            self.scheduler.update(self.url, response.status, response.headers)
+        return super().increment(method, url, response, *args, **kwargs)
+
+
+_github_clients: T.Dict[T.Tuple[str, str, RateLimitScheduler], Github] = dict()
+_github_clients_lock = threading.Lock()
+
+
+def get_github(
+    token: str,
+    scheduler: RateLimitScheduler,
+    url: str = GITHUB_API_URL,
+    timeout: float = 10,
+    pool_size: int = 10,
+    max_retries: int = 3,
+    backoff: float = 0.5,
+) -> Github:
+    """
+    Get the process wide ``Github`` object of the token, create it on the
+    first call. The requests are paced by the ``scheduler`` instead of the
+    ``seconds_between_requests`` of PyGithub.
+    """
+    key = (token, url, scheduler)
+    with _github_clients_lock:
+        gh = _github_clients.get(key)
+        if gh is None:
+            gh = Github(
+                auth=ScheduledTokenAuth(token, scheduler=scheduler, url=url),
+                base_url=url,
+                timeout=int(timeout),
+                pool_size=pool_size,
+                retry=ScheduledGithubRetry(
+                    scheduler=scheduler,
+                    url=url,
+                    total=max_retries,
+                    backoff_factor=backoff,
+                ),
+                seconds_between_requests=None,
+            )
+            _github_clients[key] = gh
+        return gh
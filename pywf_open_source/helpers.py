@@ -9,7 +9,11 @@ Helper functions.
 """
 
 import typing as T
+import os
+import re
 import hashlib
+import tempfile
+from pathlib import Path
 
 try:
     from requests import Response
@@ -25,6 +29,27 @@ def sha256_of_bytes(b: bytes) -> str:  # pragma: no cover
     return sha256.hexdigest()
 
 
+def sha256_of_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calculate the sha256 of a file in chunks, so it never loads
+    the whole file into memory.
+    """
+    sha256 = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_sha256sums(paths: T.Iterable[Path]) -> str:
+    """
+    Generate the content of a ``SHA256SUMS`` file, the same format as
+    the ``sha256sum`` command output, so it can be verified with
+    ``sha256sum --check SHA256SUMS``.
+    """
+    return "".join(f"{sha256_of_file(path)}  {Path(path).name}\n" for path in paths)
+
+
 def bump_version(
     current_version: str,
     major: bool = False,
@@ -68,6 +93,79 @@ def bump_version(
     return f"{major_ver}.{minor_ver}.{micro_ver}"
 
 
+_TOML_TABLE_PATTERN = re.compile(r"^\s*\[\s*([^\[\]]+?)\s*\]\s*(#.*)?$")
+_TOML_VERSION_PATTERN = re.compile(
+    r"^(\s*version\s*=\s*)([\"'])([^\"']*)\2(.*)$",
+)
+
+
+def set_toml_version(
+    content: str,
+    version: str,
+    tables: T.Iterable[str] = ("project", "tool.poetry"),
+) -> str:
+    """
+    Replace the ``version = "..."`` value in the given tables of a
+    ``pyproject.toml`` content. It is a line based edit, the comments,
+    blank lines and the rest of the file are preserved as is.
+
+    :param content: the ``pyproject.toml`` content.
+    :param version: the new version.
+    :param tables: the tables to update, the missing ones are ignored.
+
+    :raise ValueError: if none of the tables has a static version.
+    """
+    tables = set(tables)
+    lines = content.splitlines(keepends=True)
+    table = None
+    updated = set()
+    for i, line in enumerate(lines):
+        match = _TOML_TABLE_PATTERN.match(line)
+        if match is not None:
+            table = match.group(1).replace(" ", "")
+            continue
+        if table not in tables or table in updated:
+            continue
+        match = _TOML_VERSION_PATTERN.match(line.rstrip("\r\n"))
+        if match is not None:
+            prefix, quote, _, suffix = match.groups()
+            eol = line[len(line.rstrip("\r\n")) :]
+            lines[i] = f"{prefix}{quote}{version}{quote}{suffix}{eol}"
+            updated.add(table)
+    if not updated:
+        raise ValueError(f"no static version found in the {sorted(tables)} tables")
+    return "".join(lines)
+
+
+def write_text_atomic(contents: T.Dict[Path, str]):
+    """
+    Write multiple text files, all of them or none of them. The new contents
+    are written to temp files next to the targets first, then they are
+    renamed over the targets, so a failure never leaves a half written file,
+    or one file updated and the others not because of a write error.
+    """
+    paths_tmp = dict()
+    try:
+        for path, content in contents.items():
+            fd, path_tmp = tempfile.mkstemp(
+                prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+            )
+            paths_tmp[path] = path_tmp
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+            if path.exists():
+                os.chmod(path_tmp, path.stat().st_mode & 0o7777)
+    except BaseException:
+        for path_tmp in paths_tmp.values():
+            try:
+                os.remove(path_tmp)
+            except OSError:  # pragma: no cover
+                pass
+        raise
+    for path, path_tmp in paths_tmp.items():
+        os.replace(path_tmp, path)
+
+
 def print_command(args: T.List[str]):
     cmd = " ".join(args)
     logger.info(f"run command: {cmd}")
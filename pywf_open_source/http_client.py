@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+The shared HTTP client for the SaaS API calls (codecov.io, readthedocs.org,
+GitHub, PyPI ...).
+
+- keep-alive connection pooling, one TCP / TLS handshake per host.
+- default timeout for every request.
+- retry with exponential backoff and full jitter.
+- optional client side rate limit, see :mod:`pywf_open_source.rate_limit`.
+- local conditional request cache, a ``GET`` response with ``ETag`` or
+  ``Last-Modified`` header is stored on disk, the next ``GET`` sends
+  ``If-None-Match`` / ``If-Modified-Since`` and a ``304 Not Modified`` response
+  is served from the cache.
+"""
+
+import typing as T
+import json
+import time
+import random
+import base64
+import hashlib
+import threading
+from pathlib import Path
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # pragma: no cover
+    pass
+
+from .rate_limit import RateLimitScheduler
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+# POST and PATCH are not idempotent, they are only retried on connection error
+# when ``retry=True`` is given explicitly
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+# these request headers change the response, they are part of the cache key
+VARY_HEADERS = ["accept", "authorization"]
+
+
+def new_session(pool_size: int = DEFAULT_POOL_SIZE) -> "requests.Session":
+    """
+    Create a keep-alive HTTP session with a connection pool big enough for
+    ``pool_size`` concurrent requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_backoff_seconds(
+    attempt: int,
+    backoff: float,
+    max_backoff: float,
+) -> float:
+    """
+    Exponential backoff with full jitter, ``attempt`` starts from 1.
+
+    Ref: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+    """
+    return random.uniform(0, min(max_backoff, backoff * 2 ** (attempt - 1)))
+
+
+class ETagCache:
+    """
+    The on disk store of the conditional request cache, each entry is a
+    ``${key}.json`` file. The key is based on the URL and the request headers
+    that change the response, so different tokens never share an entry.
+
+    :param dir_cache: the directory to store the cache entries.
+    """
+
+    def __init__(self, dir_cache: Path):
+        self.dir_cache = dir_cache
+
+    @staticmethod
+    def get_key(url: str, headers: T.Mapping[str, str]) -> str:
+        lower_headers = {k.lower(): v for k, v in headers.items()}
+        data = [url] + [lower_headers.get(name, "") for name in VARY_HEADERS]
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        return self.dir_cache.joinpath(f"{key}.json")
+
+    def get(self, key: str) -> T.Optional[T.Dict[str, T.Any]]:
+        try:
+            return json.loads(self.get_path(key).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key: str, response: "requests.Response"):
+        entry = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(response.content).decode("ascii"),
+        }
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path_tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        path_tmp.write_text(json.dumps(entry), encoding="utf-8")
+        # the response may contain private data, only the owner can read it
+        path_tmp.chmod(0o600)
+        path_tmp.replace(path)
+
+    @staticmethod
+    def to_response(
+        entry: T.Dict[str, T.Any],
+        request: "requests.PreparedRequest",
+    ) -> "requests.Response":
+        response = requests.Response()
+        response.status_code = entry["status_code"]
+        response.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+        response._content = base64.b64decode(entry["content"])
+        response.url = entry["url"]
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers
+        )
+        return response
+
+
+class HttpClient:
+    """
+    A thread safe HTTP client with connection pooling, timeout, retry and
+    conditional request cache.
+
+    Example:
+
+    .. code-block:: python
+
+        client = HttpClient(dir_cache=Path(".cache/http"))
+        response = client.get("https://api.github.com/repos/MacHu-GWU/pywf_open_source-project")
+
+    :param pool_size: max number of keep-alive connections per host.
+    :param timeout: default timeout in seconds of each request.
+    :param max_retries: max number of retries after the first attempt.
+    :param backoff: the base backoff in seconds, it doubles on every retry.
+    :param max_backoff: the max backoff in seconds.
+    :param dir_cache: the conditional request cache directory,
+        if None, the cache is disabled.
+    :param scheduler: the rate limit scheduler, requests wait for their turn
+        and the ones rejected by the rate limit are sent again (up to
+        ``max_rate_limit_retries`` times), if None, there is no rate limit.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        dir_cache: T.Optional[Path] = None,
+        scheduler: T.Optional[RateLimitScheduler] = None,
+        max_rate_limit_retries: int = 5,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.scheduler = scheduler
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.session = new_session(pool_size=pool_size)
+        if dir_cache is None:
+            self.etag_cache = None
+        else:
+            self.etag_cache = ETagCache(dir_cache=dir_cache)
+
+    def _send(
+        self,
+        request: "requests.PreparedRequest",
+        retry: bool,
+        **kwargs,
+    ) -> "requests.Response":
+        attempt = 0
+        rate_limit_attempt = 0
+        while True:
+            if self.scheduler is not None:
+                self.scheduler.acquire(request.url)
+            attempt += 1
+            try:
+                response = self.session.send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if retry is False or attempt > self.max_retries:
+                    raise
+            else:
+                if self.scheduler is not None and self.scheduler.update(
+                    request.url, response.status_code, response.headers
+                ):
+                    # the request was not processed, it is safe to send it
+                    # again after the scheduler's wait, even for POST
+                    rate_limit_attempt += 1
+                    if rate_limit_attempt <= self.max_rate_limit_retries:
+                        attempt -= 1
+                        response.close()
+                        continue
+                if (
+                    retry is False
+                    or attempt > self.max_retries
+                    or response.status_code not in RETRY_STATUS_CODES
+                ):
+                    return response
+                response.close()
+            time.sleep(get_backoff_seconds(attempt, self.backoff, self.max_backoff))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: T.Optional[T.Dict[str, str]] = None,
+        timeout: T.Optional[float] = None,
+        retry: T.Optional[bool] = None,
+        cache: bool = True,
+        **kwargs,
+    ) -> "requests.Response":
+        """
+        Send an HTTP request.
+
+        :param method: HTTP method.
+        :param url: the URL.
+        :param headers: request headers.
+        :param timeout: the timeout in seconds, default is the client timeout.
+        :param retry: whether to retry on connection error and retryable status
+            codes, by default only idempotent methods are retried.
+        :param cache: whether to use the conditional request cache for ``GET``,
+            use False for responses that contain secrets.
+        :param kwargs: other arguments for :meth:`requests.Request`,
+            for example ``json``, ``data``, ``params``.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        if timeout is None:
+            timeout = self.timeout
+        request = self.session.prepare_request(
+            requests.Request(method, url, headers=headers, **kwargs)
+        )
+
+        use_cache = cache and method == "GET" and self.etag_cache is not None
+        entry = None
+        if use_cache:
+            key = self.etag_cache.get_key(request.url, request.headers)
+            entry = self.etag_cache.get(key)
+            if entry is not None:
+                if "ETag" in entry["headers"]:
+                    request.headers["If-None-Match"] = entry["headers"]["ETag"]
+                if "Last-Modified" in entry["headers"]:
+                    request.headers["If-Modified-Since"] = entry["headers"][
+                        "Last-Modified"
+                    ]
+
+        response = self._send(request, retry=retry, timeout=timeout)
+
+        if use_cache:
+            if response.status_code == 304 and entry is not None:
+                return self.etag_cache.to_response(entry, request)
+            if response.status_code == 200 and (
+                "ETag" in response.headers or "Last-Modified" in response.headers
+            ):
+                self.etag_cache.put(key, response)
+        return response
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
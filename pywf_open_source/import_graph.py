@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+Static import graph of a Python project, used to find the test modules that
+depend on a set of changed source files, directly or transitively.
+
+The imports are found by parsing the source code with :mod:`ast`, nothing is
+imported or executed. It is conservative on purpose: the imports inside
+functions and ``if T.TYPE_CHECKING:`` blocks are also edges, and importing
+``a.b.c`` also depends on ``a/__init__.py`` and ``a/b/__init__.py`` because
+Python executes them. Dynamic imports such as ``importlib.import_module(name)``
+can't be seen.
+
+A ``conftest.py`` is treated as imported by every test module in its folder
+and the sub folders, because pytest loads it before them.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import ast
+import dataclasses
+from pathlib import Path
+
+from .watch import DEFAULT_IGNORE_DIRS, Fingerprint, take_snapshot
+
+
+def get_module_name(path: T.Union[str, Path], dir_root: Path) -> str:
+    """
+    Convert a file path to the module name relative to the root directory,
+    for example ``${dir_root}/pkg/sub/__init__.py`` -> ``"pkg.sub"``.
+    """
+    parts = list(Path(path).relative_to(dir_root).with_suffix("").parts)
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def is_test_file(path: T.Union[str, Path]) -> bool:
+    """
+    Follow the default pytest ``python_files`` patterns
+    ``test_*.py`` and ``*_test.py``.
+    """
+    name = os.path.basename(path)
+    return name.endswith(".py") and (
+        name.startswith("test_") or name.endswith("_test.py")
+    )
+
+
+def parse_imports(
+    source: str,
+    module: str,
+    is_package: bool = False,
+) -> T.Set[str]:
+    """
+    Find the absolute names imported by a module.
+
+    ``from a import b`` yields both ``"a"`` and ``"a.b"``, because ``b`` could
+    be a sub module or an attribute, the caller decides which one exists.
+
+    :param source: the source code.
+    :param module: the module name, to resolve the relative imports.
+    :param is_package: whether the module is a ``__init__.py``.
+
+    :raise SyntaxError: if the source code is invalid.
+    """
+    package_parts = module.split(".") if is_package else module.split(".")[:-1]
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                names.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                if node.level - 1 > len(package_parts):
+                    continue
+                parts = package_parts[: len(package_parts) - (node.level - 1)]
+                if node.module:
+                    parts = parts + [node.module]
+                base = ".".join(parts)
+            else:
+                base = node.module
+            if not base:
+                continue
+            names.add(base)
+            for alias in node.names:
+                if alias.name != "*":
+                    names.add(f"{base}.{alias.name}")
+    return names
+
+
+@dataclasses.dataclass
+class ModuleInfo:
+    """
+    The parsed module.
+
+    :param path: the absolute file path.
+    :param name: the module name relative to the root directory.
+    :param fingerprint: the ``(mtime_ns, size)`` of the file when it was parsed.
+    :param imports: the imported names, including every parent package. For
+        a module in a folder without ``__init__.py``, also the names relative
+        to the folder, because pytest puts such folder in ``sys.path``.
+    """
+
+    path: str = dataclasses.field()
+    name: str = dataclasses.field()
+    fingerprint: Fingerprint = dataclasses.field()
+    imports: T.Set[str] = dataclasses.field(default_factory=set)
+
+
+def _expand_names(
+    names: T.Iterable[str],
+    module: str,
+    in_sys_path: bool,
+) -> T.Set[str]:
+    dir_module = module.rpartition(".")[0]
+    expanded = set()
+    for name in names:
+        candidates = [name]
+        if in_sys_path and dir_module:
+            candidates.append(f"{dir_module}.{name}")
+        for candidate in candidates:
+            parts = candidate.split(".")
+            for i in range(1, len(parts) + 1):
+                expanded.add(".".join(parts[:i]))
+    return expanded
+
+
+class ImportGraph:
+    """
+    The import graph of all ``.py`` files in the given directories.
+
+    Call :meth:`refresh` to sync the graph with the files on disk, only the
+    new and modified files are parsed again.
+
+    :param dir_root: the directory where module names start, usually the
+        project root, so ``${dir_root}/tests/test_api.py`` is ``tests.test_api``.
+    :param dirs: the directories to scan, usually the package source code
+        and the ``tests`` folder.
+    """
+
+    def __init__(
+        self,
+        dir_root: Path,
+        dirs: T.Iterable[Path],
+        ignore_dirs: T.Iterable[str] = DEFAULT_IGNORE_DIRS,
+    ):
+        self.dir_root = dir_root
+        self.dirs = list(dirs)
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.modules: T.Dict[str, ModuleInfo] = dict()
+        # imported name -> the module names that import it
+        self._importers: T.Optional[T.Dict[str, T.Set[str]]] = None
+
+    def _parse(self, path: str, fingerprint: Fingerprint) -> ModuleInfo:
+        name = get_module_name(path, self.dir_root)
+        info = ModuleInfo(path=path, name=name, fingerprint=fingerprint)
+        try:
+            source = Path(path).read_text(encoding="utf-8")
+            imports = parse_imports(
+                source,
+                module=name,
+                is_package=os.path.basename(path) == "__init__.py",
+            )
+        # keep the module in the graph, the test run will show the error
+        except (OSError, SyntaxError, UnicodeDecodeError, ValueError):
+            imports = set()
+        in_sys_path = not os.path.exists(
+            os.path.join(os.path.dirname(path), "__init__.py")
+        )
+        info.imports = _expand_names(imports, name, in_sys_path)
+        return info
+
+    def refresh(self) -> T.Set[str]:
+        """
+        Sync the graph with the files on disk.
+
+        :return: the paths that are added, modified or removed.
+        """
+        snapshot = take_snapshot(self.dirs, [".py"], self.ignore_dirs)
+        changed = set()
+        for path in list(self.modules):
+            if path not in snapshot:
+                del self.modules[path]
+                changed.add(path)
+        for path, fingerprint in snapshot.items():
+            info = self.modules.get(path)
+            if info is None or info.fingerprint != fingerprint:
+                self.modules[path] = self._parse(path, fingerprint)
+                changed.add(path)
+        if changed:
+            self._importers = None
+        return changed
+
+    @property
+    def importers(self) -> T.Dict[str, T.Set[str]]:
+        if self._importers is None:
+            importers = dict()
+            for info in self.modules.values():
+                for name in info.imports:
+                    importers.setdefault(name, set()).add(info.name)
+            self._importers = importers
+        return self._importers
+
+    @property
+    def test_files(self) -> T.List[str]:
+        return sorted(path for path in self.modules if is_test_file(path))
+
+    def get_dependents(self, names: T.Iterable[str]) -> T.Set[str]:
+        """
+        Find the given modules and all modules that import them, transitively.
+        """
+        importers = self.importers
+        seen = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(importers.get(name, ()))
+        return seen
+
+    def get_affected_tests(self, paths: T.Iterable[T.Union[str, Path]]) -> T.List[str]:
+        """
+        Find the test files to run after the given files are changed. The
+        removed files are supported, the modules that still import them
+        are affected.
+
+        :param paths: the changed ``.py`` files.
+        """
+        names = set()
+        for path in paths:
+            try:
+                names.add(get_module_name(path, self.dir_root))
+            except ValueError:  # pragma: no cover
+                # not under the root directory
+                continue
+        affected = self.get_dependents(names)
+        tests = list()
+        for path in self.test_files:
+            info = self.modules[path]
+            if info.name in affected or self._is_conftest_affected(path, affected):
+                tests.append(path)
+        return tests
+
+    def _is_conftest_affected(self, path: str, affected: T.Set[str]) -> bool:
+        dir_ = Path(path).parent
+        while True:
+            try:
+                prefix = get_module_name(dir_.joinpath("conftest.py"), self.dir_root)
+            except ValueError:
+                return False
+            if prefix in affected:
+                return True
+            if dir_ == self.dir_root:
+                return False
+            dir_ = dir_.parent
+
+    def get_external_imports(self) -> T.List[str]:
+        """
+        The top level names that are imported but not defined in the graph,
+        in other words the standard library and third party packages.
+        """
+        local = {info.name.split(".")[0] for info in self.modules.values()}
+        # "tests.test_api" also shows up as "test_api" for the modules
+        # imported by their file name from the same folder
+        local.update(info.name.rpartition(".")[2] for info in self.modules.values())
+        names = set()
+        for info in self.modules.values():
+            for name in info.imports:
+                top = name.split(".")[0]
+                if top not in local:
+                    names.add(top)
+        return sorted(names)
@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import os
+
 from .vendor.vislog import VisLog
+from .runtime import IS_CI
+from .trace import tracer
 
 logger = VisLog(
     name="pyproject_ops",
     log_format="%(message)s",
+    # stdout is slow in CI, write it in batches on a background thread
+    buffered=IS_CI,
+    # set ``PYWF_LOG_JSON=true`` to get machine-readable JSON lines
+    json_lines=os.environ.get("PYWF_LOG_JSON", "").lower() in ("1", "true"),
 )
+
+# record every emoji_block as a trace span, see :mod:`pywf_open_source.trace`
+if tracer.enabled:  # pragma: no cover
+    logger.add_block_listener(tracer.on_block)
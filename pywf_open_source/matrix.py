@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+
+"""
+Run the unit tests on multiple Python versions locally and in parallel,
+like the CI matrix, before push.
+
+Every Python version has its own reusable virtualenv at
+``${dir_project_root}/.cache/matrix/py${X}.${Y}``. The ``pywf-matrix.json``
+file in it records the key of the interpreter and the locked dependencies,
+the virtualenv is only rebuilt when the key changes.
+
+The tests import the package from the source code, ``python -m pytest``
+puts the project root in ``sys.path``, so the virtualenv only has the
+dependencies and doesn't need a rebuild when the source code changes.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .tool_table import ToolInfo, ToolTable
+from .output_capture import OutputCapture
+from .run_ledger import run_with_rusage
+
+VENV_KEY_FILE = "pywf-matrix.json"
+
+_CI_PYTHON_VERSIONS_PATTERN = re.compile(
+    r"^\s*python-version:\s*\[([^\]]*)\]", re.MULTILINE
+)
+
+
+def get_ci_python_versions(path_workflow: Path) -> T.List[str]:
+    """
+    Read the ``python-version: [...]`` matrix from a GitHub Actions workflow
+    file, the commented out lines are ignored.
+
+    :return: the versions, for example ``["3.9", "3.10"]``, empty list if not
+        found.
+    """
+    try:
+        content = path_workflow.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    match = _CI_PYTHON_VERSIONS_PATTERN.search(content)
+    if match is None:
+        return []
+    versions = [item.strip().strip("'\"") for item in match.group(1).split(",")]
+    return [version for version in versions if version]
+
+
+def _parse_version(version: str) -> T.Tuple[int, ...]:
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+def get_pyenv_bin_dirs(version: str) -> T.List[Path]:
+    """
+    Find the ``bin`` folders of the pyenv installed ``${version}.*``
+    interpreters, the newest first. pyenv shims are not used, they depend on
+    the pyenv global / local setting and they are slow to start.
+    """
+    dir_pyenv = Path(os.environ.get("PYENV_ROOT", Path.home().joinpath(".pyenv")))
+    pattern = re.compile(rf"^{re.escape(version)}\.\d+$")
+    try:
+        names = [
+            entry.name
+            for entry in os.scandir(dir_pyenv.joinpath("versions"))
+            if pattern.match(entry.name)
+        ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    names.sort(key=_parse_version, reverse=True)
+    return [dir_pyenv.joinpath("versions", name, "bin") for name in names]
+
+
+def find_interpreters(
+    versions: T.Iterable[str],
+    tool_table: ToolTable,
+) -> T.Dict[str, T.Optional[ToolInfo]]:
+    """
+    Find the ``python${X}.${Y}`` interpreters in the pyenv folders then in
+    ``$PATH``, and check the reported version. The result is cached in the
+    tool table.
+
+    :return: version -> the interpreter, None if not found.
+    """
+    versions = list(versions)
+
+    def find(version: str) -> T.Optional[ToolInfo]:
+        info = tool_table.probe(f"python{version}", get_pyenv_bin_dirs(version))
+        if info.is_ok and info.version.startswith(f"Python {version}."):
+            return info
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, len(versions))) as executor:
+        return dict(zip(versions, executor.map(find, versions)))
+
+
+def get_venv_python(dir_venv: Path) -> Path:
+    if os.name == "nt":  # pragma: no cover
+        return dir_venv.joinpath("Scripts", "python.exe")
+    return dir_venv.joinpath("bin", "python")
+
+
+def get_venv_key(
+    interpreter: ToolInfo,
+    paths_lock: T.Iterable[Path],
+) -> str:
+    """
+    The virtualenv is reusable if the interpreter and the content of the lock
+    / requirements files are the same.
+    """
+    sha256 = hashlib.sha256()
+    sha256.update(f"{interpreter.path}\n{interpreter.version}\n".encode("utf-8"))
+    for path in paths_lock:
+        sha256.update(path.name.encode("utf-8"))
+        sha256.update(hashlib.sha256(path.read_bytes()).digest())
+    return sha256.hexdigest()
+
+
+def read_venv_key(dir_venv: Path) -> T.Optional[str]:
+    try:
+        return json.loads(dir_venv.joinpath(VENV_KEY_FILE).read_text())["key"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class MatrixStatus:
+    passed = "passed"
+    failed = "failed"
+    error = "error"
+    missing = "missing"
+
+
+@dataclasses.dataclass
+class MatrixResult:
+    """
+    The test result of one Python version.
+
+    :param venv: ``"created"`` or ``"reused"``.
+    :param elapsed: the total elapsed time, including the virtualenv setup.
+    :param test_elapsed: the elapsed time of the tests only.
+    :param message: the error message or the last line of the pytest output.
+    :param path_log: the full output log file.
+    """
+
+    version: str = dataclasses.field()
+    status: str = dataclasses.field()
+    path_python: T.Optional[str] = dataclasses.field(default=None)
+    venv: str = dataclasses.field(default="")
+    elapsed: float = dataclasses.field(default=0.0)
+    test_elapsed: float = dataclasses.field(default=0.0)
+    message: str = dataclasses.field(default="")
+    path_log: T.Optional[Path] = dataclasses.field(default=None)
+
+
+def _run(args: T.List[str], cwd: Path, capture: OutputCapture) -> int:
+    capture.feed(f"$ {' '.join(args)}\n".encode("utf-8"))
+    result, _ = run_with_rusage(args, cwd=cwd, read_output=capture.read_stream)
+    return result.returncode
+
+
+def ensure_venv(
+    dir_venv: Path,
+    interpreter: ToolInfo,
+    key: str,
+    requirements: T.List[Path],
+    cwd: Path,
+    capture: OutputCapture,
+    path_virtualenv: T.Optional[str] = None,
+) -> bool:
+    """
+    Create the virtualenv and install the requirements, unless it already
+    exists with the same key. The virtualenv is built in a temp folder then
+    renamed, so a half built one is never reused.
+
+    :param path_virtualenv: use ``virtualenv`` if given, it is faster than
+        ``python -m venv`` because it seeds pip from its app data cache.
+
+    :return: True if the virtualenv is created, False if reused.
+
+    :raise RuntimeError: if a setup command fails.
+    """
+    if read_venv_key(dir_venv) == key:
+        return False
+    dir_tmp = dir_venv.with_name(f"{dir_venv.name}.tmp")
+    shutil.rmtree(dir_tmp, ignore_errors=True)
+    dir_tmp.parent.mkdir(parents=True, exist_ok=True)
+    if path_virtualenv:
+        args = [path_virtualenv, "--quiet", "-p", interpreter.path, str(dir_tmp)]
+    else:
+        args = [interpreter.path, "-m", "venv", str(dir_tmp)]
+    commands = [args]
+    if requirements:
+        args = [
+            str(get_venv_python(dir_tmp)),
+            "-m",
+            "pip",
+            "install",
+            "--disable-pip-version-check",
+            "--quiet",
+        ]
+        for path in requirements:
+            args.extend(["-r", str(path)])
+        commands.append(args)
+    for args in commands:
+        if _run(args, cwd, capture) != 0:
+            raise RuntimeError(f"failed to set up virtualenv: {' '.join(args)}")
+    dir_tmp.joinpath(VENV_KEY_FILE).write_text(json.dumps({"key": key}))
+    shutil.rmtree(dir_venv, ignore_errors=True)
+    # the virtualenv scripts have the absolute path of the temp folder in
+    # the shebang, we only run ``bin/python -m ...`` so it doesn't matter
+    dir_tmp.rename(dir_venv)
+    return True
+
+
+def run_matrix_version(
+    version: str,
+    interpreter: T.Optional[ToolInfo],
+    dir_venv: Path,
+    requirements: T.List[Path],
+    pytest_args: T.List[str],
+    cwd: Path,
+    path_log: Path,
+    path_virtualenv: T.Optional[str] = None,
+) -> MatrixResult:
+    """
+    Set up the virtualenv of one Python version and run the tests in it.
+    The output is not printed, it is saved to ``path_log``.
+    """
+    st = time.perf_counter()
+    result = MatrixResult(version=version, status=MatrixStatus.missing)
+    if interpreter is None:
+        result.message = f"python{version} not found"
+        return result
+    result.path_python = interpreter.path
+    result.path_log = path_log
+    with OutputCapture(path_log=path_log) as capture:
+        try:
+            key = get_venv_key(interpreter, requirements)
+            created = ensure_venv(
+                dir_venv=dir_venv,
+                interpreter=interpreter,
+                key=key,
+                requirements=requirements,
+                cwd=cwd,
+                capture=capture,
+                path_virtualenv=path_virtualenv,
+            )
+            result.venv = "created" if created else "reused"
+            st_test = time.perf_counter()
+            returncode = _run(
+                [str(get_venv_python(dir_venv)), "-m", "pytest", *pytest_args],
+                cwd,
+                capture,
+            )
+            result.test_elapsed = time.perf_counter() - st_test
+            result.status = MatrixStatus.passed if returncode == 0 else MatrixStatus.failed
+            lines = [line for line in capture.lines if line.strip()]
+            result.message = lines[-1].strip("= ") if lines else ""
+        except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+            result.status = MatrixStatus.error
+            result.message = str(e)
+    result.elapsed = time.perf_counter() - st
+    return result
+
+
+def format_matrix_table(
+    results: T.List[MatrixResult],
+    max_message_length: int = 80,
+) -> str:
+    """
+    Format the results as a plain text table, with a total line at the end.
+    """
+    rows = [("python", "status", "venv", "elapsed", "tests", "message")]
+    for result in results:
+        message = result.message.splitlines()[0] if result.message else ""
+        if len(message) > max_message_length:
+            message = message[: max_message_length - 3] + "..."
+        rows.append(
+            (
+                result.version,
+                result.status,
+                result.venv,
+                f"{result.elapsed:.2f}s",
+                f"{result.test_elapsed:.2f}s",
+                message,
+            )
+        )
+    n = len(rows[0]) - 1
+    widths = [max(len(row[i]) for row in rows) for i in range(n)]
+    lines = list()
+    for i, row in enumerate(rows):
+        cells = [row[j].ljust(widths[j]) for j in range(n)] + [row[n]]
+        lines.append(" | ".join(cells).rstrip())
+        if i == 0:
+            lines.append("-+-".join("-" * w for w in widths + [len(row[n])]))
+    counts = {
+        status: sum(1 for r in results if r.status == status)
+        for status in [
+            MatrixStatus.passed,
+            MatrixStatus.failed,
+            MatrixStatus.error,
+            MatrixStatus.missing,
+        ]
+    }
+    total_elapsed = max((r.elapsed for r in results), default=0.0)
+    lines.append(
+        ", ".join(f"{count} {status}" for status, count in counts.items())
+        + f", wall time = {total_elapsed:.2f}s"
+    )
+    return "\n".join(lines)
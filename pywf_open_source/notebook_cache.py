@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cell level execution cache for Jupyter notebooks.
+
+A notebook is identified by its code cells (source only, markdown cells and
+outputs are ignored), the kernel it runs on and the ``poetry.lock`` digest.
+If none of them changed, the cached outputs of every code cell can be injected
+back into the notebook, so we don't have to execute it again.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY". A notebook is just a JSON file,
+    we don't need ``nbformat`` to read or write it.
+"""
+
+import typing as T
+import os
+import json
+import hashlib
+from pathlib import Path
+
+DEFAULT_KERNEL_NAME = "python3"
+
+
+def read_notebook(path: Path) -> T.Dict[str, T.Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_notebook(path: Path, notebook: T.Dict[str, T.Any]):
+    # use the same layout as Jupyter, so the git diff stays small
+    content = json.dumps(notebook, indent=1, ensure_ascii=False) + "\n"
+    path.write_text(content, encoding="utf-8")
+
+
+def get_cell_source(cell: T.Dict[str, T.Any]) -> str:
+    """
+    The cell source can be either a string or a list of lines.
+    """
+    source = cell.get("source", "")
+    if isinstance(source, list):
+        return "".join(source)
+    return source
+
+
+def get_code_cells(notebook: T.Dict[str, T.Any]) -> T.List[T.Dict[str, T.Any]]:
+    return [cell for cell in notebook.get("cells", []) if cell["cell_type"] == "code"]
+
+
+def get_kernel_name(notebook: T.Dict[str, T.Any]) -> str:
+    return (
+        notebook.get("metadata", {})
+        .get("kernelspec", {})
+        .get("name", DEFAULT_KERNEL_NAME)
+    )
+
+
+def get_notebook_cache_key(
+    notebook: T.Dict[str, T.Any],
+    poetry_lock_digest: str,
+) -> str:
+    """
+    Calculate the cache key of a notebook.
+
+    :param notebook: the parsed notebook JSON.
+    :param poetry_lock_digest: the sha256 of the ``poetry.lock`` file, any
+        dependency change invalidates the cache.
+    """
+    data = {
+        "kernel": get_kernel_name(notebook),
+        "poetry_lock": poetry_lock_digest,
+        "code_cells": [get_cell_source(cell) for cell in get_code_cells(notebook)],
+    }
+    b = json.dumps(data, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(b).hexdigest()
+
+
+def extract_code_cell_outputs(
+    notebook: T.Dict[str, T.Any],
+) -> T.List[T.Dict[str, T.Any]]:
+    """
+    Extract the outputs of each code cell from an executed notebook.
+    """
+    return [
+        {
+            "execution_count": cell.get("execution_count"),
+            "outputs": cell.get("outputs", []),
+        }
+        for cell in get_code_cells(notebook)
+    ]
+
+
+def inject_code_cell_outputs(
+    notebook: T.Dict[str, T.Any],
+    cell_outputs: T.List[T.Dict[str, T.Any]],
+) -> bool:
+    """
+    Inject the cached outputs back into the code cells of a notebook, in place.
+
+    :return: a boolean flag to indicate whether the notebook is changed.
+    """
+    code_cells = get_code_cells(notebook)
+    if len(code_cells) != len(cell_outputs):
+        raise ValueError(
+            f"the notebook has {len(code_cells)} code cells, "
+            f"but the cache has {len(cell_outputs)} entries."
+        )
+    changed = False
+    for cell, cell_output in zip(code_cells, cell_outputs):
+        for key in ["execution_count", "outputs"]:
+            if cell.get(key) != cell_output[key]:
+                cell[key] = cell_output[key]
+                changed = True
+    return changed
+
+
+class NotebookCache:
+    """
+    The on disk store of the notebook execution cache. Each cache entry is a
+    ``${cache_key}.json`` file in the cache directory.
+
+    :param dir_cache: the directory to store the cache entries.
+    """
+
+    def __init__(self, dir_cache: Path):
+        self.dir_cache = dir_cache
+
+    def get_path(self, key: str) -> Path:
+        return self.dir_cache.joinpath(f"{key}.json")
+
+    def get(self, key: str) -> T.Optional[T.List[T.Dict[str, T.Any]]]:
+        """
+        Get the cell outputs of a cache entry, a missing, corrupt or
+        truncated entry is a cache miss.
+        """
+        path = self.get_path(key)
+        try:
+            cell_outputs = json.loads(path.read_text(encoding="utf-8"))["cells"]
+            for cell_output in cell_outputs:
+                if not {"execution_count", "outputs"}.issubset(cell_output):
+                    return None
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+        return cell_outputs
+
+    def put(self, key: str, cell_outputs: T.List[T.Dict[str, T.Any]]):
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file then rename, so a killed build
+        # never leaves a half written cache entry
+        path_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        path_tmp.write_text(json.dumps({"cells": cell_outputs}), encoding="utf-8")
+        path_tmp.replace(path)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bounded memory capture of the subprocess output.
+
+``subprocess.run(..., capture_output=True)`` keeps the entire output in
+memory, a long test or doc build can produce hundreds of MB. Instead, the
+output is consumed line by line: every line is sent to a log function,
+only the last few lines are kept in a ring buffer for the error report, and
+the full output is written to a gzip compressed log file.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import re
+import gzip
+import subprocess
+import collections
+from pathlib import Path
+
+DEFAULT_TAIL_LINES = 200
+# a line longer than this is split, so a progress bar without a newline
+# can't make a single line grow forever
+MAX_LINE_BYTES = 64 * 1024
+
+
+def get_log_file_name(step: str) -> str:
+    """
+    Convert a step name to a log file name, for example
+    ``"Build python distribution"`` -> ``"build-python-distribution.log.gz"``.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", step.lower()).strip("-")
+    return f"{slug or 'command'}.log.gz"
+
+
+class CapturedProcessError(subprocess.CalledProcessError):
+    """
+    A :class:`subprocess.CalledProcessError` that shows the last lines of the
+    output and the full log file path in the error message.
+
+    :param path_log: the full output log file path, could be None.
+    """
+
+    def __init__(
+        self,
+        returncode: int,
+        cmd: T.List[str],
+        output: T.Optional[str] = None,
+        path_log: T.Optional[Path] = None,
+    ):
+        super().__init__(returncode, cmd, output=output)
+        self.path_log = path_log
+
+    def __str__(self) -> str:
+        lines = [super().__str__()]
+        if self.output:
+            lines.append("last lines of the output:")
+            lines.append(self.output.rstrip("\n"))
+        if self.path_log is not None:
+            lines.append(f"full output: {self.path_log}")
+        return "\n".join(lines)
+
+
+class OutputCapture:
+    """
+    Consume the subprocess output line by line with bounded memory.
+
+    Example:
+
+    .. code-block:: python
+
+        with OutputCapture(log_func=print, path_log=Path("build.log.gz")) as capture:
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            capture.read_stream(process.stdout)
+            process.wait()
+        print(capture.tail)
+
+    :param log_func: called with every decoded line without the line break.
+    :param path_log: if given, tee the full output to this gzip file, the
+        file is replaced on every run.
+    :param tail_lines: the size of the ring buffer.
+    """
+
+    def __init__(
+        self,
+        log_func: T.Optional[T.Callable[[str], T.Any]] = None,
+        path_log: T.Optional[Path] = None,
+        tail_lines: int = DEFAULT_TAIL_LINES,
+    ):
+        self.log_func = log_func
+        self.path_log = path_log
+        self.lines: T.Deque[str] = collections.deque(maxlen=tail_lines)
+        self.n_lines = 0
+        self.n_bytes = 0
+        self._fp: T.Optional[gzip.GzipFile] = None
+
+    def open(self):
+        if self.path_log is not None:
+            self.path_log.parent.mkdir(parents=True, exist_ok=True)
+            # level 1 is several times faster than the default level 9,
+            # and the text log still compresses well
+            self._fp = gzip.open(self.path_log, "wb", compresslevel=1)
+        return self
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def feed(self, line: bytes):
+        """
+        Process one line of raw output.
+        """
+        self.n_lines += 1
+        self.n_bytes += len(line)
+        if self._fp is not None:
+            self._fp.write(line)
+        text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+        self.lines.append(text)
+        if self.log_func is not None:
+            self.log_func(text)
+
+    def read_stream(self, stream: T.BinaryIO):
+        """
+        Feed all lines from a binary stream until EOF.
+        """
+        for line in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+            self.feed(line)
+
+    @property
+    def tail(self) -> str:
+        """
+        The last lines of the output.
+        """
+        return "".join(f"{line}\n" for line in self.lines)
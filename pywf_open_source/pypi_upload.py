@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+
+"""
+Upload Python distribution files to PyPI (or any compatible index) using the
+`upload API <https://docs.pypi.org/api/upload/>`_ directly.
+
+Compared to ``twine upload``:
+
+- files are uploaded concurrently through a pooled HTTP session.
+- files are streamed from disk in chunks, they are never loaded into memory.
+- files that are already published (checked with the JSON API) are skipped.
+- failed uploads are retried with exponential backoff.
+"""
+
+import typing as T
+import io
+import os
+import time
+import uuid
+import hashlib
+import zipfile
+import tarfile
+import dataclasses
+from pathlib import Path
+from email.message import Message
+from email.parser import HeaderParser
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+except ImportError:  # pragma: no cover
+    pass
+
+from .http_client import RETRY_STATUS_CODES, new_session
+
+DEFAULT_REPOSITORY_URL = "https://upload.pypi.org/legacy/"
+DEFAULT_JSON_API_URL = "https://pypi.org/pypi"
+
+CHUNK_SIZE = 1024 * 1024
+
+# metadata fields that can show up multiple times
+MULTI_VALUE_FIELDS = {
+    "Classifier": "classifiers",
+    "Requires-Dist": "requires_dist",
+    "Provides-Extra": "provides_extra",
+    "Project-URL": "project_urls",
+    "License-File": "license_file",
+    "Dynamic": "dynamic",
+}
+
+
+def read_dist_metadata(path: Path) -> Message:
+    """
+    Read the core metadata (``METADATA`` in wheel, ``PKG-INFO`` in sdist)
+    of a distribution file without extracting it.
+    """
+    if path.name.endswith(".whl"):
+        with zipfile.ZipFile(path) as f:
+            name = next(
+                n for n in f.namelist() if n.endswith(".dist-info/METADATA")
+            )
+            content = f.read(name).decode("utf-8")
+    elif path.name.endswith(".tar.gz"):
+        with tarfile.open(path, "r:gz") as f:
+            member = min(
+                (m for m in f.getmembers() if m.name.endswith("/PKG-INFO")),
+                key=lambda m: m.name.count("/"),
+            )
+            content = f.extractfile(member).read().decode("utf-8")
+    else:  # pragma: no cover
+        raise ValueError(f"unknown distribution file type: {path}")
+    return HeaderParser().parsestr(content)
+
+
+def get_file_digests(path: Path) -> T.Tuple[str, str]:
+    """
+    Calculate the md5 and sha256 of a file in chunks.
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def get_upload_fields(path: Path) -> T.List[T.Tuple[str, str]]:
+    """
+    Build the form fields of the upload API for a distribution file.
+    """
+    metadata = read_dist_metadata(path)
+    md5_digest, sha256_digest = get_file_digests(path)
+    if path.name.endswith(".whl"):
+        filetype = "bdist_wheel"
+        pyversion = path.name.split("-")[-3]
+    else:
+        filetype = "sdist"
+        pyversion = "source"
+    fields = [
+        (":action", "file_upload"),
+        ("protocol_version", "1"),
+        ("metadata_version", metadata["Metadata-Version"]),
+        ("name", metadata["Name"]),
+        ("version", metadata["Version"]),
+        ("filetype", filetype),
+        ("pyversion", pyversion),
+        ("md5_digest", md5_digest),
+        ("sha256_digest", sha256_digest),
+    ]
+    for key, value in metadata.items():
+        if key in MULTI_VALUE_FIELDS:
+            fields.append((MULTI_VALUE_FIELDS[key], value))
+        elif key not in ["Metadata-Version", "Name", "Version"]:
+            fields.append((key.lower().replace("-", "_"), value))
+    description = metadata.get_payload()
+    if description:
+        fields.append(("description", description))
+    return fields
+
+
+class MultipartFileStream:
+    """
+    A file-like ``multipart/form-data`` request body. The form fields are
+    kept in memory, the file content is read from disk on demand, so the
+    HTTP client can send a file of any size with a fixed memory footprint.
+
+    It implements ``__len__`` so the HTTP client sends a ``Content-Length``
+    header instead of chunked transfer encoding, which PyPI doesn't accept.
+    It intentionally doesn't implement ``tell()`` and ``__iter__``, otherwise
+    ``requests`` treats it as a stream with unknown length.
+    """
+
+    def __init__(
+        self,
+        fields: T.List[T.Tuple[str, str]],
+        path: Path,
+        file_field: str = "content",
+    ):
+        self.boundary = uuid.uuid4().hex
+        head = io.BytesIO()
+        for key, value in fields:
+            head.write(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                f"{value}\r\n".encode("utf-8")
+            )
+        head.write(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; '
+            f'filename="{path.name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode("utf-8")
+        )
+        self._head = head.getvalue()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._path = path
+        self._size = len(self._head) + path.stat().st_size + len(self._tail)
+        self._parts = [io.BytesIO(self._head), None, io.BytesIO(self._tail)]
+        self._index = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = list()
+        while self._index < len(self._parts) and (size < 0 or size > 0):
+            if self._parts[self._index] is None:
+                self._parts[self._index] = self._path.open("rb")
+            chunk = self._parts[self._index].read(size)
+            if not chunk:
+                self._parts[self._index].close()
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        for part in self._parts:
+            if part is not None:
+                part.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def get_published_filenames(
+    session: "requests.Session",
+    json_api_url: str,
+    name: str,
+    version: str,
+    timeout: float = 10,
+) -> T.Set[str]:
+    """
+    Get the file names of a published release using the
+    `JSON API <https://docs.pypi.org/api/json/>`_.
+    """
+    url = f"{json_api_url.rstrip('/')}/{name}/{version}/json"
+    response = session.get(url, timeout=timeout)
+    if response.status_code == 404:
+        return set()
+    response.raise_for_status()
+    return {file["filename"] for file in response.json()["urls"]}
+
+
+class UploadStatus:
+    uploaded = "uploaded"
+    skipped = "skipped"
+    failed = "failed"
+
+
+@dataclasses.dataclass
+class UploadResult:
+    path: Path = dataclasses.field()
+    status: str = dataclasses.field()
+    message: str = dataclasses.field(default="")
+    attempts: int = dataclasses.field(default=0)
+
+
+def upload_file(
+    session: "requests.Session",
+    path: Path,
+    repository_url: str,
+    username: str,
+    password: str,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 300,
+) -> UploadResult:
+    """
+    Upload a distribution file, retry with exponential backoff on
+    connection error, timeout and retryable HTTP status codes.
+    """
+    fields = get_upload_fields(path)
+    message = ""
+    for attempt in range(1, max_retries + 2):
+        # the stream is consumed by each attempt, create a new one every time
+        with MultipartFileStream(fields, path) as body:
+            try:
+                response = session.post(
+                    repository_url,
+                    data=body,
+                    headers={"Content-Type": body.content_type},
+                    auth=(username, password),
+                    timeout=timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response = None
+                message = str(e)
+        if response is not None:
+            if 200 <= response.status_code < 300:
+                return UploadResult(path, UploadStatus.uploaded, attempts=attempt)
+            message = f"HTTP {response.status_code}: {response.text.strip()[:500]}"
+            # PyPI returns 400 if the file was uploaded by a previous
+            # attempt that timed out on our side
+            if response.status_code == 400 and "already exist" in response.text:
+                return UploadResult(path, UploadStatus.skipped, message, attempt)
+            if response.status_code not in RETRY_STATUS_CODES:
+                break
+        if attempt <= max_retries:
+            time.sleep(backoff * 2 ** (attempt - 1))
+    return UploadResult(path, UploadStatus.failed, message, attempt)
+
+
+def upload_dists(
+    paths: T.List[Path],
+    username: str,
+    password: str,
+    repository_url: str = DEFAULT_REPOSITORY_URL,
+    json_api_url: T.Optional[str] = DEFAULT_JSON_API_URL,
+    max_workers: int = 4,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+) -> T.List[UploadResult]:
+    """
+    Upload distribution files concurrently, files that are already
+    published are skipped.
+
+    :param paths: the ``.whl`` and ``.tar.gz`` files to upload.
+    :param json_api_url: the JSON API endpoint to check the published files,
+        if None, don't check.
+    """
+    session = new_session(pool_size=max_workers)
+    results = list()
+    to_upload = list()
+    published: T.Dict[T.Tuple[str, str], T.Set[str]] = dict()
+    for path in paths:
+        if json_api_url is not None:
+            metadata = read_dist_metadata(path)
+            key = (metadata["Name"], metadata["Version"])
+            if key not in published:
+                published[key] = get_published_filenames(
+                    session, json_api_url, *key
+                )
+            if path.name in published[key]:
+                results.append(
+                    UploadResult(path, UploadStatus.skipped, "already published")
+                )
+                continue
+        to_upload.append(path)
+
+    def upload(path: Path) -> UploadResult:
+        return upload_file(
+            session=session,
+            path=path,
+            repository_url=repository_url,
+            username=username,
+            password=password,
+            max_retries=max_retries,
+            backoff=backoff,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results.extend(executor.map(upload, to_upload))
+    session.close()
+    return results
+
+
+def list_dist_files(dir_dist: Path) -> T.List[Path]:
+    return sorted(
+        path
+        for path in dir_dist.iterdir()
+        if path.name.endswith((".whl", ".tar.gz"))
+    )
+
+
+def get_pypi_token(path_pypirc: T.Optional[Path] = None) -> T.Optional[str]:
+    """
+    Find the PyPI API token the same way as twine does, the ``TWINE_PASSWORD``
+    environment variable first, then the ``[pypi]`` section in ``~/.pypirc``.
+    """
+    if os.environ.get("TWINE_PASSWORD"):
+        return os.environ["TWINE_PASSWORD"]
+    import configparser
+
+    if path_pypirc is None:
+        path_pypirc = Path.home().joinpath(".pypirc")
+    config = configparser.ConfigParser()
+    config.read(path_pypirc)
+    return config.get("pypi", "password", fallback=None)
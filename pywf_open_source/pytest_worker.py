@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+A warm pytest worker, it removes the interpreter and pytest startup time from
+every test run.
+
+The worker is a long running process in the project's virtualenv. It imports
+pytest, its plugins and the third party packages once, then ``fork`` a child
+for every run, the child calls ``pytest.main(args)`` with everything already
+in memory. The project's own modules are never imported in the worker, so
+every child imports the latest source code.
+
+``fork`` is not available on Windows, use :meth:`PytestWorker.is_supported`
+to check and fall back to run ``pytest`` in a new process.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY". The worker code runs in the project's
+    virtualenv, where this package may not be installed, so it is sent as a
+    self-contained script.
+"""
+
+import typing as T
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# argv: [fd to report results, project root, json list of modules to preload]
+_WORKER_SCRIPT = """
+import os, sys, json, traceback
+
+fd_result, dir_root, preload = int(sys.argv[1]), sys.argv[2], json.loads(sys.argv[3])
+for name in preload:
+    try:
+        __import__(name)
+    except BaseException:
+        pass
+import pytest
+try:
+    from importlib.metadata import entry_points
+    for ep in entry_points(group="pytest11"):
+        try:
+            ep.load()
+        except BaseException:
+            pass
+except Exception:
+    pass
+
+# a preloaded package may import the project code, forget it, so the child
+# imports the latest version
+dir_venv = os.path.join(dir_root, ".venv")
+for name, module in list(sys.modules.items()):
+    path = getattr(module, "__file__", None) or ""
+    if path.startswith(dir_root + os.sep) and not path.startswith(dir_venv + os.sep):
+        del sys.modules[name]
+
+f_result = os.fdopen(fd_result, "w")
+f_result.write(json.dumps({"ready": True}) + "\\n")
+f_result.flush()
+for line in sys.stdin:
+    args = json.loads(line)
+    pid = os.fork()
+    if pid == 0:
+        f_result.close()
+        # stdin is the command pipe, a test that reads stdin must not
+        # consume the next run request
+        fd_null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(fd_null, 0)
+        os.close(fd_null)
+        sys.stdin = open(0, closefd=False)
+        code = 1
+        try:
+            code = int(pytest.main(args))
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    f_result.write(json.dumps({"returncode": os.waitstatus_to_exitcode(status)}) + "\\n")
+    f_result.flush()
+"""
+
+
+class PytestWorker:
+    """
+    The client of the warm pytest worker process.
+
+    Example:
+
+    .. code-block:: python
+
+        with PytestWorker(path_python, dir_root, preload=["requests"]) as worker:
+            returncode = worker.run(["tests/test_api.py", "-s"])
+
+    :param path_python: the python interpreter in the project's virtualenv,
+        pytest has to be installed there.
+    :param dir_root: the project root, the working directory of the tests.
+    :param preload: the top level modules to import in the worker, the
+        modules that fail to import are ignored.
+    """
+
+    def __init__(
+        self,
+        path_python: Path,
+        dir_root: Path,
+        preload: T.Iterable[str] = tuple(),
+    ):
+        self.path_python = path_python
+        self.dir_root = dir_root
+        self.preload = list(preload)
+        self.process: T.Optional[subprocess.Popen] = None
+        self._f_result: T.Optional[T.TextIO] = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        return hasattr(os, "fork")
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read_result(self) -> T.Dict[str, T.Any]:
+        line = self._f_result.readline()
+        if not line:
+            self.close()
+            raise RuntimeError("the pytest worker exited unexpectedly")
+        return json.loads(line)
+
+    def start(self):
+        """
+        Start the worker and wait until it finishes the preload.
+
+        :raise RuntimeError: if the worker fails to start.
+        """
+        fd_read, fd_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [
+                    str(self.path_python),
+                    "-c",
+                    _WORKER_SCRIPT,
+                    str(fd_write),
+                    str(self.dir_root),
+                    json.dumps(self.preload),
+                ],
+                stdin=subprocess.PIPE,
+                cwd=self.dir_root,
+                pass_fds=(fd_write,),
+                text=True,
+            )
+        except OSError as e:
+            os.close(fd_read)
+            raise RuntimeError(f"failed to start the pytest worker: {e}")
+        finally:
+            os.close(fd_write)
+        self._f_result = os.fdopen(fd_read, "r")
+        self._read_result()
+        return self
+
+    def close(self):
+        if self.process is not None:
+            if self.process.stdin is not None:
+                try:
+                    self.process.stdin.close()
+                except OSError:  # pragma: no cover
+                    pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:  # pragma: no cover
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        if self._f_result is not None:
+            self._f_result.close()
+            self._f_result = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def run(self, args: T.List[str]) -> int:
+        """
+        Run ``pytest.main(args)`` in a forked child of the worker, the output
+        goes to the current stdout. The worker is restarted if it died.
+
+        :return: the pytest exit code.
+        """
+        if not self.is_alive:
+            self.close()
+            self.start()
+        # the child writes to the same stdout, flush our buffer first
+        sys.stdout.flush()
+        try:
+            self.process.stdin.write(json.dumps([str(arg) for arg in args]) + "\n")
+            self.process.stdin.flush()
+        except BrokenPipeError:  # pragma: no cover
+            self.close()
+            raise RuntimeError("the pytest worker exited unexpectedly")
+        return self._read_result()["returncode"]
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client side rate limit scheduler for the SaaS APIs.
+
+Every provider (the host name of the API endpoint) has a token bucket that
+paces the requests, and a "blocked until" time learned from the
+``X-RateLimit-*`` and ``Retry-After`` response headers. Callers that exceed
+the budget are queued (they sleep) instead of getting an error.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import time
+import threading
+import dataclasses
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+
+# (rate in requests per second, burst capacity) of the known providers
+DEFAULT_RATES: T.Dict[str, T.Tuple[float, float]] = {
+    # GitHub secondary rate limit allows 900 points per minute for REST API
+    "api.github.com": (10.0, 20.0),
+    "api.codecov.io": (5.0, 10.0),
+    "readthedocs.org": (5.0, 10.0),
+}
+DEFAULT_RATE = (10.0, 10.0)
+# GitHub recommends to wait at least one minute if the secondary rate limit
+# response doesn't tell when to retry
+DEFAULT_RETRY_AFTER = 60.0
+
+# an ``X-RateLimit-Reset`` bigger than this is an epoch timestamp,
+# otherwise it is the number of seconds to wait
+_EPOCH_THRESHOLD = 10**9
+
+
+def get_provider(url: str) -> str:
+    """
+    Get the provider name of a URL, it is the network location.
+    """
+    return urlparse(url).netloc
+
+
+def _get_header(headers: T.Mapping[str, str], name: str) -> T.Optional[str]:
+    # ``requests`` uses case-insensitive dict, but a plain dict may not be
+    value = headers.get(name)
+    if value is None:
+        name = name.lower()
+        for key, value in headers.items():
+            if key.lower() == name:
+                return value
+        return None
+    return value
+
+
+def parse_retry_after(value: str, now: float) -> T.Optional[float]:
+    """
+    Parse the ``Retry-After`` header, it is either the number of seconds or
+    an HTTP date.
+
+    :param now: current epoch timestamp.
+    :return: the number of seconds to wait.
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket. Tokens can go negative, so every caller gets
+    a reservation in arrival order, the deficit is the time to wait.
+
+    :param rate: tokens refilled per second.
+    :param capacity: the max number of tokens, the size of a burst.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: T.Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take the tokens and return the seconds to wait before using them.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+
+@dataclasses.dataclass
+class ProviderMetrics:
+    """
+    Rate limit metrics of a provider.
+
+    :param limit: the last seen ``X-RateLimit-Limit``.
+    :param remaining: the last seen ``X-RateLimit-Remaining``.
+    :param reset_at: the last seen ``X-RateLimit-Reset`` as epoch timestamp.
+    :param wait_seconds: how long a new request has to wait right now.
+    :param requests: number of requests scheduled.
+    :param throttled: number of requests that had to wait.
+    :param rate_limited: number of responses rejected by the rate limit.
+    :param waited_seconds: total seconds all requests waited.
+    """
+
+    provider: str = dataclasses.field()
+    limit: T.Optional[int] = dataclasses.field(default=None)
+    remaining: T.Optional[int] = dataclasses.field(default=None)
+    reset_at: T.Optional[float] = dataclasses.field(default=None)
+    wait_seconds: float = dataclasses.field(default=0.0)
+    requests: int = dataclasses.field(default=0)
+    throttled: int = dataclasses.field(default=0)
+    rate_limited: int = dataclasses.field(default=0)
+    waited_seconds: float = dataclasses.field(default=0.0)
+
+
+class ProviderLimiter:
+    """
+    The rate limit state of one provider.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        rate: float,
+        capacity: float,
+        default_retry_after: float = DEFAULT_RETRY_AFTER,
+        clock: T.Callable[[], float] = time.monotonic,
+        wall_clock: T.Callable[[], float] = time.time,
+    ):
+        self.bucket = TokenBucket(rate=rate, capacity=capacity, clock=clock)
+        self.default_retry_after = default_retry_after
+        self.metrics = ProviderMetrics(provider=provider)
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def get_wait_seconds(self) -> float:
+        with self._lock:
+            blocked = self._blocked_until - self._clock()
+        tokens = self.bucket.tokens
+        paced = 0.0 if tokens >= 1 else (1 - tokens) / self.bucket.rate
+        return max(0.0, blocked, paced)
+
+    def reserve(self) -> float:
+        """
+        Reserve a request slot and return the seconds to wait before sending.
+        """
+        paced = self.bucket.reserve()
+        with self._lock:
+            wait = max(paced, self._blocked_until - self._clock())
+            self.metrics.requests += 1
+            if wait > 0:
+                self.metrics.throttled += 1
+                self.metrics.waited_seconds += wait
+        return wait
+
+    def _block_for(self, seconds: float):
+        # the caller holds the lock
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def update(
+        self,
+        status_code: int,
+        headers: T.Mapping[str, str],
+    ) -> bool:
+        """
+        Learn the rate limit state from a response.
+
+        :return: True if the request was rejected by the rate limit,
+            it is safe to send it again because it was not processed.
+        """
+        now = self._wall_clock()
+        limit = _get_header(headers, "X-RateLimit-Limit")
+        remaining = _get_header(headers, "X-RateLimit-Remaining")
+        reset = _get_header(headers, "X-RateLimit-Reset")
+        retry_after = _get_header(headers, "Retry-After")
+        with self._lock:
+            if limit is not None and limit.isdigit():
+                self.metrics.limit = int(limit)
+            if remaining is not None and remaining.isdigit():
+                self.metrics.remaining = int(remaining)
+            reset_in = None
+            if reset is not None:
+                try:
+                    reset = float(reset)
+                    if reset > _EPOCH_THRESHOLD:
+                        reset -= now
+                    reset_in = max(0.0, reset)
+                    self.metrics.reset_at = now + reset_in
+                except ValueError:
+                    pass
+
+            retry_after_seconds = None
+            if retry_after is not None:
+                retry_after_seconds = parse_retry_after(retry_after, now)
+                if retry_after_seconds is not None:
+                    self._block_for(retry_after_seconds)
+            exhausted = remaining is not None and remaining.strip() == "0"
+            if exhausted and reset_in is not None:
+                self._block_for(reset_in)
+
+            is_rate_limited = status_code == 429 or (
+                status_code == 403 and (exhausted or retry_after is not None)
+            )
+            if is_rate_limited:
+                self.metrics.rate_limited += 1
+                if retry_after_seconds is None and not (
+                    exhausted and reset_in is not None
+                ):
+                    self._block_for(self.default_retry_after)
+            return is_rate_limited
+
+
+class RateLimitScheduler:
+    """
+    Thread safe rate limit scheduler for all providers, share one instance
+    across all HTTP clients to share the budget.
+
+    Example:
+
+    .. code-block:: python
+
+        scheduler = RateLimitScheduler()
+        scheduler.acquire(url) # sleep if needed
+        response = session.get(url)
+        if scheduler.update(url, response.status_code, response.headers):
+            ... # rate limited, send it again
+
+    :param rates: the ``(rate, capacity)`` of each provider.
+    :param default_rate: the ``(rate, capacity)`` of unknown providers.
+    """
+
+    def __init__(
+        self,
+        rates: T.Optional[T.Dict[str, T.Tuple[float, float]]] = None,
+        default_rate: T.Tuple[float, float] = DEFAULT_RATE,
+        default_retry_after: float = DEFAULT_RETRY_AFTER,
+        clock: T.Callable[[], float] = time.monotonic,
+        wall_clock: T.Callable[[], float] = time.time,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.default_rate = default_rate
+        self.default_retry_after = default_retry_after
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._limiters: T.Dict[str, ProviderLimiter] = dict()
+        self._lock = threading.Lock()
+
+    def get_limiter(self, provider: str) -> ProviderLimiter:
+        with self._lock:
+            if provider not in self._limiters:
+                rate, capacity = self.rates.get(provider, self.default_rate)
+                self._limiters[provider] = ProviderLimiter(
+                    provider=provider,
+                    rate=rate,
+                    capacity=capacity,
+                    default_retry_after=self.default_retry_after,
+                    clock=self._clock,
+                    wall_clock=self._wall_clock,
+                )
+            return self._limiters[provider]
+
+    def acquire(self, url: str) -> float:
+        """
+        Block until a request to the URL is allowed.
+
+        :return: the seconds waited.
+        """
+        wait = self.get_limiter(get_provider(url)).reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def update(
+        self,
+        url: str,
+        status_code: int,
+        headers: T.Mapping[str, str],
+    ) -> bool:
+        """
+        See :meth:`ProviderLimiter.update`.
+        """
+        return self.get_limiter(get_provider(url)).update(status_code, headers)
+
+    def get_metrics(self) -> T.Dict[str, ProviderMetrics]:
+        """
+        Get a snapshot of the metrics of each provider.
+        """
+        with self._lock:
+            limiters = list(self._limiters.values())
+        metrics = dict()
+        for limiter in limiters:
+            with limiter._lock:
+                snapshot = dataclasses.replace(limiter.metrics)
+            snapshot.wait_seconds = limiter.get_wait_seconds()
+            metrics[snapshot.provider] = snapshot
+        return metrics
+
+
+# the process wide scheduler, all PyWf objects share the same budget
+default_scheduler = RateLimitScheduler()
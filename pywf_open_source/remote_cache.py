@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*-
+
+"""
+A remote cache of step outputs shared by CI jobs and developers, for
+example the exported ``requirements-*.txt`` files and the ``dist`` artifacts.
+
+The cache is content addressable, the same layout as most build caches:
+
+- ``cas/${sha256[:2]}/${sha256}``: the file contents, keyed by their sha256,
+  the files that don't change between entries are stored and downloaded once.
+- ``ac/${key}.json``: the manifest of a step output, the ``key`` is derived
+  from the digest of the step inputs. It lists the output folders / files
+  and the relative path, sha256, size and mode of every file.
+
+The manifest is uploaded after all the file contents, so an entry is never
+visible half written. On restore, every file is verified with its sha256
+and staged in a temp folder, the outputs are replaced only if all files are
+good.
+
+The store is pluggable, :class:`DirStore` is a shared folder (NFS, SMB, a
+mounted bucket ...), :class:`HttpStore` is any server that supports
+``GET`` / ``HEAD`` / ``PUT`` on a path, for example nginx with WebDAV.
+"""
+
+import typing as T
+import io
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+except ImportError:  # pragma: no cover
+    pass
+
+from .http_client import (
+    DEFAULT_TIMEOUT,
+    RETRY_STATUS_CODES,
+    new_session,
+    get_backoff_seconds,
+)
+
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_WORKERS = 8
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+class RemoteCacheError(Exception):
+    """
+    The remote cache is not reachable, or the data is corrupted.
+    """
+
+
+def get_file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_blob_name(sha256: str) -> str:
+    return f"cas/{sha256[:2]}/{sha256}"
+
+
+def get_manifest_name(key: str) -> str:
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"invalid remote cache key: {key!r}")
+    return f"ac/{key}.json"
+
+
+class _HashingWriter:
+    """
+    A file-like object that calculates the sha256 of the data written to it.
+    """
+
+    def __init__(self, fp: T.BinaryIO):
+        self.fp = fp
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fp.write(data)
+
+
+class BaseStore:
+    """
+    The interface of the remote cache storage backend. The ``name`` is a
+    relative path like ``cas/ab/abcd...``.
+    """
+
+    def has(self, name: str) -> bool:  # pragma: no cover
+        raise NotImplementedError
+
+    def download(self, name: str, fp: T.BinaryIO) -> bool:  # pragma: no cover
+        """
+        Write the content to ``fp``.
+
+        :return: False if the name does not exist.
+        """
+        raise NotImplementedError
+
+    def upload(self, name: str, path: Path):  # pragma: no cover
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class DirStore(BaseStore):
+    """
+    Store the cache in a local or shared folder.
+
+    :param dir_root: the root folder of the cache.
+    """
+
+    def __init__(self, dir_root: Path):
+        self.dir_root = dir_root
+
+    def has(self, name: str) -> bool:
+        return self.dir_root.joinpath(name).is_file()
+
+    def download(self, name: str, fp: T.BinaryIO) -> bool:
+        try:
+            with self.dir_root.joinpath(name).open("rb") as f:
+                shutil.copyfileobj(f, fp, CHUNK_SIZE)
+        except FileNotFoundError:
+            return False
+        except OSError as e:  # pragma: no cover
+            raise RemoteCacheError(f"failed to read {name}: {e}")
+        return True
+
+    def upload(self, name: str, path: Path):
+        path_dst = self.dir_root.joinpath(name)
+        try:
+            path_dst.parent.mkdir(parents=True, exist_ok=True)
+            # multiple writers can upload the same blob, each one writes to
+            # its own temp file then renames it atomically
+            fd, path_tmp = tempfile.mkstemp(
+                prefix=f".{path_dst.name}.", suffix=".tmp", dir=path_dst.parent
+            )
+            try:
+                with os.fdopen(fd, "wb") as f_dst, open(path, "rb") as f_src:
+                    shutil.copyfileobj(f_src, f_dst, CHUNK_SIZE)
+                os.chmod(path_tmp, 0o644)
+                os.replace(path_tmp, path_dst)
+            except BaseException:
+                os.unlink(path_tmp)
+                raise
+        except OSError as e:
+            raise RemoteCacheError(f"failed to write {name}: {e}")
+
+
+class HttpStore(BaseStore):
+    """
+    Store the cache in an HTTP server that supports ``GET``, ``HEAD`` and
+    ``PUT``, the name is appended to the base URL.
+
+    :param url: the base URL, for example ``https://cache.example.com/pywf``.
+    :param token: if given, send it as the ``Authorization: Bearer`` header.
+    :param pool_size: the connection pool size, it should be at least the
+        number of concurrent downloads.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: T.Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8,
+        pool_size: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = new_session(pool_size=pool_size)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _request(
+        self,
+        method: str,
+        name: str,
+        before_send: T.Optional[T.Callable[[], T.Dict[str, T.Any]]] = None,
+        **kwargs,
+    ) -> "requests.Response":
+        url = f"{self.url}/{name}"
+        attempt = 0
+        while True:
+            attempt += 1
+            if before_send is not None:
+                kwargs.update(before_send())
+            try:
+                res = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                if attempt > self.max_retries:
+                    raise RemoteCacheError(f"{method} {url} failed: {e!r}")
+            else:
+                if res.status_code not in RETRY_STATUS_CODES:
+                    return res
+                if attempt > self.max_retries:
+                    return res
+                res.close()
+            time.sleep(get_backoff_seconds(attempt, self.backoff, self.max_backoff))
+
+    def has(self, name: str) -> bool:
+        res = self._request("HEAD", name)
+        if res.status_code == 404:
+            return False
+        if not res.ok:
+            raise RemoteCacheError(f"HEAD {res.url} returned {res.status_code}")
+        return True
+
+    def download(self, name: str, fp: T.BinaryIO) -> bool:
+        res = self._request("GET", name, stream=True)
+        with res:
+            if res.status_code == 404:
+                return False
+            if not res.ok:
+                raise RemoteCacheError(f"GET {res.url} returned {res.status_code}")
+            try:
+                for chunk in res.iter_content(CHUNK_SIZE):
+                    fp.write(chunk)
+            except requests.RequestException as e:
+                raise RemoteCacheError(f"GET {res.url} failed: {e!r}")
+        return True
+
+    def upload(self, name: str, path: Path):
+        with path.open("rb") as f:
+            # stream the file from disk, rewind it before every attempt
+            def before_send():
+                f.seek(0)
+                return {"data": f}
+
+            res = self._request(
+                "PUT",
+                name,
+                before_send=before_send,
+                headers={"Content-Length": str(os.fstat(f.fileno()).st_size)},
+            )
+        if not res.ok:
+            raise RemoteCacheError(f"PUT {res.url} returned {res.status_code}")
+
+    def close(self):
+        self.session.close()
+
+
+def get_store(url: str, token: T.Optional[str] = None) -> BaseStore:
+    """
+    Create the store from a URL, ``http://`` and ``https://`` are
+    :class:`HttpStore`, ``file://`` and local paths are :class:`DirStore`.
+    """
+    if url.startswith(("http://", "https://")):
+        return HttpStore(url, token=token)
+    if url.startswith("file://"):
+        url = url[len("file://") :]
+    return DirStore(Path(url).expanduser())
+
+
+@dataclasses.dataclass
+class FileEntry:
+    """
+    A file in the step output.
+
+    :param path: the POSIX path relative to the project root.
+    """
+
+    path: str = dataclasses.field()
+    sha256: str = dataclasses.field()
+    size: int = dataclasses.field()
+    mode: int = dataclasses.field(default=0o644)
+
+
+@dataclasses.dataclass
+class Manifest:
+    """
+    The content of the ``ac/${key}.json`` file.
+
+    :param outputs: the output folders / files relative to the project root,
+        they are replaced as a whole on restore.
+    """
+
+    outputs: T.List[str] = dataclasses.field()
+    files: T.List[FileEntry] = dataclasses.field()
+    version: int = dataclasses.field(default=MANIFEST_VERSION)
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self), indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Manifest":
+        try:
+            data = json.loads(text)
+            if data["version"] != MANIFEST_VERSION:
+                raise ValueError(f"unsupported manifest version {data['version']}")
+            return cls(
+                outputs=list(data["outputs"]),
+                files=[FileEntry(**entry) for entry in data["files"]],
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise RemoteCacheError(f"invalid manifest: {e!r}")
+
+
+def _list_files(dir_root: Path, outputs: T.Iterable[str]) -> T.List[str]:
+    relpaths = list()
+    for output in outputs:
+        path = dir_root.joinpath(output)
+        if path.is_file():
+            relpaths.append(output)
+        elif path.is_dir():
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    path_file = Path(dirpath, filename)
+                    relpaths.append(path_file.relative_to(dir_root).as_posix())
+        else:
+            raise FileNotFoundError(f"step output not found: {path}")
+    return relpaths
+
+
+def _remove(path: Path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+
+def _is_safe_relpath(relpath: str) -> bool:
+    path = Path(relpath)
+    return (
+        path.is_absolute() is False
+        and ".." not in path.parts
+        and len(path.parts) > 0
+    )
+
+
+def _validate_manifest(manifest: Manifest):
+    """
+    The store is shared, never trust a manifest to delete or write files
+    outside of the project root, or outside of its own outputs.
+
+    :raise RemoteCacheError: if a path is invalid.
+    """
+    outputs = list()
+    for output in manifest.outputs:
+        if not _is_safe_relpath(output):
+            raise RemoteCacheError(f"invalid output in manifest: {output!r}")
+        outputs.append(Path(output).parts)
+    for entry in manifest.files:
+        if not _is_safe_relpath(entry.path):
+            raise RemoteCacheError(f"invalid path in manifest: {entry.path!r}")
+        parts = Path(entry.path).parts
+        if not any(parts[: len(output)] == output for output in outputs):
+            raise RemoteCacheError(
+                f"path in manifest is not in the outputs: {entry.path!r}"
+            )
+
+
+class RemoteCache:
+    """
+    Save and restore the step outputs to and from a store.
+
+    :param store: the storage backend.
+    :param max_workers: the number of concurrent uploads / downloads.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.store = store
+        self.max_workers = max_workers
+
+    def get_manifest(self, key: str) -> T.Optional[Manifest]:
+        buffer = io.BytesIO()
+        if not self.store.download(get_manifest_name(key), buffer):
+            return None
+        return Manifest.from_json(buffer.getvalue().decode("utf-8"))
+
+    def save(
+        self,
+        key: str,
+        dir_root: Path,
+        outputs: T.Iterable[str],
+    ) -> Manifest:
+        """
+        Upload the step outputs, the file contents that the store already
+        has are not uploaded again.
+
+        :param key: the cache key, letters, digits, ``.``, ``_`` and ``-``.
+        :param dir_root: the project root.
+        :param outputs: the output folders / files relative to ``dir_root``.
+        """
+        name_manifest = get_manifest_name(key)
+        outputs = [Path(output).as_posix() for output in outputs]
+        relpaths = _list_files(dir_root, outputs)
+
+        def get_entry(relpath: str) -> FileEntry:
+            path = dir_root.joinpath(relpath)
+            st = path.stat()
+            return FileEntry(
+                path=relpath,
+                sha256=get_file_sha256(path),
+                size=st.st_size,
+                mode=st.st_mode & 0o777,
+            )
+
+        def upload_blob(entry: FileEntry):
+            name = get_blob_name(entry.sha256)
+            if not self.store.has(name):
+                self.store.upload(name, dir_root.joinpath(entry.path))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            files = list(executor.map(get_entry, relpaths))
+            unique = {entry.sha256: entry for entry in files}
+            list(executor.map(upload_blob, unique.values()))
+
+        manifest = Manifest(outputs=outputs, files=files)
+        with tempfile.TemporaryDirectory() as dir_tmp:
+            path_manifest = Path(dir_tmp, "manifest.json")
+            path_manifest.write_text(manifest.to_json(), encoding="utf-8")
+            self.store.upload(name_manifest, path_manifest)
+        return manifest
+
+    def _fetch(self, entry: FileEntry, path_local: Path, path_stage: Path):
+        path_stage.parent.mkdir(parents=True, exist_ok=True)
+        # the unchanged local file is reused, for example most of the
+        # files in the docs html folder
+        try:
+            st = path_local.stat()
+        except OSError:
+            st = None
+        if (
+            st is not None
+            and st.st_size == entry.size
+            and get_file_sha256(path_local) == entry.sha256
+        ):
+            shutil.copy2(path_local, path_stage)
+            return
+        with path_stage.open("wb") as f:
+            writer = _HashingWriter(f)
+            if not self.store.download(get_blob_name(entry.sha256), writer):
+                raise RemoteCacheError(f"missing content of {entry.path}")
+        if writer.size != entry.size or writer.sha256.hexdigest() != entry.sha256:
+            raise RemoteCacheError(f"sha256 mismatch of {entry.path}")
+        # no setuid / setgid / sticky bits from a shared store
+        os.chmod(path_stage, entry.mode & 0o777)
+
+    def restore(
+        self,
+        key: str,
+        dir_root: Path,
+    ) -> T.Optional[T.List[Path]]:
+        """
+        Download the step outputs concurrently and verify them, then replace
+        the local outputs.
+
+        :return: the restored files, None if the key is not in the cache.
+
+        :raise RemoteCacheError: if the store fails or the data is corrupted,
+            the local outputs are not touched.
+        """
+        manifest = self.get_manifest(key)
+        if manifest is None:
+            return None
+        _validate_manifest(manifest)
+
+        # the staging folder is on the same file system, so the final
+        # move is a cheap rename
+        with tempfile.TemporaryDirectory(prefix=".remote-cache-", dir=dir_root) as dir_tmp:
+            dir_stage = Path(dir_tmp)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self._fetch,
+                        entry,
+                        dir_root.joinpath(entry.path),
+                        dir_stage.joinpath(entry.path),
+                    )
+                    for entry in manifest.files
+                ]
+                for future in futures:
+                    future.result()
+            for output in manifest.outputs:
+                _remove(dir_root.joinpath(output))
+            restored = list()
+            for entry in manifest.files:
+                path = dir_root.joinpath(entry.path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(dir_stage.joinpath(entry.path), path)
+                restored.append(path)
+        return restored
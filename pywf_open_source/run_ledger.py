@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measure the resource usage of the subprocesses started by ``run_command``,
+and keep the history in a local SQLite database, so we can see the slowest
+and the most memory hungry steps, the trend over time and the regressions.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import sys
+import time
+import sqlite3
+import threading
+import statistics
+import subprocess
+import dataclasses
+from pathlib import Path
+
+
+@dataclasses.dataclass
+class ResourceUsage:
+    """
+    The resource usage of a subprocess.
+
+    :param wall_time: elapsed seconds.
+    :param user_time: user CPU seconds.
+    :param sys_time: system CPU seconds.
+    :param max_rss_kb: peak resident set size in KB.
+    """
+
+    wall_time: float = dataclasses.field(default=0.0)
+    user_time: float = dataclasses.field(default=0.0)
+    sys_time: float = dataclasses.field(default=0.0)
+    max_rss_kb: int = dataclasses.field(default=0)
+
+
+def run_with_rusage(
+    args: T.List[str],
+    cwd: T.Optional[Path] = None,
+    read_output: T.Optional[T.Callable[[T.BinaryIO], T.Any]] = None,
+    **kwargs,
+) -> T.Tuple[subprocess.CompletedProcess, ResourceUsage]:
+    """
+    Run a command like ``subprocess.run(args, cwd=cwd, check=False)`` and
+    measure its resource usage.
+
+    :param read_output: if given, the stdout and stderr of the command are
+        merged into a pipe, this function is called with the pipe and should
+        read it until EOF, for example :meth:`OutputCapture.read_stream`.
+
+    On POSIX, the child is reaped with ``os.wait4``, which returns the
+    ``rusage`` of that exact child (and its waited-for descendants). Unlike
+    the ``resource.getrusage(RUSAGE_CHILDREN)`` delta, it is correct when
+    multiple commands run concurrently in threads. On other platforms,
+    only the wall time is measured.
+
+    On Linux, the peak RSS of the child includes the memory of this process
+    at the time of fork, so a tiny command reports about the size of the
+    Python process.
+
+    :param kwargs: other arguments for ``subprocess.Popen``.
+    """
+    if read_output is not None:
+        kwargs.update(stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    st = time.perf_counter()
+    process = subprocess.Popen(args, cwd=cwd, **kwargs)
+    try:
+        if read_output is not None:
+            with process.stdout:
+                read_output(process.stdout)
+        if not hasattr(os, "wait4"):  # pragma: no cover
+            process.wait()
+            usage = ResourceUsage(wall_time=time.perf_counter() - st)
+            return subprocess.CompletedProcess(args, process.returncode), usage
+        _, status, rusage = os.wait4(process.pid, 0)
+    except BaseException:  # pragma: no cover
+        process.kill()
+        process.wait()
+        raise
+    wall_time = time.perf_counter() - st
+    # tell Popen the child is already reaped
+    process.returncode = os.waitstatus_to_exitcode(status)
+    max_rss_kb = rusage.ru_maxrss
+    if sys.platform == "darwin":  # pragma: no cover
+        max_rss_kb = max_rss_kb // 1024  # bytes on macOS, KB on Linux
+    usage = ResourceUsage(
+        wall_time=wall_time,
+        user_time=rusage.ru_utime,
+        sys_time=rusage.ru_stime,
+        max_rss_kb=max_rss_kb,
+    )
+    return subprocess.CompletedProcess(args, process.returncode), usage
+
+
+@dataclasses.dataclass
+class RunRecord:
+    """
+    One row in the run ledger.
+
+    :param step: the name of the enclosing ``emoji_block``, or the command
+        name if it is not in any block.
+    """
+
+    started_at: float = dataclasses.field()
+    step: str = dataclasses.field()
+    command: str = dataclasses.field()
+    cwd: str = dataclasses.field()
+    exit_code: int = dataclasses.field()
+    wall_time: float = dataclasses.field()
+    user_time: float = dataclasses.field()
+    sys_time: float = dataclasses.field()
+    max_rss_kb: int = dataclasses.field()
+
+
+_FIELDS = [field.name for field in dataclasses.fields(RunRecord)]
+
+_SQL_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    step TEXT NOT NULL,
+    command TEXT NOT NULL,
+    cwd TEXT NOT NULL,
+    exit_code INTEGER NOT NULL,
+    wall_time REAL NOT NULL,
+    user_time REAL NOT NULL,
+    sys_time REAL NOT NULL,
+    max_rss_kb INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_step_started_at ON runs (step, started_at);
+"""
+
+
+@dataclasses.dataclass
+class StepStats:
+    """
+    The aggregated statistics of a step.
+
+    :param wall_times: the wall times of the recent runs, the oldest first.
+    :param median_wall_time: the median wall time of the runs before the last one.
+    """
+
+    step: str = dataclasses.field()
+    runs: int = dataclasses.field()
+    failures: int = dataclasses.field()
+    last_wall_time: float = dataclasses.field()
+    median_wall_time: T.Optional[float] = dataclasses.field()
+    max_wall_time: float = dataclasses.field()
+    max_rss_kb: int = dataclasses.field()
+    wall_times: T.List[float] = dataclasses.field(default_factory=list)
+
+    @property
+    def regression_ratio(self) -> T.Optional[float]:
+        """
+        The last wall time divided by the rolling median of the previous runs.
+        """
+        if not self.median_wall_time:
+            return None
+        return self.last_wall_time / self.median_wall_time
+
+
+class RunLedger:
+    """
+    The append only run history in a SQLite database.
+
+    :param path: the SQLite database file path.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._is_schema_created = False
+
+    def _create_schema(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            conn.executescript(_SQL_CREATE_TABLE)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # the schema is created once per ledger instance, not on every command
+        if self._is_schema_created is False:
+            with self._lock:
+                if self._is_schema_created is False:
+                    self._create_schema()
+                    self._is_schema_created = True
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def append(self, record: RunRecord):
+        # a new connection every time, so it is safe to call from threads
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO runs ({', '.join(_FIELDS)}) "
+                    f"VALUES ({', '.join('?' * len(_FIELDS))})",
+                    dataclasses.astuple(record),
+                )
+        finally:
+            conn.close()
+
+    def list_records(
+        self,
+        step: T.Optional[str] = None,
+    ) -> T.List[RunRecord]:
+        """
+        List the records in chronological order.
+        """
+        sql = f"SELECT {', '.join(_FIELDS)} FROM runs"
+        params = tuple()
+        if step is not None:
+            sql += " WHERE step = ?"
+            params = (step,)
+        sql += " ORDER BY started_at, id"
+        conn = self._connect()
+        try:
+            return [RunRecord(*row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def get_step_stats(self, window: int = 10) -> T.List[StepStats]:
+        """
+        Aggregate the records by step.
+
+        :param window: the number of recent runs for the trend and the
+            rolling median.
+        """
+        records_by_step: T.Dict[str, T.List[RunRecord]] = dict()
+        for record in self.list_records():
+            records_by_step.setdefault(record.step, []).append(record)
+        stats_list = list()
+        for step, records in records_by_step.items():
+            recent = records[-(window + 1) :]
+            previous = [r.wall_time for r in recent[:-1]]
+            stats_list.append(
+                StepStats(
+                    step=step,
+                    runs=len(records),
+                    failures=sum(1 for r in records if r.exit_code != 0),
+                    last_wall_time=records[-1].wall_time,
+                    median_wall_time=statistics.median(previous) if previous else None,
+                    max_wall_time=max(r.wall_time for r in records),
+                    max_rss_kb=max(r.max_rss_kb for r in records),
+                    wall_times=[r.wall_time for r in recent],
+                )
+            )
+        return stats_list
+
+
+def _format_table(rows: T.List[T.Tuple[str, ...]]) -> T.List[str]:
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = list()
+    for i, row in enumerate(rows):
+        lines.append(" | ".join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip())
+        if i == 0:
+            lines.append("-+-".join("-" * w for w in widths))
+    return lines
+
+
+def format_stats_report(
+    stats_list: T.List[StepStats],
+    top: int = 10,
+    regression_threshold: float = 1.5,
+    min_regression_seconds: float = 1.0,
+) -> str:
+    """
+    Format the step statistics as a plain text report with four sections:
+    the slowest steps, the most memory hungry steps, the trend of the wall
+    time and the regressions.
+
+    :param regression_threshold: the last run is a regression if it is this
+        many times slower than the rolling median of the previous runs.
+    :param min_regression_seconds: ignore the regressions smaller than this,
+        so the sub-second steps don't produce noise.
+    """
+    if not stats_list:
+        return "No run history yet."
+    lines = list()
+
+    lines.append("Slowest steps (by median wall time):")
+    slowest = sorted(
+        stats_list,
+        key=lambda s: s.median_wall_time or s.last_wall_time,
+        reverse=True,
+    )[:top]
+    rows = [("step", "runs", "failures", "median", "max", "last")]
+    for s in slowest:
+        median = s.median_wall_time or s.last_wall_time
+        rows.append(
+            (
+                s.step,
+                str(s.runs),
+                str(s.failures),
+                f"{median:.2f}s",
+                f"{s.max_wall_time:.2f}s",
+                f"{s.last_wall_time:.2f}s",
+            )
+        )
+    lines.extend(_format_table(rows))
+
+    lines.append("")
+    lines.append("Most memory hungry steps (by peak RSS):")
+    rows = [("step", "peak RSS")]
+    for s in sorted(stats_list, key=lambda s: s.max_rss_kb, reverse=True)[:top]:
+        rows.append((s.step, f"{s.max_rss_kb / 1024:.1f} MB"))
+    lines.extend(_format_table(rows))
+
+    lines.append("")
+    lines.append("Trend (wall time of the recent runs, oldest first):")
+    rows = [("step", "wall time")]
+    for s in slowest:
+        rows.append((s.step, " ".join(f"{t:.2f}" for t in s.wall_times)))
+    lines.extend(_format_table(rows))
+
+    lines.append("")
+    regressions = [
+        s
+        for s in stats_list
+        if s.regression_ratio is not None
+        and s.regression_ratio >= regression_threshold
+        and s.last_wall_time - s.median_wall_time >= min_regression_seconds
+    ]
+    if regressions:
+        lines.append(
+            f"Regressions (last run >= {regression_threshold}x rolling median):"
+        )
+        rows = [("step", "last", "median", "ratio")]
+        for s in sorted(regressions, key=lambda s: s.regression_ratio, reverse=True):
+            rows.append(
+                (
+                    s.step,
+                    f"{s.last_wall_time:.2f}s",
+                    f"{s.median_wall_time:.2f}s",
+                    f"{s.regression_ratio:.1f}x",
+                )
+            )
+        lines.extend(_format_table(rows))
+    else:
+        lines.append("No regressions.")
+    return "\n".join(lines)
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+
+"""
+A compact on-disk `BM25 <https://en.wikipedia.org/wiki/Okapi_BM25>`_ search
+index over a set of text documents, for example the per-file documents of
+the AI knowledge base. The documents are split into chunks of lines, a query
+returns the top-k relevant chunks.
+
+The index is a single binary file that is memory mapped, a query only reads
+the posting lists of the query terms and the text of the top chunks, so it
+takes milliseconds even if the documents are large.
+
+Usage:
+
+.. code-block:: bash
+
+    python -m pywf_open_source.search_index build genai/tmp/docs kb.bm25
+    python -m pywf_open_source.search_index search kb.bm25 "run command" -k 3
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import struct
+import argparse
+import dataclasses
+from array import array
+from pathlib import Path
+
+DEFAULT_CHUNK_LINES = 40
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+
+_MAGIC = b"PWFBM25\x01"
+# magic, byte order, n_chunks, n_terms, k1, b, avgdl, then 8 section offsets
+_HEADER = struct.Struct("<8s8sQQddd8Q")
+_SECTIONS = [
+    "term_offsets",  # uint64[n_terms + 1], offsets in term_blob
+    "term_blob",  # the sorted utf-8 terms
+    "posting_offsets",  # uint64[n_terms + 1], offsets in the posting arrays
+    "posting_chunk_ids",  # uint32[n_postings]
+    "posting_tfs",  # uint32[n_postings]
+    "chunk_lengths",  # uint32[n_chunks], number of tokens
+    "chunk_offsets",  # uint64[n_chunks + 1], offsets in chunk_blob
+    "chunk_blob",  # a utf-8 json record per chunk
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> T.List[str]:
+    """
+    Split the text into lower case word tokens. An identifier such as
+    ``run_command`` yields itself and its parts ``run`` and ``command``.
+    Single characters are dropped.
+    """
+    tokens = list()
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if "_" in token:
+            parts = [part for part in token.split("_") if len(part) > 1]
+            if len(parts) > 1:
+                tokens.extend(parts)
+            token = token.strip("_")
+        if len(token) > 1:
+            tokens.append(token)
+    return tokens
+
+
+@dataclasses.dataclass
+class Chunk:
+    """
+    A chunk of lines of a document.
+
+    :param source: the document name.
+    :param start_line: the 1-based first line number.
+    :param end_line: the 1-based last line number.
+    """
+
+    source: str = dataclasses.field()
+    start_line: int = dataclasses.field()
+    end_line: int = dataclasses.field()
+    text: str = dataclasses.field()
+
+
+@dataclasses.dataclass
+class SearchResult:
+    chunk_id: int = dataclasses.field()
+    score: float = dataclasses.field()
+    chunk: Chunk = dataclasses.field()
+
+
+def split_chunks(
+    source: str,
+    text: str,
+    chunk_lines: int = DEFAULT_CHUNK_LINES,
+) -> T.Iterator[Chunk]:
+    lines = text.splitlines()
+    for start in range(0, len(lines), chunk_lines):
+        chunk_text = "\n".join(lines[start : start + chunk_lines])
+        if chunk_text.strip():
+            yield Chunk(
+                source=source,
+                start_line=start + 1,
+                end_line=min(start + chunk_lines, len(lines)),
+                text=chunk_text,
+            )
+
+
+def _pad(size: int) -> bytes:
+    return b"\x00" * (-size % 8)
+
+
+def build_index(
+    documents: T.Iterable[T.Tuple[str, str]],
+    path_index: Path,
+    chunk_lines: int = DEFAULT_CHUNK_LINES,
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B,
+) -> int:
+    """
+    Build the index file, it is written to a temp file then renamed.
+
+    :param documents: ``(source, text)`` pairs.
+    :param path_index: the index file path.
+
+    :return: the number of chunks.
+    """
+    postings: T.Dict[str, T.Tuple[array, array]] = dict()
+    chunk_lengths = array("I")
+    chunk_offsets = array("Q", [0])
+    chunk_records = list()
+    for source, text in documents:
+        for chunk in split_chunks(source, text, chunk_lines):
+            chunk_id = len(chunk_lengths)
+            tokens = tokenize(chunk.text)
+            chunk_lengths.append(len(tokens))
+            tfs: T.Dict[str, int] = dict()
+            for token in tokens:
+                tfs[token] = tfs.get(token, 0) + 1
+            for token, tf in tfs.items():
+                if token not in postings:
+                    postings[token] = (array("I"), array("I"))
+                chunk_ids, tf_array = postings[token]
+                chunk_ids.append(chunk_id)
+                tf_array.append(tf)
+            record = json.dumps(dataclasses.asdict(chunk)).encode("utf-8")
+            chunk_records.append(record)
+            chunk_offsets.append(chunk_offsets[-1] + len(record))
+
+    terms = sorted(postings)
+    term_offsets = array("Q", [0])
+    term_blob = list()
+    posting_offsets = array("Q", [0])
+    posting_chunk_ids = array("I")
+    posting_tfs = array("I")
+    for term in terms:
+        encoded = term.encode("utf-8")
+        term_blob.append(encoded)
+        term_offsets.append(term_offsets[-1] + len(encoded))
+        chunk_ids, tf_array = postings[term]
+        posting_chunk_ids.extend(chunk_ids)
+        posting_tfs.extend(tf_array)
+        posting_offsets.append(len(posting_chunk_ids))
+    n_chunks = len(chunk_lengths)
+    avgdl = (sum(chunk_lengths) / n_chunks) if n_chunks else 0.0
+
+    sections = [
+        term_offsets.tobytes(),
+        b"".join(term_blob),
+        posting_offsets.tobytes(),
+        posting_chunk_ids.tobytes(),
+        posting_tfs.tobytes(),
+        chunk_lengths.tobytes(),
+        chunk_offsets.tobytes(),
+        b"".join(chunk_records),
+    ]
+    offsets = list()
+    position = _HEADER.size
+    for data in sections:
+        offsets.append(position)
+        position += len(data) + len(_pad(len(data)))
+
+    path_index = Path(path_index)
+    path_index.parent.mkdir(parents=True, exist_ok=True)
+    path_tmp = path_index.with_name(f"{path_index.name}.tmp")
+    with path_tmp.open("wb") as f:
+        f.write(
+            _HEADER.pack(
+                _MAGIC,
+                sys.byteorder.encode("ascii").ljust(8, b"\x00"),
+                n_chunks,
+                len(terms),
+                k1,
+                b,
+                avgdl,
+                *offsets,
+            )
+        )
+        for data in sections:
+            f.write(data)
+            f.write(_pad(len(data)))
+    path_tmp.replace(path_index)
+    return n_chunks
+
+
+class SearchIndex:
+    """
+    The memory mapped index created by :func:`build_index`.
+
+    Example:
+
+    .. code-block:: python
+
+        with SearchIndex(Path("kb.bm25")) as index:
+            for result in index.search("run command", top_k=3):
+                print(result.score, result.chunk.source, result.chunk.text)
+    """
+
+    def __init__(self, path_index: Path):
+        self.path_index = Path(path_index)
+        with self.path_index.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    def _load(self):
+        (
+            magic,
+            byteorder,
+            self.n_chunks,
+            self.n_terms,
+            self.k1,
+            self.b,
+            self.avgdl,
+            *offsets,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.path_index} is not a search index file")
+        if byteorder.rstrip(b"\x00").decode("ascii") != sys.byteorder:
+            raise ValueError(f"{self.path_index} is built on a different platform")
+        view = memoryview(self._mmap)
+        sizes = {
+            "term_offsets": (self.n_terms + 1) * 8,
+            "posting_offsets": (self.n_terms + 1) * 8,
+            "chunk_lengths": self.n_chunks * 4,
+            "chunk_offsets": (self.n_chunks + 1) * 8,
+        }
+        formats = {
+            "term_offsets": "Q",
+            "posting_offsets": "Q",
+            "posting_chunk_ids": "I",
+            "posting_tfs": "I",
+            "chunk_lengths": "I",
+            "chunk_offsets": "Q",
+        }
+        bounds = offsets + [len(self._mmap)]
+        self._views = dict()
+        for i, name in enumerate(_SECTIONS):
+            end = offsets[i] + sizes[name] if name in sizes else bounds[i + 1]
+            section = view[offsets[i] : end]
+            if name in formats:
+                # the padding is not part of the array
+                itemsize = struct.calcsize(formats[name])
+                section = section[: len(section) // itemsize * itemsize]
+                section = section.cast(formats[name])
+            self._views[name] = section
+        n_postings = self._views["posting_offsets"][self.n_terms]
+        for name in ["posting_chunk_ids", "posting_tfs"]:
+            self._views[name] = self._views[name][:n_postings]
+
+    def close(self):
+        for section in self._views.values():
+            section.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_term(self, i: int) -> bytes:
+        term_offsets = self._views["term_offsets"]
+        return bytes(
+            self._views["term_blob"][term_offsets[i] : term_offsets[i + 1]]
+        )
+
+    def find_term(self, term: str) -> T.Optional[int]:
+        """
+        Binary search the term id in the sorted term dictionary.
+        """
+        target = term.encode("utf-8")
+        low, high = 0, self.n_terms
+        while low < high:
+            mid = (low + high) // 2
+            if self._get_term(mid) < target:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.n_terms and self._get_term(low) == target:
+            return low
+        return None
+
+    def get_chunk(self, chunk_id: int) -> Chunk:
+        chunk_offsets = self._views["chunk_offsets"]
+        data = self._views["chunk_blob"][
+            chunk_offsets[chunk_id] : chunk_offsets[chunk_id + 1]
+        ]
+        return Chunk(**json.loads(bytes(data)))
+
+    def search(self, query: str, top_k: int = 5) -> T.List[SearchResult]:
+        """
+        Find the top-k chunks by the BM25 score of the query terms.
+        """
+        posting_offsets = self._views["posting_offsets"]
+        posting_chunk_ids = self._views["posting_chunk_ids"]
+        posting_tfs = self._views["posting_tfs"]
+        chunk_lengths = self._views["chunk_lengths"]
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        scores: T.Dict[int, float] = dict()
+        for term in set(tokenize(query)):
+            term_id = self.find_term(term)
+            if term_id is None:
+                continue
+            start, end = posting_offsets[term_id], posting_offsets[term_id + 1]
+            df = end - start
+            idf = math.log(1 + (self.n_chunks - df + 0.5) / (df + 0.5))
+            for i in range(start, end):
+                chunk_id = posting_chunk_ids[i]
+                tf = posting_tfs[i]
+                norm = k1 * (1 - b + b * chunk_lengths[chunk_id] / avgdl)
+                scores[chunk_id] = (
+                    scores.get(chunk_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+                )
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [
+            SearchResult(chunk_id=chunk_id, score=score, chunk=self.get_chunk(chunk_id))
+            for chunk_id, score in top
+        ]
+
+
+def iter_dir_documents(dir_root: Path) -> T.Iterator[T.Tuple[str, str]]:
+    """
+    Yield the ``(relative path, text)`` of every text file in a folder,
+    the files that are not utf-8 encoded are skipped.
+    """
+    for path in sorted(Path(dir_root).rglob("*")):
+        if path.is_file():
+            try:
+                text = path.read_text(encoding="utf-8")
+            except UnicodeDecodeError:
+                continue
+            yield path.relative_to(dir_root).as_posix(), text
+
+
+def main(argv: T.Optional[T.List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local BM25 search index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    parser_build = subparsers.add_parser("build", help="index all files in a folder")
+    parser_build.add_argument("dir_docs", type=Path)
+    parser_build.add_argument("path_index", type=Path)
+    parser_build.add_argument("--chunk-lines", type=int, default=DEFAULT_CHUNK_LINES)
+    parser_search = subparsers.add_parser("search", help="find the top-k chunks")
+    parser_search.add_argument("path_index", type=Path)
+    parser_search.add_argument("query")
+    parser_search.add_argument("-k", "--top-k", type=int, default=5)
+    parser_search.add_argument(
+        "--json",
+        action="store_true",
+        help="print the results as JSON lines",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        n_chunks = build_index(
+            iter_dir_documents(args.dir_docs),
+            args.path_index,
+            chunk_lines=args.chunk_lines,
+        )
+        print(f"indexed {n_chunks} chunks to {args.path_index}")
+        return
+    with SearchIndex(args.path_index) as index:
+        for result in index.search(args.query, top_k=args.top_k):
+            chunk = result.chunk
+            if args.json:
+                print(json.dumps({"score": result.score, **dataclasses.asdict(chunk)}))
+            else:
+                print(
+                    f"--- {chunk.source}:{chunk.start_line}-{chunk.end_line} "
+                    f"(score = {result.score:.2f})"
+                )
+                print(chunk.text)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""
+Resolve the CLI tools (poetry, twine, virtualenv, ...) to absolute paths,
+probe their versions, and remember the result in a JSON file, so the
+``$PATH`` lookup and the slow ``--version`` probe are not repeated on every
+run. An entry is invalidated when the binary's mtime or inode changes, or
+when the tool appears in a search folder with higher priority.
+
+The table is checked against the file system once per process, after that
+the result, including "not found", is served from memory without any
+``stat``. Use ``revalidate=True`` (``PyWf.doctor`` does) or
+:meth:`ToolTable.invalidate` (``run_command`` does when the binary can't be
+executed) to check again.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import json
+import shutil
+import threading
+import subprocess
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_VERSION_TIMEOUT = 30
+
+
+@dataclasses.dataclass
+class ToolInfo:
+    """
+    The resolved CLI tool.
+
+    :param name: the command name, for example ``"poetry"``.
+    :param path: the absolute path, None if not found.
+    :param mtime_ns: the binary's mtime, for invalidation.
+    :param inode: the binary's inode, for invalidation.
+    :param env_path: the ``$PATH`` value if the tool was found in ``$PATH``.
+    :param version: the first line of the ``--version`` output, None if
+        not probed yet.
+    :param error: the error message of the version probe.
+    """
+
+    name: str = dataclasses.field()
+    path: T.Optional[str] = dataclasses.field(default=None)
+    mtime_ns: int = dataclasses.field(default=0)
+    inode: int = dataclasses.field(default=0)
+    env_path: T.Optional[str] = dataclasses.field(default=None)
+    version: T.Optional[str] = dataclasses.field(default=None)
+    error: T.Optional[str] = dataclasses.field(default=None)
+
+    @property
+    def is_found(self) -> bool:
+        return self.path is not None
+
+    @property
+    def is_ok(self) -> bool:
+        return self.is_found and self.error is None
+
+
+def _stat(path: T.Union[str, Path]) -> T.Optional[os.stat_result]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st
+
+
+def probe_version(
+    path: str,
+    args: T.Sequence[str] = ("--version",),
+    timeout: float = DEFAULT_VERSION_TIMEOUT,
+) -> str:
+    """
+    Run ``${path} --version`` and return the first line of the output.
+
+    :raise RuntimeError: if the command fails.
+    """
+    try:
+        res = subprocess.run(
+            [path, *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}")
+    output = (res.stdout.strip() or res.stderr.strip()).splitlines()
+    if res.returncode != 0:
+        message = output[-1] if output else ""
+        raise RuntimeError(f"exit code {res.returncode}: {message}")
+    return output[0] if output else ""
+
+
+class ToolTable:
+    """
+    Thread safe, persistent tool resolution table.
+
+    :param path_cache: the JSON file to persist the table, if None, the table
+        lives in memory only.
+    """
+
+    def __init__(self, path_cache: T.Optional[Path] = None):
+        self.path_cache = path_cache
+        self._tools: T.Optional[T.Dict[str, ToolInfo]] = None
+        # (name, search dirs) -> the result checked in this process
+        self._resolved: T.Dict[T.Tuple[str, T.Tuple[str, ...]], ToolInfo] = dict()
+        self._lock = threading.RLock()
+
+    def _get_tools(self) -> T.Dict[str, ToolInfo]:
+        # the caller holds the lock
+        if self._tools is None:
+            self._tools = dict()
+            if self.path_cache is not None:
+                try:
+                    data = json.loads(self.path_cache.read_text(encoding="utf-8"))
+                    for name, kwargs in data.items():
+                        self._tools[name] = ToolInfo(**kwargs)
+                except (OSError, ValueError, TypeError):
+                    pass
+        return self._tools
+
+    def _save(self):
+        # the caller holds the lock, the table is nice to have,
+        # never fail because of it
+        if self.path_cache is None:
+            return
+        data = {
+            name: dataclasses.asdict(info)
+            for name, info in self._get_tools().items()
+            if info.is_found
+        }
+        try:
+            self.path_cache.parent.mkdir(parents=True, exist_ok=True)
+            path_tmp = self.path_cache.with_name(f"{self.path_cache.name}.tmp")
+            path_tmp.write_text(json.dumps(data, indent=4), encoding="utf-8")
+            path_tmp.replace(self.path_cache)
+        except OSError:  # pragma: no cover
+            pass
+
+    @staticmethod
+    def _is_valid(
+        info: ToolInfo,
+        search_dirs: T.Sequence[Path],
+    ) -> bool:
+        if info.path is None:
+            return False
+        # the first existing candidate wins, it has to be the cached one
+        for dir_search in search_dirs:
+            path = dir_search.joinpath(info.name)
+            st = _stat(path)
+            if st is not None:
+                return str(path) == info.path and (st.st_mtime_ns, st.st_ino) == (
+                    info.mtime_ns,
+                    info.inode,
+                )
+        if info.env_path != os.environ.get("PATH"):
+            return False
+        st = _stat(info.path)
+        return st is not None and (st.st_mtime_ns, st.st_ino) == (
+            info.mtime_ns,
+            info.inode,
+        )
+
+    def invalidate(self, name: T.Optional[str] = None):
+        """
+        Forget the in-memory result of a tool, or all tools, so the next
+        :meth:`resolve` checks the file system again.
+        """
+        with self._lock:
+            if name is None:
+                self._resolved.clear()
+            else:
+                for key in [key for key in self._resolved if key[0] == name]:
+                    del self._resolved[key]
+
+    def resolve(
+        self,
+        name: str,
+        search_dirs: T.Sequence[Path] = tuple(),
+        revalidate: bool = False,
+    ) -> ToolInfo:
+        """
+        Find the tool in the search folders in order, then in ``$PATH``.
+
+        :param revalidate: check the file system even if the tool is
+            already resolved in this process.
+        """
+        key = (name, tuple(str(dir_search) for dir_search in search_dirs))
+        with self._lock:
+            if revalidate is False:
+                info = self._resolved.get(key)
+                if info is not None:
+                    return info
+            tools = self._get_tools()
+            info = tools.get(name)
+            if info is not None and self._is_valid(info, search_dirs):
+                self._resolved[key] = info
+                return info
+            new_info = ToolInfo(name=name)
+            for dir_search in search_dirs:
+                path = dir_search.joinpath(name)
+                if _stat(path) is not None:
+                    new_info.path = str(path)
+                    break
+            else:
+                path = shutil.which(name)
+                if path is not None:
+                    new_info.path = str(Path(path).absolute())
+                    new_info.env_path = os.environ.get("PATH")
+            if new_info.path is not None:
+                st = _stat(new_info.path)
+                new_info.mtime_ns, new_info.inode = st.st_mtime_ns, st.st_ino
+            tools[name] = new_info
+            self._resolved[key] = new_info
+            # only the found tools are persisted
+            if new_info.is_found or (info is not None and info.is_found):
+                self._save()
+            return new_info
+
+    def probe(
+        self,
+        name: str,
+        search_dirs: T.Sequence[Path] = tuple(),
+        version_args: T.Sequence[str] = ("--version",),
+        revalidate: bool = False,
+    ) -> ToolInfo:
+        """
+        Resolve the tool and probe its version if it is not known yet.
+        """
+        info = self.resolve(name, search_dirs, revalidate=revalidate)
+        if not info.is_found or info.version is not None:
+            return info
+        # probe outside the lock, so multiple tools can be probed concurrently
+        try:
+            version, error = probe_version(info.path, version_args), None
+        except RuntimeError as e:
+            version, error = None, str(e)
+        with self._lock:
+            info = dataclasses.replace(info, version=version, error=error)
+            self._get_tools()[name] = info
+            key = (name, tuple(str(dir_search) for dir_search in search_dirs))
+            self._resolved[key] = info
+            if error is None:
+                self._save()
+        return info
+
+    def probe_all(
+        self,
+        names: T.Sequence[str],
+        search_dirs: T.Sequence[Path] = tuple(),
+        max_workers: int = 8,
+        revalidate: bool = False,
+    ) -> T.List[ToolInfo]:
+        """
+        Probe multiple tools concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda name: self.probe(name, search_dirs, revalidate=revalidate),
+                    names,
+                )
+            )
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Record the ``logger.emoji_block`` / ``logger.pretty_log`` blocks and the
+``run_command`` subprocesses as spans, and save them in the
+`Trace Event Format <https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU>`_,
+which can be opened by ``chrome://tracing`` or https://ui.perfetto.dev.
+
+Set the ``PYWF_TRACE`` environment variable to the trace file path to
+enable it, the events are appended to the file when the process exits,
+so a ``make`` target that runs multiple scripts produces one timeline.
+Delete the file to start a new trace::
+
+    rm -f trace.json; PYWF_TRACE=trace.json make build
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import json
+import time
+import atexit
+import threading
+import contextlib
+from pathlib import Path
+
+
+class Tracer:
+    """
+    A thread safe trace event recorder.
+
+    :param enabled: if False, nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events: T.List[T.Dict[str, T.Any]] = list()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def _now() -> int:
+        # microsecond, the unit of the trace event format. The wall clock is
+        # used because the events of multiple processes are merged in one
+        # file, ``perf_counter`` has an arbitrary per process start point
+        return time.time_ns() // 1000
+
+    def _add(self, event: T.Dict[str, T.Any]):
+        event["pid"] = self._pid
+        event["tid"] = threading.get_native_id()
+        with self._lock:
+            self.events.append(event)
+
+    def begin(
+        self,
+        name: str,
+        cat: str = "block",
+        args: T.Optional[T.Dict[str, T.Any]] = None,
+    ):
+        """
+        Record the start of a span, it has to be ended by :meth:`end`
+        in the same thread.
+        """
+        if self.enabled:
+            event = {"name": name, "cat": cat, "ph": "B", "ts": self._now()}
+            if args:
+                event["args"] = args
+            self._add(event)
+
+    def end(
+        self,
+        name: str,
+        cat: str = "block",
+        args: T.Optional[T.Dict[str, T.Any]] = None,
+    ):
+        if self.enabled:
+            event = {"name": name, "cat": cat, "ph": "E", "ts": self._now()}
+            if args:
+                event["args"] = args
+            self._add(event)
+
+    @contextlib.contextmanager
+    def span(
+        self,
+        name: str,
+        cat: str = "block",
+        args: T.Optional[T.Dict[str, T.Any]] = None,
+    ):
+        """
+        Record a span around a code block as a complete event. The ``args``
+        dict can be updated inside the block, for example to add the result.
+        """
+        if args is None:
+            args = dict()
+        if not self.enabled:
+            yield args
+            return
+        st = self._now()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": st,
+                "dur": self._now() - st,
+            }
+            if args:
+                event["args"] = args
+            self._add(event)
+
+    def on_block(
+        self,
+        event: str,
+        block: str,
+        elapsed: T.Optional[float] = None,
+    ):
+        """
+        The ``VisLog`` block listener, see ``VisLog.add_block_listener``.
+        """
+        if event == "start":
+            self.begin(block)
+        elif event == "error":
+            self.end(block, args={"status": "error"})
+        else:
+            self.end(block)
+
+    def to_dict(self) -> T.Dict[str, T.Any]:
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path: Path, merge: bool = False):
+        """
+        Write the trace file, it is written to a temp file then renamed.
+
+        :param merge: if True, keep the events already in the file. The
+            timestamps are from the wall clock, so the events of different
+            processes are on the same timeline.
+        """
+        path = Path(path)
+        data = self.to_dict()
+        if merge:
+            try:
+                existing = json.loads(path.read_text(encoding="utf-8"))
+                data["traceEvents"] = existing["traceEvents"] + data["traceEvents"]
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        path_tmp.write_text(json.dumps(data), encoding="utf-8")
+        path_tmp.replace(path)
+
+
+_path_trace = os.environ.get("PYWF_TRACE")
+
+# the process wide tracer
+tracer = Tracer(enabled=bool(_path_trace))
+
+if _path_trace:  # pragma: no cover
+    atexit.register(tracer.save, Path(_path_trace).absolute(), merge=True)
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+"""
+Watch file changes in a set of directories.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY". On Linux it uses ``inotify`` via
+    ``ctypes``, the kernel tells us which file changed, so the latency does
+    not grow with the size of the tree. On other platforms, or if ``inotify``
+    is not usable (for example the watch limit is reached), it falls back to
+    polling based on ``os.scandir``, which works everywhere and is fast
+    enough for a source code tree.
+"""
+
+import typing as T
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import functools
+from pathlib import Path
+
+# file stat fingerprint, (mtime in nanoseconds, size in bytes)
+Fingerprint = T.Tuple[int, int]
+Snapshot = T.Dict[str, Fingerprint]
+
+DEFAULT_IGNORE_DIRS = frozenset(
+    [
+        ".git",
+        ".venv",
+        ".cache",
+        ".pytest_cache",
+        ".ipynb_checkpoints",
+        "__pycache__",
+        "build",
+        "dist",
+        "htmlcov",
+    ]
+)
+
+
+def _is_ignored_dir(name: str, path: str, ignore_dirs: T.FrozenSet[str]) -> bool:
+    """
+    A directory is ignored if its name or its full path is in ``ignore_dirs``.
+    """
+    return name in ignore_dirs or path in ignore_dirs
+
+
+def take_snapshot(
+    dirs: T.Iterable[Path],
+    suffixes: T.Optional[T.Iterable[str]] = None,
+    ignore_dirs: T.Iterable[str] = DEFAULT_IGNORE_DIRS,
+) -> Snapshot:
+    """
+    Take a snapshot of all files in the given directories.
+
+    :param dirs: the directories to watch, missing directories are ignored.
+    :param suffixes: only include files with these suffixes, for example
+        ``[".py", ".rst"]``. If None, include all files.
+    :param ignore_dirs: directory names, or full paths in the same form as
+        ``dirs``, to skip. A full path skips one specific folder, for
+        example a generated one, a name skips all folders with this name.
+    """
+    if suffixes is not None:
+        suffixes = tuple(suffixes)
+    ignore_dirs = frozenset(ignore_dirs)
+    snapshot = dict()
+    stack = [str(dir_) for dir_ in dirs]
+    while stack:
+        dir_ = stack.pop()
+        try:
+            entries = list(os.scandir(dir_))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not _is_ignored_dir(entry.name, entry.path, ignore_dirs):
+                    stack.append(entry.path)
+            elif suffixes is None or entry.name.endswith(suffixes):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # pragma: no cover
+                    continue
+                snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def diff_snapshot(old: Snapshot, new: Snapshot) -> T.Set[str]:
+    """
+    Find the paths that are added, removed or modified between two snapshots.
+    """
+    changed = {path for path, fp in new.items() if old.get(path) != fp}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+# see ``man 7 inotify``
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[];}
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@functools.lru_cache(maxsize=1)
+def _load_libc():  # pragma: no cover
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+    # dlopen(NULL) exposes the libc the interpreter is linked with, it is
+    # much faster than ``ctypes.util.find_library``, which runs ``ldconfig``
+    libc = ctypes.CDLL(None, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "inotify is not available in libc")
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_init1.restype = ctypes.c_int
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_add_watch.restype = ctypes.c_int
+    return libc
+
+
+class Inotify:
+    """
+    Recursively watch directories with Linux ``inotify``.
+
+    ``inotify`` is not recursive, so every sub directory has its own watch,
+    the new sub directories are watched as soon as they are created.
+
+    :param dirs: the directories to watch, missing directories are ignored.
+    :param ignore_dirs: directory names or full paths to skip, see
+        :func:`take_snapshot`.
+
+    :raise OSError: if ``inotify`` is not available, or the
+        ``fs.inotify.max_user_watches`` limit is reached.
+    """
+
+    # IN_CLOSE_WRITE instead of IN_MODIFY, we only care about the file
+    # once the editor finishes writing it, IN_MOVED_TO for the editors
+    # that write to a temp file then rename it
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(
+        self,
+        dirs: T.Iterable[Path],
+        ignore_dirs: T.Iterable[str] = DEFAULT_IGNORE_DIRS,
+    ):
+        self._libc = _load_libc()
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:  # pragma: no cover
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._wd_to_dir: T.Dict[int, str] = dict()
+        self.overflowed = False
+        try:
+            for dir_ in dirs:
+                self.add_watch_recursive(str(dir_))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _add_watch(self, dir_: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dir_), self.MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            # the folder is removed before we watch it
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(err, f"inotify_add_watch {dir_!r} failed: {os.strerror(err)}")
+        self._wd_to_dir[wd] = dir_
+        return True
+
+    def add_watch_recursive(self, dir_: str) -> T.List[str]:
+        """
+        Watch the directory and all its sub directories.
+
+        :return: the files already in these directories.
+        """
+        files = list()
+        stack = [dir_]
+        while stack:
+            dir_ = stack.pop()
+            if not self._add_watch(dir_):
+                continue
+            try:
+                entries = list(os.scandir(dir_))
+            except (FileNotFoundError, NotADirectoryError):  # pragma: no cover
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not _is_ignored_dir(entry.name, entry.path, self.ignore_dirs):
+                        stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+        return files
+
+    def read_events(
+        self,
+        timeout: T.Optional[float] = None,
+    ) -> T.Optional[T.Set[str]]:
+        """
+        Wait up to ``timeout`` seconds for events (forever if None) and
+        return the changed paths. If the kernel queue overflowed, the
+        ``overflowed`` flag is set and the caller should rescan everything.
+
+        :return: None if no event shows up in time. Note that the set can be
+            empty, for example when only a folder is created.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return None
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:  # pragma: no cover
+                    self.overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._wd_to_dir.pop(wd, None)
+                    continue
+                dir_ = self._wd_to_dir.get(wd)
+                if dir_ is None:  # pragma: no cover
+                    continue
+                path = os.path.join(dir_, name)
+                if mask & IN_ISDIR:
+                    # files could be created in the new folder before we
+                    # watch it, report them as changed
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not _is_ignored_dir(
+                        name, path, self.ignore_dirs
+                    ):
+                        changed.update(self.add_watch_recursive(path))
+                    continue
+                changed.add(path)
+        return changed
+
+
+def _filter_paths(
+    paths: T.Iterable[str],
+    suffixes: T.Optional[T.Tuple[str, ...]],
+) -> T.Set[str]:
+    if suffixes is None:
+        return set(paths)
+    return {path for path in paths if path.endswith(suffixes)}
+
+
+def _iter_inotify_changes(
+    inotify: Inotify,
+    dirs: T.List[Path],
+    suffixes: T.Optional[T.Iterable[str]],
+    ignore_dirs: T.Iterable[str],
+    debounce: float,
+) -> T.Iterable[T.Set[str]]:
+    if suffixes is not None:
+        suffixes = tuple(suffixes)
+    with inotify:
+        while True:
+            changed = inotify.read_events(timeout=None)
+            while True:
+                more_changed = inotify.read_events(timeout=debounce)
+                if more_changed is None:
+                    break
+                changed.update(more_changed)
+            if inotify.overflowed:  # pragma: no cover
+                inotify.overflowed = False
+                changed.update(take_snapshot(dirs, suffixes, ignore_dirs))
+            changed = _filter_paths(changed, suffixes)
+            if changed:
+                yield changed
+
+
+def iter_changes(
+    dirs: T.Iterable[Path],
+    suffixes: T.Optional[T.Iterable[str]] = None,
+    ignore_dirs: T.Iterable[str] = DEFAULT_IGNORE_DIRS,
+    interval: float = 0.3,
+    debounce: float = 0.2,
+    use_inotify: T.Optional[bool] = None,
+) -> T.Iterable[T.Set[str]]:
+    """
+    Keep watching the directories and yield the set of changed paths.
+
+    A burst of changes, for example an editor writing multiple files on save,
+    is merged into one batch: we wait until no new change shows up within
+    ``debounce`` seconds.
+
+    The changes made while the consumer processes a batch, for example a
+    file saved during a rebuild, are yielded in the next batch. So the
+    folders that the consumer itself writes to, for example the generated
+    API docs of a doc build, must be in ``ignore_dirs``, otherwise every
+    batch triggers another one.
+
+    :param ignore_dirs: directory names or full paths to skip, see
+        :func:`take_snapshot`.
+    :param interval: the polling interval, not used by ``inotify``.
+    :param use_inotify: True to require ``inotify``, False to always poll,
+        None to use ``inotify`` if available and fall back to polling.
+    """
+    dirs = list(dirs)
+    if use_inotify is not False:
+        try:
+            inotify = Inotify(dirs, ignore_dirs)
+        except OSError:
+            if use_inotify:
+                raise
+        else:
+            yield from _iter_inotify_changes(
+                inotify, dirs, suffixes, ignore_dirs, debounce
+            )
+            return
+    snapshot = take_snapshot(dirs, suffixes, ignore_dirs)
+    while True:
+        time.sleep(interval)
+        new_snapshot = take_snapshot(dirs, suffixes, ignore_dirs)
+        changed = diff_snapshot(snapshot, new_snapshot)
+        if not changed:
+            continue
+        while True:
+            time.sleep(debounce)
+            last_snapshot = new_snapshot
+            new_snapshot = take_snapshot(dirs, suffixes, ignore_dirs)
+            more_changed = diff_snapshot(last_snapshot, new_snapshot)
+            if not more_changed:
+                break
+            changed.update(more_changed)
+        yield changed
+        snapshot = new_snapshot
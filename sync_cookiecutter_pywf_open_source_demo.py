@@ -1,7 +1,23 @@
 # -*- coding: utf-8 -*-
 
+"""
+Sync the rendered ``cookiecutter_pywf_open_source_demo-project`` next to this
+repo into this repo.
+
+The sync is incremental like ``rsync``: a file is copied only if its size,
+or its mtime and content hash, is different, the copied file keeps the
+source mtime. The unchanged files are not touched, so the incremental steps
+that run on the destination don't see spurious changes. The destination files
+that no longer exist in the source are deleted.
+"""
+
+import typing as T
+import os
 import shutil
+import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
 from pathpick.api import PathPick
 
 path_pick = PathPick.new(
@@ -31,15 +47,138 @@ repo_name = "cookiecutter_pywf_open_source_demo-project"
 dir_src = dir_project_root.parent / repo_name
 dir_dst = dir_project_root / repo_name
 
-shutil.rmtree(dir_dst, ignore_errors=True)
 
-for path_src in dir_src.rglob("*"):
-    relpath = path_src.relative_to(dir_src)
-    if path_src.is_file():
-        if path_pick.is_match(str(relpath)):
-            path_dst = dir_dst / relpath
+def list_files(dir_root: Path) -> T.Dict[str, os.stat_result]:
+    """
+    List the files that match ``path_pick``, the key is the relative path.
+    """
+    files = dict()
+    for dirpath, dirnames, filenames in os.walk(dir_root):
+        dir_rel = Path(dirpath).relative_to(dir_root)
+        # an excluded folder excludes everything in it (gitignore semantic),
+        # don't walk into it, for example the large ``.venv``
+        dirnames[:] = [
+            dirname
+            for dirname in dirnames
+            if path_pick.is_match(str(dir_rel / dirname))
+        ]
+        for filename in filenames:
+            relpath = str(dir_rel / filename)
+            if path_pick.is_match(relpath):
+                files[relpath] = os.stat(os.path.join(dirpath, filename))
+    return files
+
+
+def get_file_digest(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_same_file(
+    path_src: Path,
+    stat_src: os.stat_result,
+    path_dst: Path,
+    stat_dst: T.Optional[os.stat_result],
+) -> bool:
+    if stat_dst is None or stat_src.st_size != stat_dst.st_size:
+        return False
+    if stat_src.st_mtime_ns == stat_dst.st_mtime_ns:
+        return True
+    return get_file_digest(path_src) == get_file_digest(path_dst)
+
+
+class ShortCopyError(OSError):
+    """
+    The kernel copy stopped before the expected size, for example the source
+    file was truncated, or the file system doesn't really support it.
+    """
+
+
+def _copy_file_range(fd_src: int, fd_dst: int, size: int):
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(fd_src, fd_dst, size - copied)
+        if n == 0:
+            raise ShortCopyError(f"copy_file_range copied {copied} of {size} bytes")
+        copied += n
+
+
+def _sendfile(fd_src: int, fd_dst: int, size: int):
+    offset = 0
+    while offset < size:
+        n = os.sendfile(fd_dst, fd_src, offset, size - offset)
+        if n == 0:
+            raise ShortCopyError(f"sendfile copied {offset} of {size} bytes")
+        offset += n
+
+
+def copy_file(path_src: Path, path_dst: Path, stat_src: os.stat_result):
+    """
+    Copy the file content in the kernel with ``copy_file_range`` or
+    ``sendfile`` when available, then set the source mode and mtime. It writes
+    to a temp file then renames it, so the destination is never half written.
+    A failed or short kernel copy falls back to the next method, and finally
+    to :func:`shutil.copyfileobj`.
+    """
+    path_dst.parent.mkdir(parents=True, exist_ok=True)
+    path_tmp = path_dst.with_name(f".{path_dst.name}.tmp")
+    with open(path_src, "rb") as f_src, open(path_tmp, "wb") as f_dst:
+        fd_src, fd_dst = f_src.fileno(), f_dst.fileno()
+        for copy_func in [_copy_file_range, _sendfile]:
             try:
-                path_dst.write_bytes(path_src.read_bytes())
-            except FileNotFoundError:
-                path_dst.parent.mkdir(parents=True, exist_ok=True)
-                path_dst.write_bytes(path_src.read_bytes())
+                copy_func(fd_src, fd_dst, stat_src.st_size)
+                break
+            # the function is not available on this platform or file system,
+            # or it stopped early, start over with the next one
+            except (AttributeError, OSError):
+                os.lseek(fd_src, 0, os.SEEK_SET)
+                os.lseek(fd_dst, 0, os.SEEK_SET)
+                os.ftruncate(fd_dst, 0)
+        else:
+            shutil.copyfileobj(f_src, f_dst)
+    os.chmod(path_tmp, stat_src.st_mode & 0o777)
+    os.utime(path_tmp, ns=(stat_src.st_atime_ns, stat_src.st_mtime_ns))
+    os.replace(path_tmp, path_dst)
+
+
+def sync(
+    dir_src: Path,
+    dir_dst: Path,
+    max_workers: int = 8,
+) -> T.Tuple[int, int, int]:
+    """
+    :return: the number of copied, deleted and unchanged files.
+    """
+    src_files = list_files(dir_src)
+    dst_files = list_files(dir_dst) if dir_dst.exists() else dict()
+
+    def sync_file(relpath: str) -> bool:
+        path_src, path_dst = dir_src / relpath, dir_dst / relpath
+        stat_src = src_files[relpath]
+        if is_same_file(path_src, stat_src, path_dst, dst_files.get(relpath)):
+            return False
+        copy_file(path_src, path_dst, stat_src)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        copied = sum(executor.map(sync_file, src_files))
+
+    deleted = 0
+    for relpath in dst_files.keys() - src_files.keys():
+        path_dst = dir_dst / relpath
+        path_dst.unlink()
+        deleted += 1
+        # remove the parent folders that become empty
+        for dir_parent in path_dst.parents:
+            if dir_parent == dir_dst or any(dir_parent.iterdir()):
+                break
+            dir_parent.rmdir()
+    return copied, deleted, len(src_files) - copied
+
+
+if __name__ == "__main__":
+    copied, deleted, unchanged = sync(dir_src, dir_dst)
+    print(f"copied {copied}, deleted {deleted}, unchanged {unchanged} files")
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+from pywf_open_source.build_cache import (
+    iter_dist_source_files,
+    get_dist_source_digest,
+    DistCache,
+)
+
+toml_data = {
+    "project": {
+        "name": "my_package",
+        "readme": "README.rst",
+        "license-files": ["LICENSE.txt"],
+    },
+    "tool": {
+        "poetry": {
+            "packages": [{"include": "my_package", "from": "."}],
+            "exclude": ["my_package/tests/*", "**/*.pyc"],
+        },
+    },
+}
+
+
+def make_project(dir_root):
+    for relpath in [
+        "pyproject.toml",
+        "README.rst",
+        "LICENSE.txt",
+        "Makefile",
+        "my_package/__init__.py",
+        "my_package/api.py",
+        "my_package/api.pyc",
+        "my_package/tests/helper.py",
+        "my_package/__pycache__/api.cpython-311.pyc",
+        "tests/test_api.py",
+    ]:
+        path = dir_root.joinpath(relpath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relpath)
+
+
+def test_iter_dist_source_files(tmp_path):
+    make_project(tmp_path)
+    relpaths = [
+        path.relative_to(tmp_path).as_posix()
+        for path in iter_dist_source_files(tmp_path, toml_data)
+    ]
+    assert relpaths == [
+        "LICENSE.txt",
+        "README.rst",
+        "my_package/__init__.py",
+        "my_package/api.py",
+        "pyproject.toml",
+    ]
+
+
+def test_get_dist_source_digest(tmp_path):
+    make_project(tmp_path)
+    digest = get_dist_source_digest(tmp_path, toml_data)
+    assert get_dist_source_digest(tmp_path, toml_data, salt="poetry") != digest
+
+    # files that don't go into the distribution don't change the digest
+    tmp_path.joinpath("Makefile").write_text("changed")
+    tmp_path.joinpath("my_package/tests/helper.py").write_text("changed")
+    assert get_dist_source_digest(tmp_path, toml_data) == digest
+
+    tmp_path.joinpath("my_package/api.py").write_text("changed")
+    assert get_dist_source_digest(tmp_path, toml_data) != digest
+
+
+def test_dist_cache(tmp_path):
+    dir_dist = tmp_path / "dist"
+    dir_dist.mkdir()
+    dir_dist.joinpath("my_package-0.1.1-py3-none-any.whl").write_bytes(b"whl")
+    dir_dist.joinpath("my_package-0.1.1.tar.gz").write_bytes(b"sdist")
+
+    cache = DistCache(dir_cache=tmp_path / "cache")
+    assert cache.has("abc") is False
+    cache.save("abc", dir_dist)
+    assert cache.has("abc") is True
+
+    dir_dist.joinpath("my_package-0.1.0.tar.gz").write_bytes(b"old")
+    paths = cache.restore("abc", dir_dist)
+    assert sorted(path.name for path in dir_dist.iterdir()) == [
+        path.name for path in paths
+    ]
+    assert dir_dist.joinpath("my_package-0.1.1.tar.gz").read_bytes() == b"sdist"
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.build_cache",
+        preview=False,
+    )
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+
+from pywf_open_source.vendor.build_dist import (
+    get_venv_python,
+    install_dynamic_build_requires,
+    build_dist_with_pep517_backend,
+)
+
+# an in-tree build backend, it records the order of the hook calls
+BACKEND = """
+import os, json
+
+def _record(name):
+    with open("calls.txt", "a") as f:
+        f.write(name + "\\n")
+
+def get_requires_for_build_wheel(config_settings=None):
+    _record("get_requires_for_build_wheel")
+    return json.loads(os.environ.get("DYNAMIC_REQUIRES", "[]"))
+
+def build_sdist(sdist_directory, config_settings=None):
+    _record("build_sdist")
+    print("noise from the backend", end="")
+    name = "my_package-0.1.0.tar.gz"
+    open(os.path.join(sdist_directory, name), "w").close()
+    return name
+
+def build_wheel(wheel_directory, config_settings=None, metadata_directory=None):
+    _record("build_wheel")
+    name = "my_package-0.1.0-py3-none-any.whl"
+    open(os.path.join(wheel_directory, name), "w").close()
+    return name
+"""
+
+
+def make_project(dir_root):
+    dir_backend = dir_root / "_backend"
+    dir_backend.mkdir(parents=True)
+    dir_backend.joinpath("my_backend.py").write_text(BACKEND)
+    return dir_root
+
+
+def make_env(dir_env):
+    # a fake build environment that runs the current python
+    path_python = get_venv_python(dir_env)
+    path_python.parent.mkdir(parents=True)
+    os.symlink(sys.executable, path_python)
+    dir_env.joinpath(".complete").write_text("")
+    return dir_env
+
+
+def test_build_dist_with_pep517_backend(tmp_path):
+    dir_root = make_project(tmp_path / "project")
+    filenames = build_dist_with_pep517_backend(
+        dir_project_root=dir_root,
+        path_bin_python=sys.executable,
+        build_backend="my_backend",
+        backend_path=["_backend"],
+        log_func=lambda msg: None,
+        verbose=False,
+    )
+    assert filenames == [
+        "my_package-0.1.0.tar.gz",
+        "my_package-0.1.0-py3-none-any.whl",
+    ]
+    assert sorted(p.name for p in dir_root.joinpath("dist").iterdir()) == sorted(
+        filenames
+    )
+    # one after another, never in parallel in the same source tree
+    assert dir_root.joinpath("calls.txt").read_text().split() == [
+        "build_sdist",
+        "build_wheel",
+    ]
+
+
+def test_install_dynamic_build_requires(tmp_path, monkeypatch):
+    dir_root = make_project(tmp_path / "project")
+    dir_env = make_env(tmp_path / "env")
+    kwargs = dict(
+        dir_env=dir_env,
+        dir_project_root=dir_root,
+        build_backend="my_backend",
+        backend_path=["_backend"],
+        log_func=lambda msg: None,
+        verbose=False,
+    )
+
+    # the missing get_requires_for_build_sdist hook defaults to [], the
+    # empty marker of an older version means nothing is installed yet
+    assert install_dynamic_build_requires(**kwargs) == []
+
+    # pytest is already installed, pip doesn't need the network
+    monkeypatch.setenv("DYNAMIC_REQUIRES", json.dumps(["pytest"]))
+    assert install_dynamic_build_requires(**kwargs) == ["pytest"]
+    assert json.loads(dir_env.joinpath(".complete").read_text()) == ["pytest"]
+    assert install_dynamic_build_requires(**kwargs) == ["pytest"]
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.vendor.build_dist",
+        preview=False,
+    )
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import json
+from urllib.request import urlopen
+
+from pywf_open_source.doc_server import (
+    LIVERELOAD_PATH,
+    inject_livereload_script,
+    LiveReloadServer,
+)
+
+
+def test_inject_livereload_script():
+    html = inject_livereload_script(b"<html><body>hello</body></html>")
+    assert html.startswith(b"<html><body>hello\n<script>")
+    assert html.endswith(b"</script>\n</body></html>")
+    assert inject_livereload_script(b"hello").startswith(b"hello")
+
+
+def test_live_reload_server(tmp_path):
+    tmp_path.joinpath("index.html").write_text("<body>hello</body>")
+    tmp_path.joinpath("style.css").write_text("body {}")
+
+    server = LiveReloadServer(directory=tmp_path, port=0)
+    server.start()
+    try:
+        with urlopen(server.url) as res:
+            html = res.read()
+            assert b"hello" in html
+            assert LIVERELOAD_PATH.encode("utf-8") in html
+        with urlopen(server.url + "style.css") as res:
+            assert res.read() == b"body {}"
+
+        with urlopen(server.url + LIVERELOAD_PATH[1:]) as res:
+            assert json.loads(res.read())["version"] == 0
+        server.notify_reload()
+        with urlopen(server.url + LIVERELOAD_PATH[1:]) as res:
+            assert json.loads(res.read())["version"] == 1
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.doc_server",
+        preview=False,
+    )
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from pywf_open_source.paths import dir_project_root
+from pywf_open_source.fleet import (
+    discover_projects,
+    FleetStatus,
+    run_fleet,
+    format_summary_table,
+)
+
+
+def make_project(dir_root: Path, name: str, valid: bool = True) -> Path:
+    dir_project = dir_root.joinpath(name)
+    dir_project.joinpath("pywf_open_source").mkdir(parents=True)
+    dir_project.joinpath("pyproject.toml").write_text(
+        dir_project_root.joinpath("pyproject.toml").read_text()
+    )
+    if valid:
+        dir_project.joinpath("pywf_open_source", "__init__.py").write_text("")
+    return dir_project
+
+
+def test_discover_projects(tmp_path):
+    p1 = make_project(tmp_path, "p1")
+    p2 = make_project(tmp_path.joinpath("group"), "p2")
+    make_project(tmp_path.joinpath("a", "b", "c"), "too_deep")
+    make_project(p1, "nested")
+    make_project(tmp_path.joinpath(".venv"), "ignored")
+    assert discover_projects(tmp_path, max_depth=2) == [p2, p1]
+    assert discover_projects(p1) == [p1]
+
+
+def test_run_fleet(tmp_path):
+    p1 = make_project(tmp_path, "p1")
+    p2 = make_project(tmp_path, "p2", valid=False)
+    p3 = make_project(tmp_path, "p3")
+
+    results = run_fleet(
+        [p1, p2, p3],
+        "edit_github_repo_metadata",
+        kwargs=dict(real_run=False),
+        max_workers=3,
+    )
+    assert [r.status for r in results] == [
+        FleetStatus.succeeded,
+        FleetStatus.failed,
+        FleetStatus.succeeded,
+    ]
+    assert results[0].return_value is False
+    assert "__init__.py" in results[1].message
+
+    results = run_fleet([p1, p3], lambda pywf: pywf.package_name)
+    assert [r.return_value for r in results] == ["pywf_open_source"] * 2
+
+    table = format_summary_table(results)
+    assert str(p3) in table
+    assert "2 projects, 2 succeeded, 0 failed" in table
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.fleet",
+        preview=False,
+    )
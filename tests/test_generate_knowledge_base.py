@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test ``genai/generate_knowledge_base.py`` with the ``docpack`` pipeline
+replaced by a fake one, which writes the source file content as the document.
+"""
+
+import os
+import sys
+import json
+import types
+import importlib.util
+from pathlib import Path
+
+import pytest
+from pathpick.api import PathPick
+
+from pywf_open_source.paths import dir_project_root
+
+
+class FakeField:
+    def __init__(self, default_factory):
+        self.default_factory = default_factory
+
+
+class FakeGitHubPipeline:
+    """
+    The fake ``docpack.api.GitHubPipeline``, it records the fetched files.
+    """
+
+    fetched = list()
+
+    def __init__(self, **kwargs):
+        for key, value in type(self).__dict__.items():
+            if isinstance(value, FakeField):
+                setattr(self, key, value.default_factory())
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def fetch(self):
+        path_pick = PathPick.new(include=self.include, exclude=self.exclude)
+        for path in sorted(self.dir_repo.glob("**/*.*")):
+            relpath = path.relative_to(self.dir_repo).as_posix()
+            if path_pick.is_match(relpath):
+                self.fetched.append(relpath)
+                path_out = self.dir_out.joinpath(relpath.replace("/", "-") + ".txt")
+                path_out.parent.mkdir(parents=True, exist_ok=True)
+                path_out.write_text(f"# {relpath}\n{path.read_text()}")
+                github_file = types.SimpleNamespace(path=relpath)
+                self.post_process_path_out(github_file, path_out)
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    pydantic = types.ModuleType("pydantic")
+    pydantic.Field = FakeField
+    docpack = types.ModuleType("docpack")
+    docpack_api = types.ModuleType("docpack.api")
+    docpack_api.GitHubPipeline = FakeGitHubPipeline
+    monkeypatch.setitem(sys.modules, "pydantic", pydantic)
+    monkeypatch.setitem(sys.modules, "docpack", docpack)
+    monkeypatch.setitem(sys.modules, "docpack.api", docpack_api)
+    spec = importlib.util.spec_from_file_location(
+        "generate_knowledge_base",
+        dir_project_root / "genai" / "generate_knowledge_base.py",
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    dir_repo = tmp_path / "repo"
+    dir_tmp = tmp_path / "tmp"
+    monkeypatch.setattr(module, "dir_project_root", dir_repo)
+    monkeypatch.setattr(module, "dir_tmp", dir_tmp)
+    monkeypatch.setattr(module, "dir_tmp_docs", dir_tmp / "docs")
+    monkeypatch.setattr(module, "path_manifest", dir_tmp / "manifest.json")
+    monkeypatch.setattr(
+        module, "path_knowledge_base", dir_tmp / "all_in_one_knowledge_base.txt"
+    )
+    monkeypatch.setattr(module, "path_search_index", dir_tmp / "knowledge_base.bm25")
+    monkeypatch.setattr(
+        module,
+        "pipeline_kwargs",
+        dict(
+            dir_repo=dir_repo,
+            include=["src/**/*.py"],
+            exclude=["src/tests/**"],
+            dir_out=dir_tmp / "docs",
+        ),
+    )
+    FakeGitHubPipeline.fetched = list()
+    return module
+
+
+def write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_generate(kb):
+    dir_repo = kb.dir_project_root
+    write(dir_repo / "src" / "a.py", "a = 1")
+    write(dir_repo / "src" / "sub" / "b.py", "b = 1")
+    write(dir_repo / "src" / "tests" / "test_a.py", "excluded")
+    write(dir_repo / "README.rst", "excluded")
+
+    kb.generate()
+    assert FakeGitHubPipeline.fetched == ["src/a.py", "src/sub/b.py"]
+    assert kb.path_knowledge_base.read_text() == (
+        "# src/a.py\na = 1\n# src/sub/b.py\nb = 1"
+    )
+    manifest = json.loads(kb.path_manifest.read_text())
+    assert manifest["config"] == kb.get_config_digest()
+    assert manifest["files"]["src/sub/b.py"]["doc"] == "src-sub-b.py.txt"
+
+    # nothing changed, nothing is fetched or rewritten
+    FakeGitHubPipeline.fetched = list()
+    mtime_ns = kb.path_knowledge_base.stat().st_mtime_ns
+    kb.generate()
+    assert FakeGitHubPipeline.fetched == []
+    assert kb.path_knowledge_base.stat().st_mtime_ns == mtime_ns
+
+    # a new mtime with the same content is not fetched
+    path_a = dir_repo / "src" / "a.py"
+    st = path_a.stat()
+    os.utime(path_a, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    kb.generate()
+    assert FakeGitHubPipeline.fetched == []
+    manifest = json.loads(kb.path_manifest.read_text())
+    assert manifest["files"]["src/a.py"]["mtime_ns"] == st.st_mtime_ns + 10**9
+
+    # changed, added and removed files
+    write(dir_repo / "src" / "sub" / "b.py", "b = 22")
+    write(dir_repo / "src" / "c.py", "c = 1")
+    path_a.unlink()
+    kb.generate(index=True)
+    assert sorted(FakeGitHubPipeline.fetched) == ["src/c.py", "src/sub/b.py"]
+    assert kb.path_knowledge_base.read_text() == (
+        "# src/c.py\nc = 1\n# src/sub/b.py\nb = 22"
+    )
+    assert kb.dir_tmp_docs.joinpath("src-a.py.txt").exists() is False
+    assert sorted(json.loads(kb.path_manifest.read_text())["files"]) == [
+        "src/c.py",
+        "src/sub/b.py",
+    ]
+    assert kb.path_search_index.exists()
+    assert [p.name for p in kb.dir_tmp.iterdir() if p.name.endswith(".tmp")] == []
+
+    # a corrupt manifest or no cache regenerates everything
+    for path in [kb.path_manifest, kb.path_knowledge_base]:
+        path.write_text("{")
+    FakeGitHubPipeline.fetched = list()
+    kb.generate()
+    assert sorted(FakeGitHubPipeline.fetched) == ["src/c.py", "src/sub/b.py"]
+    FakeGitHubPipeline.fetched = list()
+    kb.generate(use_cache=False)
+    assert sorted(FakeGitHubPipeline.fetched) == ["src/c.py", "src/sub/b.py"]
+    assert kb.path_knowledge_base.read_text().startswith("# src/c.py")
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_unit_test
+
+    run_unit_test(__file__)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import time
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pywf_open_source import define_08_saas
+from pywf_open_source.paths import dir_project_root
+from pywf_open_source.define import PyWf
+from pywf_open_source.rate_limit import RateLimitScheduler
+from pywf_open_source.github_client import get_github
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in GitHub API with a primary limit of ``limit`` requests, it
+    rejects the ``reject_at`` th request with 429 and a ``Retry-After`` header,
+    like the secondary rate limit of GitHub.
+    """
+
+    server: "FakeGitHub"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits += 1
+            if self.server.hits == self.server.reject_at:
+                self.server.rejected += 1
+                return self._send(
+                    429,
+                    {"Retry-After": "1"},
+                    {"message": "You have exceeded a secondary rate limit."},
+                )
+            self.server.remaining -= 1
+            headers = {
+                "X-RateLimit-Limit": str(self.server.limit),
+                "X-RateLimit-Remaining": str(self.server.remaining),
+                "X-RateLimit-Reset": str(int(time.time()) + 60),
+            }
+        full_name = self.path.removeprefix("/repos/")
+        data = {"full_name": full_name, "name": full_name.split("/")[-1]}
+        self._send(200, headers, data)
+
+    def _send(self, code: int, headers: dict, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGitHub(ThreadingHTTPServer):
+    def __init__(self, limit: int, reject_at: int):
+        super().__init__(("127.0.0.1", 0), FakeGitHubHandler)
+        self.limit = limit
+        self.reject_at = reject_at
+        self.remaining = limit
+        self.hits = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def provider(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.provider}"
+
+
+@pytest.fixture
+def api():
+    server = FakeGitHub(limit=100, reject_at=5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_pywf(dir_project) -> PyWf:
+    dir_project.joinpath("pywf_open_source").mkdir(parents=True)
+    dir_project.joinpath("pywf_open_source", "__init__.py").write_text("")
+    dir_project.joinpath("pyproject.toml").write_text(
+        dir_project_root.joinpath("pyproject.toml").read_text()
+    )
+    return PyWf.from_pyproject_toml(dir_project / "pyproject.toml")
+
+
+def test_get_github():
+    scheduler = RateLimitScheduler()
+    gh = get_github("token-1", scheduler)
+    assert get_github("token-1", scheduler) is gh
+    assert get_github("token-2", scheduler) is not gh
+    assert get_github("token-1", RateLimitScheduler()) is not gh
+
+
+def test_fleet_share_github_budget(api, tmp_path, monkeypatch):
+    scheduler = RateLimitScheduler(rates={api.provider: (20, 1)})
+    monkeypatch.setattr(define_08_saas, "default_scheduler", scheduler)
+    monkeypatch.setattr(PyWf, "github_token", "my-token")
+    monkeypatch.setattr(PyWf, "github_api_url", api.url)
+    pywf_list = [make_pywf(tmp_path / f"project{i}") for i in range(3)]
+    n_request = 4
+
+    # all projects share one client and one budget
+    assert pywf_list[1].gh is pywf_list[0].gh
+
+    def get_repos(pywf: PyWf):
+        return [
+            pywf.gh.get_repo(f"owner/{pywf.dir_project_root.name}").name
+            for _ in range(n_request)
+        ]
+
+    st = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(pywf_list)) as executor:
+        results = list(executor.map(get_repos, pywf_list))
+    elapsed = time.perf_counter() - st
+    assert results == [[f"project{i}"] * n_request for i in range(3)]
+
+    # the 429 response is retried by PyGithub after the Retry-After,
+    # the scheduler paces all projects at the rate of the provider
+    total = len(pywf_list) * n_request
+    assert api.rejected == 1
+    assert api.hits == total + 1
+    assert elapsed >= (total - 1) / 20
+    metrics = scheduler.get_metrics()[api.provider]
+    assert metrics.requests == total
+    assert metrics.throttled > 0
+    assert metrics.rate_limited == 1
+    assert metrics.limit == api.limit
+    # the headers of a response are fed before the next request
+    assert api.remaining <= metrics.remaining < api.limit
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.github_client",
+        preview=False,
+    )
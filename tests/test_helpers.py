@@ -4,7 +4,11 @@ import pytest
 
 from pywf_open_source.helpers import (
     sha256_of_bytes,
+    sha256_of_file,
+    get_sha256sums,
     bump_version,
+    set_toml_version,
+    write_text_atomic,
 )
 
 
@@ -12,6 +16,13 @@ def test_sha256_of_bytes():
     _ = sha256_of_bytes(b"hello world")
 
 
+def test_sha256_of_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"hello world")
+    assert sha256_of_file(path, chunk_size=4) == sha256_of_bytes(b"hello world")
+    assert get_sha256sums([path]) == f"{sha256_of_bytes(b'hello world')}  file.txt\n"
+
+
 def test_bump_version():
     assert bump_version("1.2.3", major=True) == "2.0.0"
     assert bump_version("1.2.3", minor=True) == "1.3.0"
@@ -21,6 +32,52 @@ def test_bump_version():
         bump_version("1.2.3", major=True, minor=True, patch=True)
 
 
+PYPROJECT_TOML = """\
+[project]
+name = "my_package"
+# the version
+version = "0.1.4"  # bumped by pywf
+dependencies = [
+    "version = '1.0.0'",
+]
+
+[tool.poetry]
+version = '0.1.4'
+
+[tool.other]
+version = "9.9.9"
+"""
+
+
+def test_set_toml_version():
+    content = set_toml_version(PYPROJECT_TOML, "0.2.0")
+    assert content == (
+        PYPROJECT_TOML.replace('"0.1.4"', '"0.2.0"').replace("'0.1.4'", "'0.2.0'")
+    )
+
+    content = set_toml_version(PYPROJECT_TOML.replace("\n", "\r\n"), "0.2.0")
+    assert '\nversion = "0.2.0"  # bumped by pywf\r\n' in content
+    assert content.count("\r\n") == PYPROJECT_TOML.count("\n")
+
+    with pytest.raises(ValueError):
+        set_toml_version('[project]\ndynamic = ["version"]\n', "0.2.0")
+
+
+def test_write_text_atomic(tmp_path):
+    path1 = tmp_path / "a.txt"
+    path2 = tmp_path / "b.txt"
+    path1.write_text("a")
+    write_text_atomic({path1: "a1", path2: "b1"})
+    assert path1.read_text() == "a1"
+    assert path2.read_text() == "b1"
+
+    # the second file can't be written, the first one is not changed
+    with pytest.raises(OSError):
+        write_text_atomic({path1: "a2", tmp_path / "missing" / "c.txt": "c"})
+    assert path1.read_text() == "a1"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "b.txt"]
+
+
 if __name__ == "__main__":
     from pywf_open_source.tests import run_cov_test
 
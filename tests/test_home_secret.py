@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+
+import pytest
+
+from pywf_open_source.vendor import home_secret
+from pywf_open_source.vendor.home_secret import HomeSecret, walk, gen_enum_code
+
+DATA = {
+    "providers": {
+        "github": {
+            "description": "GitHub",
+            "accounts": {
+                "main": {
+                    "admin_email": "admin@example.com",
+                    "token": "...",
+                },
+            },
+        },
+        "aws": {
+            "accounts": {
+                "dev": {"region": "us-east-1"},
+            },
+        },
+    },
+    "version": 1,
+}
+
+
+def write_secret(path, data: dict):
+    st = path.stat() if path.exists() else None
+    path.write_text(json.dumps(data))
+    if st is not None:
+        # make sure the mtime changes even on a coarse clock
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def path_secret(tmp_path, monkeypatch):
+    monkeypatch.setattr(home_secret, "IS_SYNC", False)
+    path = tmp_path / "home_secret.json"
+    write_secret(path, DATA)
+    return path
+
+
+def test_reload(path_secret):
+    hs = HomeSecret(path=path_secret, check_interval=0)
+    token = hs.t("providers.github.accounts.main.admin_email")
+    assert token.v == "admin@example.com"
+    assert hs.v("version") == 1
+    signature = hs._state.signature
+
+    # the mtime and size changed, the file is parsed again
+    data = json.loads(json.dumps(DATA))
+    data["providers"]["github"]["accounts"]["main"]["admin_email"] = "a@b.com"
+    write_secret(path_secret, data)
+    assert token.v == "a@b.com"
+    assert hs._state.signature != signature
+
+    # the same signature is not parsed again
+    state_data = hs._state.data
+    assert hs.v("version") == 1
+    assert hs._state.data is state_data
+
+
+def test_check_interval(path_secret, monkeypatch):
+    hs = HomeSecret(path=path_secret, check_interval=3600)
+    assert hs.v("version") == 1
+
+    # the file is not checked again within the interval
+    def stat(*args, **kwargs):  # pragma: no cover
+        raise AssertionError("unexpected stat")
+
+    monkeypatch.setattr(home_secret, "_get_signature", stat)
+    data = dict(DATA, version=2)
+    path_secret.write_text(json.dumps(data))
+    assert hs.v("version") == 1
+    monkeypatch.undo()
+
+    # the interval is over
+    hs._state.checked_at -= 3600
+    write_secret(path_secret, data)
+    assert hs.v("version") == 2
+
+
+def test_lazy(path_secret):
+    hs = HomeSecret(path=path_secret, lazy=True, check_interval=0)
+    assert hs._state.compiled is None
+    assert hs.v("version") == 1
+    assert hs._state.compiled == {"version"}
+    assert "providers.github.accounts" not in hs._state.index
+
+    # only the accessed provider is compiled
+    assert hs.v("providers.github.accounts.main.admin_email") == "admin@example.com"
+    assert hs._state.compiled == {"version", "providers.github"}
+    assert "providers.github.accounts.main" in hs._state.index
+    assert "providers.aws.accounts" not in hs._state.index
+
+    assert hs.v("providers.aws.accounts.dev.region") == "us-east-1"
+    assert hs._state.compiled == {"version", "providers.github", "providers.aws"}
+
+    # a reload resets the compiled groups
+    write_secret(path_secret, DATA)
+    assert hs.v("version") == 1
+    assert hs._state.compiled == {"version"}
+
+
+def test_key_error(path_secret, tmp_path):
+    for lazy in [False, True]:
+        hs = HomeSecret(path=path_secret, lazy=lazy, check_interval=0)
+        with pytest.raises(KeyError) as e:
+            hs.v("providers.github.accounts.other.admin_email")
+        assert "'providers.github.accounts.other' not found" in str(e.value)
+        with pytest.raises(KeyError) as e:
+            hs.t("providers.gitlab.accounts").v
+        assert "'providers.gitlab' not found" in str(e.value)
+
+    hs = HomeSecret(path=tmp_path / "not_exists.json")
+    with pytest.raises(FileNotFoundError) as e:
+        hs.v("version")
+    assert "Secret file not found" in str(e.value)
+
+
+def test_walk():
+    assert list(walk(DATA)) == [
+        ("providers.github.accounts.main.admin_email", "admin@example.com"),
+        ("providers.aws.accounts.dev.region", "us-east-1"),
+        ("version", 1),
+    ]
+    assert list(walk({})) == []
+
+    # a deep structure doesn't hit the recursion limit
+    dct = node = dict()
+    for _ in range(5000):
+        node["a"] = dict()
+        node = node["a"]
+    node["value"] = 1
+    ((path, value),) = walk(dct)
+    assert path == ".".join(["a"] * 5000 + ["value"])
+    assert value == 1
+
+
+def test_gen_enum_code(path_secret, tmp_path):
+    hs = HomeSecret(path=path_secret, check_interval=0)
+    path_enum = tmp_path / "home_secret_enum.py"
+    assert gen_enum_code(path_enum=path_enum, secret=hs) is True
+    content = path_enum.read_text()
+    assert 'github__accounts__main__admin_email = hs.t("providers.github.accounts.main.admin_email")' in content
+    assert 'version = hs.t("version")' in content
+    compile(content, str(path_enum), "exec")
+
+    # the same paths, the file is not rewritten
+    mtime_ns = path_enum.stat().st_mtime_ns
+    data = json.loads(json.dumps(DATA))
+    data["version"] = 2
+    write_secret(path_secret, data)
+    assert gen_enum_code(path_enum=path_enum, secret=hs) is False
+    assert path_enum.stat().st_mtime_ns == mtime_ns
+    assert path_enum.read_text() == content
+
+    # a new path, the file is rewritten
+    data["providers"]["aws"]["accounts"]["dev"]["account_id"] = "123"
+    write_secret(path_secret, data)
+    assert gen_enum_code(path_enum=path_enum, secret=hs) is True
+    assert 'aws__accounts__dev__account_id = hs.t("providers.aws.accounts.dev.account_id")' in path_enum.read_text()
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.vendor.home_secret",
+        preview=False,
+    )
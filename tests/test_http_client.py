@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from pywf_open_source.http_client import (
+    get_backoff_seconds,
+    ETagCache,
+    HttpClient,
+)
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in SaaS API, ``/etag`` supports conditional request,
+    ``/flaky`` returns 503 on the first request, ``/post`` echoes the body.
+    """
+
+    server: "FakeApi"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+            hits = self.server.hits[self.path]
+            self.server.ports.add(self.client_address[1])
+        if self.path == "/etag":
+            etag = f'"v{self.server.version}"'
+            if self.headers["If-None-Match"] == etag:
+                return self._send(304, b"", {"ETag": etag})
+            body = json.dumps({"version": self.server.version}).encode()
+            return self._send(200, body, {"ETag": etag})
+        if self.path == "/flaky":
+            if hits == 1:
+                return self._send(503, b"")
+            return self._send(200, b"ok")
+        return self._send(404, b"")
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self._send(503 if self.path == "/flaky" else 201, body)
+
+    def _send(self, code: int, body: bytes, headers: dict = None):
+        self.send_response(code)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if code != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeApi(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeApiHandler)
+        self.version = 1
+        self.hits = dict()
+        self.ports = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def api():
+    server = FakeApi()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_backoff_seconds():
+    for attempt in range(1, 10):
+        assert 0 <= get_backoff_seconds(attempt, 0.5, 4) <= min(4, 0.5 * 2 ** (attempt - 1))
+
+
+def test_etag_cache_key():
+    key1 = ETagCache.get_key("https://a.com", {"Authorization": "Token a"})
+    key2 = ETagCache.get_key("https://a.com", {"authorization": "Token a"})
+    key3 = ETagCache.get_key("https://a.com", {"Authorization": "Token b"})
+    assert key1 == key2
+    assert key1 != key3
+
+
+def test_etag_cache(tmp_path, api):
+    client = HttpClient(dir_cache=tmp_path, backoff=0)
+    url = f"{api.url}/etag"
+
+    assert client.get(url).json() == {"version": 1}
+    # the second request is answered with 304 and served from the cache
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json() == {"version": 1}
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # the resource changed
+    api.version = 2
+    assert client.get(url).json() == {"version": 2}
+    assert client.get(url).json() == {"version": 2}
+
+    # a different token doesn't share the cache entry
+    assert client.get(url, headers={"Authorization": "Token a"}).json() == {
+        "version": 2
+    }
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # all requests go through the same keep-alive connection
+    assert api.hits["/etag"] == 5
+    assert len(api.ports) == 1
+    client.close()
+
+
+def test_cache_disabled(tmp_path, api):
+    client = HttpClient(dir_cache=tmp_path)
+    client.get(f"{api.url}/etag", cache=False)
+    assert list(tmp_path.iterdir()) == []
+    client = HttpClient()
+    client.get(f"{api.url}/etag")
+    client.get(f"{api.url}/etag")
+    assert api.hits["/etag"] == 3
+
+
+def test_retry(api):
+    client = HttpClient(backoff=0)
+    response = client.get(f"{api.url}/flaky")
+    assert response.status_code == 200
+    assert api.hits["/flaky"] == 2
+
+    # POST is not retried by default
+    response = client.post(f"{api.url}/flaky", json={"a": 1})
+    assert response.status_code == 503
+    assert api.hits["/flaky"] == 3
+    response = client.post(f"{api.url}/flaky", json={"a": 1}, retry=True)
+    assert response.status_code == 503
+    assert api.hits["/flaky"] == 3 + 1 + client.max_retries
+
+    response = client.post(f"{api.url}/post", json={"a": 1})
+    assert response.status_code == 201
+    assert response.json() == {"a": 1}
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.http_client",
+        preview=False,
+    )
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from pywf_open_source.import_graph import (
+    get_module_name,
+    is_test_file,
+    parse_imports,
+    ImportGraph,
+)
+
+
+def test_get_module_name(tmp_path):
+    assert get_module_name(tmp_path / "pkg" / "sub" / "__init__.py", tmp_path) == "pkg.sub"
+    assert get_module_name(tmp_path / "tests" / "test_a.py", tmp_path) == "tests.test_a"
+    assert is_test_file("tests/test_a.py") is True
+    assert is_test_file("tests/a_test.py") is True
+    assert is_test_file("tests/conftest.py") is False
+
+
+def test_parse_imports():
+    source = "\n".join(
+        [
+            "import os, a.b as ab",
+            "from . import c",
+            "from .d import e",
+            "from .. import f",
+            "from ... import g",
+            "from x import *",
+            "def func():",
+            "    from y import z",
+        ]
+    )
+    assert parse_imports(source, module="pkg.sub.mod") == {
+        "os",
+        "a.b",
+        "pkg.sub",
+        "pkg.sub.c",
+        "pkg.sub.d",
+        "pkg.sub.d.e",
+        "pkg",
+        "pkg.f",
+        "x",
+        "y",
+        "y.z",
+    }
+    assert parse_imports("from . import c", module="pkg", is_package=True) == {
+        "pkg",
+        "pkg.c",
+    }
+
+
+def test_import_graph(tmp_path):
+    dir_pkg = tmp_path / "pkg"
+    dir_tests = tmp_path / "tests"
+    dir_sub_tests = dir_tests / "sub"
+    dir_sub_tests.mkdir(parents=True)
+    dir_pkg.mkdir()
+    dir_pkg.joinpath("__init__.py").write_text("")
+    dir_pkg.joinpath("a.py").write_text("import requests")
+    dir_pkg.joinpath("b.py").write_text("from .a import func")
+    dir_pkg.joinpath("c.py").write_text("x = (")  # syntax error
+    dir_tests.joinpath("helper.py").write_text("from pkg.c import x")
+    dir_tests.joinpath("test_a.py").write_text("from pkg import a")
+    dir_tests.joinpath("test_b.py").write_text("import pkg.b")
+    dir_tests.joinpath("test_c.py").write_text("import helper")
+    dir_sub_tests.joinpath("conftest.py").write_text("import pkg.c")
+    dir_sub_tests.joinpath("test_d.py").write_text("")
+
+    graph = ImportGraph(dir_root=tmp_path, dirs=[dir_pkg, dir_tests])
+    assert len(graph.refresh()) == 10
+    assert graph.refresh() == set()
+    assert len(graph.test_files) == 4
+
+    def affected(*relpaths):
+        paths = [str(tmp_path / relpath) for relpath in relpaths]
+        return [
+            Path(path).relative_to(tmp_path).as_posix()
+            for path in graph.get_affected_tests(paths)
+        ]
+
+    assert affected("pkg/a.py") == ["tests/test_a.py", "tests/test_b.py"]
+    assert affected("pkg/b.py") == ["tests/test_b.py"]
+    assert affected("pkg/c.py") == ["tests/sub/test_d.py", "tests/test_c.py"]
+    assert affected("tests/test_a.py") == ["tests/test_a.py"]
+    assert affected("tests/sub/conftest.py") == ["tests/sub/test_d.py"]
+    assert len(affected("pkg/__init__.py")) == 4
+    assert "requests" in graph.get_external_imports()
+    assert "helper" not in graph.get_external_imports()
+
+    # a removed module still affects the modules importing it
+    dir_pkg.joinpath("a.py").unlink()
+    assert graph.refresh() == {str(dir_pkg / "a.py")}
+    assert affected("pkg/a.py") == ["tests/test_a.py", "tests/test_b.py"]
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.import_graph",
+        preview=False,
+    )
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+
+from pywf_open_source.vendor.jsonutils import (
+    strip_comment_line_with_symbol,
+    iter_strip_comments,
+    strip_comments,
+    json_loads,
+    json_load,
+)
+
+TEXT = r"""# leading comment
+{
+    "url": "http://example.com", // the // in the string is kept
+    "glob": "/* not a comment */",
+    "hash": "# not a comment",
+    /* a block
+    comment */
+    "quote": "say \"hi\" // still a string",
+    "backslash": "C:\\", # the string ends before this comment
+    "path": "a/b" /* inline */
+}
+"""
+
+EXPECTED = {
+    "url": "http://example.com",
+    "glob": "/* not a comment */",
+    "hash": "# not a comment",
+    "quote": 'say "hi" // still a string',
+    "backslash": "C:\\",
+    "path": "a/b",
+}
+
+
+def test_strip_comments():
+    text = strip_comments(TEXT)
+    assert json.loads(text) == EXPECTED
+    # the block comment line breaks are kept for the json error line number
+    assert text.count("\n") == TEXT.count("\n")
+    # without line comment symbols only the block comments are removed
+    text = '{"a": 1} // comment /* block */'
+    assert strip_comments(text, comment_symbols=[]) == '{"a": 1} // comment '
+    assert json_loads(TEXT) == EXPECTED
+    with pytest.raises(json.JSONDecodeError):
+        json_loads(TEXT, ignore_comments=False)
+
+
+def split(text: str, size: int):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1024])
+def test_iter_strip_comments(size):
+    assert "".join(iter_strip_comments(split(TEXT, size))) == strip_comments(TEXT)
+    assert json_load(io.StringIO(TEXT), chunk_size=size) == EXPECTED
+
+
+def test_iter_strip_comments_boundary():
+    # the tokens that are split by the chunk boundary
+    cases = [
+        (["/", "/ comment\n1"], "\n1"),
+        (["/", "* comment *", "/1"], "1"),
+        (['"a\\', '"b"'], '"a\\"b"'),
+        (['"// ', 'x"'], '"// x"'),
+        (["1 #", " comment"], "1 "),
+        (["1 /"], "1 /"),
+        (['"unterminated'], '"unterminated'),
+        ([], ""),
+    ]
+    for chunks, expected in cases:
+        assert "".join(iter_strip_comments(chunks)) == expected
+
+
+def test_strip_comment_line_with_symbol():
+    assert strip_comment_line_with_symbol('"a": "#", # comment', "#") == '"a": "#",'
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.vendor.jsonutils",
+        preview=False,
+    )
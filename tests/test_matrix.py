@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import gzip
+
+import pytest
+
+from pywf_open_source.paths import dir_project_root
+from pywf_open_source.define import PyWf
+from pywf_open_source.tool_table import ToolInfo, ToolTable
+from pywf_open_source.matrix import (
+    get_ci_python_versions,
+    get_pyenv_bin_dirs,
+    find_interpreters,
+    get_venv_key,
+    read_venv_key,
+    MatrixStatus,
+    MatrixResult,
+    run_matrix_version,
+    format_matrix_table,
+)
+
+
+def test_get_ci_python_versions(tmp_path):
+    path = tmp_path / "main.yml"
+    assert get_ci_python_versions(path) == []
+    path.write_text(
+        "\n".join(
+            [
+                "    matrix:",
+                '        python-version: ["3.9", "3.10", \'3.11\']',
+                '#        python-version: ["3.9", ]',
+            ]
+        )
+    )
+    assert get_ci_python_versions(path) == ["3.9", "3.10", "3.11"]
+    path.write_text('#        python-version: ["3.9", ]')
+    assert get_ci_python_versions(path) == []
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="requires shell script")
+def test_find_interpreters(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYENV_ROOT", str(tmp_path))
+    for name, version in [("3.99.1", "3.99.1"), ("3.99.10", "3.99.10"), ("3.98.0", "3.0.0")]:
+        dir_bin = tmp_path / "versions" / name / "bin"
+        dir_bin.mkdir(parents=True)
+        path = dir_bin / f"python{name.rsplit('.', 1)[0]}"
+        path.write_text(f"#!/bin/sh\necho 'Python {version}'\n")
+        path.chmod(0o755)
+    assert get_pyenv_bin_dirs("3.99") == [
+        tmp_path / "versions" / "3.99.10" / "bin",
+        tmp_path / "versions" / "3.99.1" / "bin",
+    ]
+    assert get_pyenv_bin_dirs("3.97") == []
+
+    interpreters = find_interpreters(["3.99", "3.98", "3.97"], ToolTable())
+    assert interpreters["3.99"].path == str(
+        tmp_path / "versions" / "3.99.10" / "bin" / "python3.99"
+    )
+    assert interpreters["3.99"].version == "Python 3.99.10"
+    # the reported version doesn't match
+    assert interpreters["3.98"] is None
+    assert interpreters["3.97"] is None
+
+
+def test_run_matrix_version(tmp_path):
+    dir_project = tmp_path / "project"
+    dir_project.mkdir()
+    path_requirements = dir_project / "requirements.txt"
+    path_requirements.write_text("")
+    dir_venv = tmp_path / "venv"
+    path_log = tmp_path / "matrix.log.gz"
+    interpreter = ToolInfo(
+        name="python",
+        path=sys.executable,
+        version=f"Python {sys.version.split()[0]}",
+    )
+    kwargs = dict(
+        version="3.x",
+        interpreter=interpreter,
+        dir_venv=dir_venv,
+        requirements=[path_requirements],
+        pytest_args=["tests"],
+        cwd=dir_project,
+        path_log=path_log,
+    )
+
+    result = run_matrix_version(**kwargs)
+    assert result.venv == "created"
+    # pytest is not installed in the new virtualenv
+    assert result.status == MatrixStatus.failed
+    assert "No module named pytest" in result.message
+    assert "No module named pytest" in gzip.open(path_log, "rt").read()
+    assert read_venv_key(dir_venv) == get_venv_key(interpreter, [path_requirements])
+
+    assert run_matrix_version(**kwargs).venv == "reused"
+    path_requirements.write_text("# changed")
+    result = run_matrix_version(**{**kwargs, "pytest_args": ["--version"]})
+    assert result.venv == "created"
+
+    result = run_matrix_version(**{**kwargs, "interpreter": None})
+    assert result.status == MatrixStatus.missing
+
+    bad = ToolInfo(name="python", path=str(tmp_path / "not-exists"))
+    result = run_matrix_version(**{**kwargs, "interpreter": bad, "dir_venv": tmp_path / "v2"})
+    assert result.status == MatrixStatus.error
+
+
+def test_format_matrix_table():
+    results = [
+        MatrixResult(
+            version="3.9",
+            status=MatrixStatus.passed,
+            venv="reused",
+            elapsed=1.5,
+            test_elapsed=1.2,
+            message="10 passed in 1.00s",
+        ),
+        MatrixResult(version="3.13", status=MatrixStatus.missing, message="x" * 100),
+    ]
+    lines = format_matrix_table(results).splitlines()
+    assert lines[0].split(" | ")[0].strip() == "python"
+    assert lines[2].startswith("3.9 ")
+    assert lines[3].endswith("...")
+    assert lines[-1] == "1 passed, 0 failed, 0 error, 1 missing, wall time = 1.50s"
+
+
+def test_run_matrix_test_empty_versions(tmp_path):
+    dir_project = tmp_path / "project"
+    dir_project.joinpath("pywf_open_source").mkdir(parents=True)
+    dir_project.joinpath("pywf_open_source", "__init__.py").write_text("")
+    dir_project.joinpath("pyproject.toml").write_text(
+        dir_project_root.joinpath("pyproject.toml").read_text()
+    )
+    pywf = PyWf.from_pyproject_toml(dir_project / "pyproject.toml")
+    with pytest.raises(ValueError, match="versions is an empty list"):
+        pywf.run_matrix_test(versions=[], verbose=False)
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.matrix",
+        preview=False,
+    )
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import copy
+
+from pywf_open_source.notebook_cache import (
+    get_notebook_cache_key,
+    extract_code_cell_outputs,
+    inject_code_cell_outputs,
+    NotebookCache,
+)
+
+
+def make_notebook(source: str) -> dict:
+    return {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Title"]},
+            {
+                "cell_type": "code",
+                "execution_count": None,
+                "metadata": {},
+                "outputs": [],
+                "source": [source],
+            },
+        ],
+        "metadata": {"kernelspec": {"name": "python3"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+
+def test_get_notebook_cache_key():
+    nb1 = make_notebook('print("hello")')
+    nb2 = make_notebook('print("world")')
+    key = get_notebook_cache_key(nb1, "lock-1")
+    # markdown and outputs don't affect the key
+    nb3 = copy.deepcopy(nb1)
+    nb3["cells"][0]["source"] = ["# Another Title"]
+    nb3["cells"][1]["outputs"] = [{"output_type": "stream", "text": ["hello\n"]}]
+    assert get_notebook_cache_key(nb3, "lock-1") == key
+    # code, kernel and poetry.lock do
+    assert get_notebook_cache_key(nb2, "lock-1") != key
+    assert get_notebook_cache_key(nb1, "lock-2") != key
+    nb4 = copy.deepcopy(nb1)
+    nb4["metadata"]["kernelspec"]["name"] = "python3.11"
+    assert get_notebook_cache_key(nb4, "lock-1") != key
+
+
+def test_inject_code_cell_outputs(tmp_path):
+    executed = make_notebook('print("hello")')
+    executed["cells"][1]["execution_count"] = 1
+    executed["cells"][1]["outputs"] = [
+        {"name": "stdout", "output_type": "stream", "text": ["hello\n"]}
+    ]
+
+    cache = NotebookCache(dir_cache=tmp_path)
+    key = get_notebook_cache_key(executed, "lock")
+    assert cache.get(key) is None
+    cache.put(key, extract_code_cell_outputs(executed))
+
+    notebook = make_notebook('print("hello")')
+    cell_outputs = cache.get(key)
+    assert inject_code_cell_outputs(notebook, cell_outputs) is True
+    assert notebook["cells"][1] == executed["cells"][1]
+    assert inject_code_cell_outputs(notebook, cell_outputs) is False
+
+
+def test_corrupt_cache_entry(tmp_path):
+    cache = NotebookCache(dir_cache=tmp_path)
+    cell_outputs = [{"execution_count": 1, "outputs": []}]
+    cache.put("key", cell_outputs)
+    assert cache.get("key") == cell_outputs
+    assert [p.name for p in tmp_path.iterdir()] == ["key.json"]
+
+    # a corrupt or truncated entry is a cache miss
+    path = cache.get_path("key")
+    content = path.read_text()
+    for text in [
+        content[: len(content) // 2],
+        "",
+        "[]",
+        '{"other": []}',
+        '{"cells": 1}',
+        '{"cells": [{"outputs": []}]}',
+    ]:
+        path.write_text(text)
+        assert cache.get("key") is None
+    path.write_bytes(b"\xff\xfe")
+    assert cache.get("key") is None
+
+    # the next put overwrites it
+    cache.put("key", cell_outputs)
+    assert cache.get("key") == cell_outputs
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.notebook_cache",
+        preview=False,
+    )
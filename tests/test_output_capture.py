@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import io
+import sys
+import gzip
+from pathlib import Path
+
+import pytest
+
+from pywf_open_source.paths import dir_project_root
+from pywf_open_source.define import PyWf
+from pywf_open_source.logger import logger
+from pywf_open_source.output_capture import (
+    MAX_LINE_BYTES,
+    get_log_file_name,
+    CapturedProcessError,
+    OutputCapture,
+)
+from pywf_open_source.run_ledger import run_with_rusage
+
+
+def test_get_log_file_name():
+    assert get_log_file_name("Build python distribution") == (
+        "build-python-distribution.log.gz"
+    )
+    assert get_log_file_name("?!") == "command.log.gz"
+
+
+def test_output_capture(tmp_path):
+    path_log = tmp_path / "logs" / "step.log.gz"
+    logged = list()
+    data = b"".join(f"line {i}\n".encode() for i in range(1000))
+    # a line without line break that is longer than the limit
+    data += b"x" * (MAX_LINE_BYTES + 10)
+    with OutputCapture(log_func=logged.append, path_log=path_log, tail_lines=3) as capture:
+        capture.read_stream(io.BytesIO(data))
+    assert capture.n_lines == 1002
+    assert capture.n_bytes == len(data)
+    assert len(logged) == 1002
+    assert logged[0] == "line 0"
+    assert capture.tail == f"line 999\n{'x' * MAX_LINE_BYTES}\n{'x' * 10}\n"
+    # the full output is in the log file
+    assert gzip.decompress(path_log.read_bytes()) == data
+
+
+def test_run_with_rusage_read_output():
+    capture = OutputCapture()
+    code = "import sys; print('out'); print('err', file=sys.stderr); sys.exit(1)"
+    result, _ = run_with_rusage(
+        [sys.executable, "-c", code],
+        read_output=capture.read_stream,
+    )
+    assert result.returncode == 1
+    assert sorted(capture.lines) == ["err", "out"]
+
+
+def test_run_command_capture(tmp_path):
+    dir_project = tmp_path / "project"
+    dir_project.joinpath("pywf_open_source").mkdir(parents=True)
+    dir_project.joinpath("pywf_open_source", "__init__.py").write_text("")
+    dir_project.joinpath("pyproject.toml").write_text(
+        dir_project_root.joinpath("pyproject.toml").read_text()
+    )
+    pywf = PyWf.from_pyproject_toml(dir_project / "pyproject.toml")
+
+    code = "import os; [print(i) for i in range(500)]; print(os.environ['MY_VAR'])"
+    args = [sys.executable, "-c", code]
+    with logger.disabled(True):
+        result = pywf.run_command(
+            args,
+            real_run=True,
+            env={"MY_VAR": "hello"},
+            capture=True,
+        )
+    assert result.stdout.endswith("499\nhello\n")
+    path_log = pywf.dir_run_log_cache / get_log_file_name(Path(args[0]).name)
+    assert gzip.decompress(path_log.read_bytes()).decode().endswith("hello\n")
+
+    with logger.disabled(True):
+        with pytest.raises(CapturedProcessError) as e:
+            pywf.run_command(
+                [sys.executable, "-c", "print('boom'); raise SystemExit(2)"],
+                real_run=True,
+                capture=True,
+            )
+    assert e.value.returncode == 2
+    assert "boom" in str(e.value)
+    assert str(pywf.dir_run_log_cache) in str(e.value)
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.output_capture",
+        preview=False,
+    )
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import json
+import hashlib
+import tarfile
+import zipfile
+import threading
+from pathlib import Path
+from email.parser import BytesParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from pywf_open_source.pypi_upload import (
+    read_dist_metadata,
+    get_upload_fields,
+    MultipartFileStream,
+    UploadStatus,
+    list_dist_files,
+    upload_dists,
+)
+
+METADATA = """Metadata-Version: 2.3
+Name: my_package
+Version: 0.1.1
+Summary: My package.
+Classifier: Natural Language :: English
+Classifier: Operating System :: Unix
+
+Long description.
+"""
+
+
+def make_dist(dir_dist: Path):
+    dir_dist.mkdir()
+    with zipfile.ZipFile(dir_dist / "my_package-0.1.1-py3-none-any.whl", "w") as f:
+        f.writestr("my_package/__init__.py", "")
+        f.writestr("my_package-0.1.1.dist-info/METADATA", METADATA)
+    path_pkg_info = dir_dist / "PKG-INFO"
+    path_pkg_info.write_text(METADATA)
+    with tarfile.open(dir_dist / "my_package-0.1.1.tar.gz", "w:gz") as f:
+        f.add(path_pkg_info, arcname="my_package-0.1.1/PKG-INFO")
+    path_pkg_info.unlink()
+
+
+class FakeIndexHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in package index that implements the upload API and the JSON API.
+    """
+
+    server: "FakeIndex"
+
+    def do_GET(self):
+        _, _, name, version, _ = self.path.split("/")
+        filenames = [f for (n, v, f) in self.server.files if (n, v) == (name, version)]
+        if not filenames:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"urls": [{"filename": f} for f in filenames]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        assert self.headers["Transfer-Encoding"] is None
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        msg = BytesParser().parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        fields = {
+            part.get_param("name", header="content-disposition"): part
+            for part in msg.get_payload()
+        }
+        content = fields["content"].get_payload(decode=True)
+        filename = fields["content"].get_filename()
+        sha256 = fields["sha256_digest"].get_payload()
+        assert hashlib.sha256(content).hexdigest() == sha256
+        with self.server.lock:
+            self.server.attempts[filename] = self.server.attempts.get(filename, 0) + 1
+            if filename in self.server.flaky and self.server.attempts[filename] == 1:
+                code = 503
+            else:
+                key = (
+                    fields["name"].get_payload(),
+                    fields["version"].get_payload(),
+                    filename,
+                )
+                self.server.files.add(key)
+                code = 200
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeIndex(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeIndexHandler)
+        self.files = set()
+        self.attempts = dict()
+        self.flaky = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def index():
+    server = FakeIndex()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_upload_fields(tmp_path):
+    make_dist(tmp_path / "dist")
+    path_whl, path_sdist = list_dist_files(tmp_path / "dist")
+    assert read_dist_metadata(path_sdist)["Name"] == "my_package"
+    fields = dict(get_upload_fields(path_whl))
+    assert fields["filetype"] == "bdist_wheel"
+    assert fields["pyversion"] == "py3"
+    assert fields["description"].strip() == "Long description."
+    assert [v for k, v in get_upload_fields(path_whl) if k == "classifiers"] == [
+        "Natural Language :: English",
+        "Operating System :: Unix",
+    ]
+
+
+def test_multipart_file_stream(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"x" * 10000)
+    with MultipartFileStream([("name", "value")], path) as body:
+        chunks = list(iter(lambda: body.read(4096), b""))
+        data = b"".join(chunks)
+        assert max(len(chunk) for chunk in chunks) <= 4096
+        assert len(data) == len(body)
+        assert b"x" * 10000 in data
+
+
+def test_upload_dists(tmp_path, index):
+    make_dist(tmp_path / "dist")
+    paths = list_dist_files(tmp_path / "dist")
+    index.flaky.add(paths[0].name)
+    kwargs = dict(
+        username="__token__",
+        password="token",
+        repository_url=f"{index.url}/legacy/",
+        json_api_url=f"{index.url}/pypi",
+        backoff=0,
+    )
+
+    results = upload_dists(paths, **kwargs)
+    assert [r.status for r in results] == [UploadStatus.uploaded] * 2
+    assert results[0].attempts == 2
+    assert len(index.files) == 2
+
+    # run it again, everything is skipped without uploading
+    results = upload_dists(paths, **kwargs)
+    assert [r.status for r in results] == [UploadStatus.skipped] * 2
+    assert sum(index.attempts.values()) == 3
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.pypi_upload",
+        preview=False,
+    )
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from pywf_open_source.pytest_worker import PytestWorker
+
+
+@pytest.mark.skipif(not PytestWorker.is_supported(), reason="requires fork")
+def test_pytest_worker(tmp_path):
+    dir_tests = tmp_path / "tests"
+    dir_tests.mkdir()
+    path_mod = tmp_path / "mod.py"
+    path_mod.write_text("X = 1\n")
+    path_test = dir_tests / "test_mod.py"
+    path_test.write_text("from mod import X\n\ndef test_x():\n    assert X == 1\n")
+    args = [str(path_test), "-q", "-p", "no:cacheprovider"]
+
+    with PytestWorker(Path(sys.executable), tmp_path, preload=["json"]) as worker:
+        assert worker.run(args) == 0
+        # the child imports the latest source code
+        path_mod.write_text("X = 2\n")
+        assert worker.run(args) == 1
+        # restart the worker if it died
+        worker.process.kill()
+        worker.process.wait()
+        path_mod.write_text("X = 1\n")
+        assert worker.run(args) == 0
+    assert worker.is_alive is False
+
+    worker = PytestWorker(tmp_path / "not-exists" / "python", tmp_path)
+    with pytest.raises(RuntimeError):
+        worker.start()
+
+
+def test_pytest_worker_stdin(tmp_path):
+    path_test = tmp_path / "test_stdin.py"
+    path_test.write_text(
+        "import os, sys\n\n"
+        "def test_stdin():\n"
+        "    assert os.read(0, 1024) == b''\n"
+        "    assert sys.stdin.read() == ''\n"
+    )
+    args = [str(path_test), "-q", "-s", "-p", "no:cacheprovider"]
+    with PytestWorker(Path(sys.executable), tmp_path) as worker:
+        # the test can't read the command pipe, the next run still works
+        assert worker.run(args) == 0
+        assert worker.run(args) == 0
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.pytest_worker",
+        preview=False,
+    )
@@ -95,6 +95,7 @@ class Test:
         _ = pywf.dir_tests_load
         _ = pywf.dir_htmlcov
         _ = pywf.path_htmlcov_index_html
+        _ = pywf.path_github_workflow_main
         _ = pywf.dir_sphinx_doc
         _ = pywf.dir_sphinx_doc_source
         _ = pywf.dir_sphinx_doc_source_conf_py
@@ -113,11 +114,21 @@ class Test:
         _ = pywf.dir_build
         _ = pywf.dir_dist
         _ = pywf.path_bin_aws
+        _ = pywf.dir_cache
+        _ = pywf.dir_notebook_cache
+        _ = pywf.dir_build_cache
+        _ = pywf.dir_build_env_cache
+        _ = pywf.dir_http_cache
+        _ = pywf.path_run_ledger
+        _ = pywf.dir_run_log_cache
+        _ = pywf.dir_matrix_venv_cache
+        _ = pywf.path_tool_table
 
     def test_action(self):
         pywf = self.pywf
         verbose = True  # show more log for debugging
         # verbose = False # use verbose = False to hit 100% coverage
+        pywf.doctor(verbose=verbose)
         logger.info("")
 
         pywf.remove_virtualenv(verbose=verbose)
@@ -141,6 +152,8 @@ class Test:
 
         # --- test related
         pywf.run_unit_test(verbose=verbose)
+        pywf.watch_test(real_run=False, verbose=verbose)
+        pywf.run_matrix_test(real_run=False, verbose=verbose)
         pywf.run_cov_test(verbose=verbose)
         pywf.view_cov(real_run=False, verbose=verbose)
         with pytest.raises(RuntimeError):
@@ -153,14 +166,18 @@ class Test:
         if IS_WINDOWS is False:
             pywf.build_doc(verbose=verbose)
             pywf.view_doc(real_run=False, verbose=verbose)
+            pywf.execute_notebook(real_run=False, verbose=verbose)
+            pywf.serve_doc(real_run=False, verbose=verbose)
             pywf.notebook_to_markdown(real_run=False, verbose=verbose)
 
         # --- build
         pywf.python_build(verbose=verbose)
         pywf.poetry_build(verbose=verbose)
+        pywf.pep517_build(verbose=verbose)
 
         pywf.twine_upload(real_run=False, verbose=verbose)
         pywf.poetry_publish(real_run=False, verbose=verbose)
+        pywf.pypi_upload(real_run=False, verbose=verbose)
         pywf.bump_version(major=True, real_run=False, verbose=verbose)
         pywf.bump_version(minor=True, real_run=False, verbose=verbose)
         pywf.bump_version(patch=True, real_run=False, verbose=verbose)
@@ -170,6 +187,10 @@ class Test:
         pywf.setup_codecov_io_upload_token_on_github(real_run=False, verbose=verbose)
         pywf.setup_readthedocs_project(real_run=False, verbose=verbose)
         pywf.edit_github_repo_metadata(real_run=False, verbose=verbose)
+        pywf.bootstrap_saas(real_run=False, verbose=verbose)
+
+        # --- run history
+        pywf.show_run_stats(verbose=verbose)
 
         # --- clean up
         pywf.remove_virtualenv(verbose=verbose)
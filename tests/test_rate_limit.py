@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from pywf_open_source.rate_limit import (
+    get_provider,
+    parse_retry_after,
+    TokenBucket,
+    RateLimitScheduler,
+)
+from pywf_open_source.http_client import HttpClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_get_provider():
+    assert get_provider("https://api.github.com/repos/a/b") == "api.github.com"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3", now=0) == 3
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:10 GMT", now=4) == 6
+    assert parse_retry_after("invalid", now=0) is None
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the bucket is empty, callers are queued in arrival order
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+    clock.now += 1.0
+    assert bucket.tokens == 0
+    clock.now += 10
+    assert bucket.tokens == 2
+
+
+def test_scheduler():
+    clock = FakeClock()
+    scheduler = RateLimitScheduler(
+        rates={"a.com": (1, 1)},
+        clock=clock,
+        wall_clock=clock,
+        sleep=clock.sleep,
+    )
+    url = "https://a.com/x"
+    assert scheduler.acquire(url) == 0
+    assert scheduler.acquire(url) == 1
+    assert scheduler.get_metrics()["a.com"].throttled == 1
+
+    # the budget is used up, wait until it resets
+    headers = {
+        "x-ratelimit-limit": "5000",
+        "x-ratelimit-remaining": "0",
+        "x-ratelimit-reset": str(int(clock.now) + 30),
+    }
+    assert scheduler.update(url, 403, headers) is True
+    metrics = scheduler.get_metrics()["a.com"]
+    assert metrics.limit == 5000
+    assert metrics.remaining == 0
+    assert metrics.rate_limited == 1
+    assert metrics.wait_seconds == 30
+    assert scheduler.acquire(url) == 30
+
+    # secondary rate limit without any hint waits for the default time
+    assert scheduler.update(url, 403, {}) is False
+    assert scheduler.update(url, 429, {}) is True
+    assert scheduler.get_metrics()["a.com"].wait_seconds == 60
+
+    # other providers are not affected
+    assert scheduler.acquire("https://b.com") == 0
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in API that allows ``limit`` requests, then rejects the next
+    request with 429 and a ``Retry-After`` header, and resets the budget.
+    """
+
+    server: "FakeApi"
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.hits += 1
+            if self.server.remaining == 0:
+                self.server.remaining = self.server.limit
+                self.server.rejected += 1
+                return self._send(429, {"Retry-After": "0.2"})
+            self.server.remaining -= 1
+            headers = {
+                "X-RateLimit-Limit": str(self.server.limit),
+                "X-RateLimit-Remaining": str(self.server.remaining),
+                "X-RateLimit-Reset": "1",
+            }
+        self._send(201, headers)
+
+    def _send(self, code: int, headers: dict):
+        self.send_response(code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeApi(ThreadingHTTPServer):
+    def __init__(self, limit: int):
+        super().__init__(("127.0.0.1", 0), FakeApiHandler)
+        self.limit = limit
+        self.remaining = limit
+        self.hits = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def api():
+    server = FakeApi(limit=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_client_with_scheduler(api):
+    scheduler = RateLimitScheduler(default_rate=(100, 100))
+    client = HttpClient(scheduler=scheduler, backoff=0)
+
+    # the 429 response is not an error, the POST is queued and sent again
+    st = time.perf_counter()
+    for _ in range(5):
+        response = client.post(f"{api.url}/x", json={})
+        assert response.status_code == 201
+    elapsed = time.perf_counter() - st
+    assert api.rejected == 1
+    assert api.hits == 6
+    assert elapsed >= 0.2
+
+    metrics = scheduler.get_metrics()[api.url.split("//")[1]]
+    assert metrics.requests == 6
+    assert metrics.rate_limited == 1
+    assert metrics.limit == 3
+    assert metrics.remaining == 1
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.rate_limit",
+        preview=False,
+    )
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from pywf_open_source.remote_cache import (
+    RemoteCacheError,
+    get_blob_name,
+    get_manifest_name,
+    DirStore,
+    HttpStore,
+    get_store,
+    FileEntry,
+    Manifest,
+    RemoteCache,
+)
+
+
+class FakeStoreHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in HTTP cache server, it keeps the blobs in memory.
+    """
+
+    server: "FakeStore"
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.requests.append(("HEAD", self.path))
+            found = self.path in self.server.blobs
+        self._send(200 if found else 404, b"", head=True)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(("GET", self.path))
+            body = self.server.blobs.get(self.path)
+        if body is None:
+            return self._send(404, b"")
+        self._send(200, body)
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.requests.append(("PUT", self.path))
+            self.server.blobs[self.path] = body
+        self._send(201, b"")
+
+    def _send(self, code: int, body: bytes, head: bool = False):
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeStore(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeStoreHandler)
+        self.blobs = dict()
+        self.requests = list()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/cache"
+
+
+@pytest.fixture
+def http_server():
+    server = FakeStore()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_project(dir_root: Path):
+    dir_dist = dir_root / "dist"
+    dir_dist.mkdir(parents=True)
+    dir_dist.joinpath("a-0.1.0.tar.gz").write_bytes(b"sdist" * 1000)
+    dir_dist.joinpath("a-0.1.0-py3-none-any.whl").write_bytes(b"wheel" * 1000)
+    dir_dist.joinpath("sub").mkdir()
+    dir_dist.joinpath("sub", "same.txt").write_bytes(b"wheel" * 1000)
+    dir_root.joinpath("requirements.txt").write_text("requests==2.0.0\n")
+
+
+def test_get_name():
+    assert get_blob_name("abcd") == "cas/ab/abcd"
+    assert get_manifest_name("pkg-dist-1234") == "ac/pkg-dist-1234.json"
+    with pytest.raises(ValueError):
+        get_manifest_name("../etc/passwd")
+
+
+def test_get_store(tmp_path):
+    assert isinstance(get_store("https://example.com/cache"), HttpStore)
+    store = get_store(f"file://{tmp_path}")
+    assert isinstance(store, DirStore)
+    assert store.dir_root == tmp_path
+
+
+def _test_remote_cache(cache: RemoteCache, tmp_path: Path):
+    dir_ci = tmp_path / "ci"
+    dir_dev = tmp_path / "dev"
+    make_project(dir_ci)
+    dir_dev.mkdir()
+
+    assert cache.restore("pkg-dist-v1", dir_dev) is None
+    manifest = cache.save("pkg-dist-v1", dir_ci, ["dist", "requirements.txt"])
+    assert len(manifest.files) == 4
+    assert cache.get_manifest("pkg-dist-v1") == manifest
+
+    # stale local outputs are replaced
+    dir_dev.joinpath("dist").mkdir()
+    dir_dev.joinpath("dist", "old.whl").write_bytes(b"old")
+    restored = cache.restore("pkg-dist-v1", dir_dev)
+    assert len(restored) == 4
+    assert dir_dev.joinpath("dist", "old.whl").exists() is False
+    for entry in manifest.files:
+        assert (dir_dev / entry.path).read_bytes() == (dir_ci / entry.path).read_bytes()
+    # the staging folder is cleaned up
+    assert sorted(p.name for p in dir_dev.iterdir()) == ["dist", "requirements.txt"]
+
+    # restore again, all files are reused
+    assert len(cache.restore("pkg-dist-v1", dir_dev)) == 4
+
+    with pytest.raises(FileNotFoundError):
+        cache.save("pkg-dist-v2", dir_ci, ["not-exists"])
+
+
+def test_dir_store(tmp_path):
+    store = DirStore(tmp_path / "store")
+    cache = RemoteCache(store)
+    _test_remote_cache(cache, tmp_path)
+    # same content is stored once
+    assert len(list(tmp_path.joinpath("store", "cas").rglob("*"))) == 3 + 3
+
+    # corrupted content is detected, the local outputs are not touched
+    entry = cache.get_manifest("pkg-dist-v1").files[0]
+    tmp_path.joinpath("store", get_blob_name(entry.sha256)).write_bytes(b"bad")
+    dir_new = tmp_path / "new"
+    dir_new.mkdir()
+    dir_new.joinpath("requirements.txt").write_text("local")
+    with pytest.raises(RemoteCacheError):
+        cache.restore("pkg-dist-v1", dir_new)
+    assert dir_new.joinpath("requirements.txt").read_text() == "local"
+    assert sorted(p.name for p in dir_new.iterdir()) == ["requirements.txt"]
+
+    tmp_path.joinpath("store", get_manifest_name("bad")).write_text("{}")
+    with pytest.raises(RemoteCacheError):
+        cache.restore("bad", dir_new)
+
+
+@pytest.mark.parametrize(
+    "outputs,path",
+    [
+        (["../victim"], "../victim/a.txt"),
+        (["/tmp/victim"], "/tmp/victim/a.txt"),
+        (["."], "a.txt"),
+        (["dist"], "../victim/a.txt"),
+        (["dist"], "build/a.txt"),
+    ],
+)
+def test_restore_invalid_manifest(tmp_path, outputs, path):
+    dir_store = tmp_path / "store"
+    dir_root = tmp_path / "project"
+    dir_victim = tmp_path / "victim"
+    dir_root.mkdir()
+    dir_victim.mkdir()
+    dir_victim.joinpath("a.txt").write_text("victim")
+    cache = RemoteCache(DirStore(dir_store))
+    manifest = Manifest(
+        outputs=outputs,
+        files=[FileEntry(path=path, sha256="ab" * 32, size=0)],
+    )
+    path_manifest = dir_store.joinpath(get_manifest_name("evil"))
+    path_manifest.parent.mkdir(parents=True)
+    path_manifest.write_text(manifest.to_json())
+    with pytest.raises(RemoteCacheError):
+        cache.restore("evil", dir_root)
+    assert dir_victim.joinpath("a.txt").read_text() == "victim"
+
+
+def test_restore_mode(tmp_path):
+    dir_ci = tmp_path / "ci"
+    dir_ci.mkdir()
+    dir_ci.joinpath("run.sh").write_text("echo hello")
+    cache = RemoteCache(DirStore(tmp_path / "store"))
+    manifest = cache.save("key", dir_ci, ["run.sh"])
+    manifest.files[0].mode = 0o4755
+    tmp_path.joinpath("store", get_manifest_name("key")).write_text(manifest.to_json())
+    dir_dev = tmp_path / "dev"
+    dir_dev.mkdir()
+    cache.restore("key", dir_dev)
+    assert dir_dev.joinpath("run.sh").stat().st_mode & 0o7777 == 0o755
+
+
+def test_http_store(tmp_path, http_server):
+    store = HttpStore(http_server.url, token="secret")
+    cache = RemoteCache(store)
+    try:
+        _test_remote_cache(cache, tmp_path)
+    finally:
+        store.close()
+    n_blobs = len([name for name in http_server.blobs if "/cas/" in name])
+    n_puts = len([method for method, _ in http_server.requests if method == "PUT"])
+    assert n_blobs == 3
+    assert n_puts == 3 + 1
+
+    with pytest.raises(RemoteCacheError):
+        HttpStore("http://127.0.0.1:1", max_retries=0).has("cas/ab/abcd")
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.remote_cache",
+        preview=False,
+    )
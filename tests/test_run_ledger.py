@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+
+import pytest
+
+from pywf_open_source.run_ledger import (
+    run_with_rusage,
+    RunRecord,
+    RunLedger,
+    format_stats_report,
+)
+
+
+def test_run_with_rusage(tmp_path):
+    # allocate 200 MB, more than the memory inherited from this process
+    code = "import time; data = b'1' * (200 * 1024 * 1024); time.sleep(0.1)"
+    result, usage = run_with_rusage([sys.executable, "-c", code], cwd=tmp_path)
+    assert result.returncode == 0
+    assert usage.wall_time >= 0.1
+    assert usage.user_time + usage.sys_time > 0
+    assert usage.max_rss_kb > 200 * 1024
+
+    result, usage = run_with_rusage([sys.executable, "-c", "raise SystemExit(3)"])
+    assert result.returncode == 3
+    with pytest.raises(subprocess.CalledProcessError):
+        result.check_returncode()
+
+
+def make_record(step: str, started_at: float, wall_time: float, **kwargs):
+    kwargs.setdefault("max_rss_kb", 1024)
+    kwargs.setdefault("exit_code", 0)
+    return RunRecord(
+        started_at=started_at,
+        step=step,
+        command=f"{step} --arg",
+        cwd="/tmp",
+        wall_time=wall_time,
+        user_time=wall_time / 2,
+        sys_time=0.1,
+        **kwargs,
+    )
+
+
+def test_run_ledger(tmp_path):
+    ledger = RunLedger(path=tmp_path / ".cache" / "run_ledger.sqlite")
+    assert ledger.list_records() == []
+    assert format_stats_report(ledger.get_step_stats()) == "No run history yet."
+
+    for i, wall_time in enumerate([10, 11, 9, 10, 30]):
+        ledger.append(make_record("build", i, wall_time, max_rss_kb=100 * 1024))
+    for i, wall_time in enumerate([2, 2, 2]):
+        ledger.append(make_record("test", i, wall_time, exit_code=i))
+    ledger.append(make_record("lock", 0, 5))
+
+    assert len(ledger.list_records()) == 9
+    records = ledger.list_records(step="build")
+    assert [r.wall_time for r in records] == [10, 11, 9, 10, 30]
+
+    stats = {s.step: s for s in ledger.get_step_stats(window=3)}
+    assert stats["build"].runs == 5
+    assert stats["build"].median_wall_time == 10
+    assert stats["build"].regression_ratio == 3
+    assert stats["build"].wall_times == [11, 9, 10, 30]
+    assert stats["test"].failures == 2
+    assert stats["test"].regression_ratio == 1
+    assert stats["lock"].median_wall_time is None
+    assert stats["lock"].regression_ratio is None
+
+    report = format_stats_report(list(stats.values()))
+    lines = report.splitlines()
+    # the slowest step first
+    assert lines[0].startswith("Slowest steps")
+    assert lines[3].startswith("build")
+    assert "100.0 MB" in report
+    assert "11.00 9.00 10.00 30.00" in report
+    assert "3.0x" in report
+    assert "Regressions" in report
+
+
+def test_run_ledger_create_schema_once(tmp_path, monkeypatch):
+    ledger = RunLedger(path=tmp_path / ".cache" / "run_ledger.sqlite")
+    calls = list()
+    create_schema = ledger._create_schema
+    monkeypatch.setattr(
+        ledger, "_create_schema", lambda: calls.append(1) or create_schema()
+    )
+    for i in range(3):
+        ledger.append(make_record("build", i, 1))
+    assert len(ledger.list_records()) == 3
+    assert len(calls) == 1
+
+
+def test_run_ledger_no_regression(tmp_path):
+    ledger = RunLedger(path=tmp_path / "run_ledger.sqlite")
+    # 3x slower but less than 1 second, it is noise
+    for i, wall_time in enumerate([0.1, 0.1, 0.3]):
+        ledger.append(make_record("lint", i, wall_time))
+    report = format_stats_report(ledger.get_step_stats())
+    assert report.endswith("No regressions.")
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.run_ledger",
+        preview=False,
+    )
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from pywf_open_source.search_index import (
+    tokenize,
+    split_chunks,
+    build_index,
+    SearchIndex,
+    iter_dir_documents,
+    main,
+)
+
+
+def test_tokenize():
+    assert tokenize("def run_command(self, x): HTTP2") == [
+        "def",
+        "run",
+        "command",
+        "run_command",
+        "self",
+        "http2",
+    ]
+
+
+def test_split_chunks():
+    text = "\n".join(f"line {i}" for i in range(1, 6))
+    chunks = list(split_chunks("a.txt", text, chunk_lines=2))
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 2), (3, 4), (5, 5)]
+    assert chunks[-1].text == "line 5"
+    assert list(split_chunks("a.txt", "\n\n\n")) == []
+
+
+def test_search_index(tmp_path):
+    documents = [
+        ("rate_limit.py", "token bucket\nrate limit\nretry after header"),
+        ("http_client.py", "http client\nretry with backoff\nconditional request"),
+        ("empty.txt", ""),
+        ("build.py", "\n".join(["build the wheel"] * 3 + ["bucket"])),
+    ]
+    path_index = tmp_path / "kb.bm25"
+    assert build_index(documents, path_index, chunk_lines=3) == 4
+
+    with SearchIndex(path_index) as index:
+        assert index.n_chunks == 4
+        assert index.find_term("bucket") is not None
+        assert index.find_term("nothing") is None
+
+        results = index.search("rate limit bucket", top_k=2)
+        assert [r.chunk.source for r in results] == ["rate_limit.py", "build.py"]
+        assert results[0].score > results[1].score
+        assert results[0].chunk.start_line == 1
+        assert results[0].chunk.end_line == 3
+        assert results[1].chunk.text == "bucket"
+
+        results = index.search("retry")
+        assert {r.chunk.source for r in results} == {"rate_limit.py", "http_client.py"}
+        assert index.search("unknown words") == []
+
+    # an empty index works too
+    build_index([], path_index)
+    with SearchIndex(path_index) as index:
+        assert index.search("retry") == []
+
+
+def test_invalid_index(tmp_path):
+    path = tmp_path / "invalid.bm25"
+    path.write_bytes(b"x" * 200)
+    with pytest.raises(ValueError):
+        SearchIndex(path)
+
+
+def test_cli(tmp_path, capsys):
+    dir_docs = tmp_path / "docs"
+    dir_docs.joinpath("sub").mkdir(parents=True)
+    dir_docs.joinpath("sub", "a.md").write_text("memory mapped inverted index")
+    dir_docs.joinpath("b.bin").write_bytes(b"\xff\xfe\x00")
+    assert [source for source, _ in iter_dir_documents(dir_docs)] == ["sub/a.md"]
+
+    path_index = tmp_path / "kb.bm25"
+    main(["build", str(dir_docs), str(path_index)])
+    main(["search", str(path_index), "inverted index", "-k", "1"])
+    main(["search", str(path_index), "inverted", "--json"])
+    out = capsys.readouterr().out
+    assert "indexed 1 chunks" in out
+    assert "--- sub/a.md:1-1" in out
+    assert '"source": "sub/a.md"' in out
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.search_index",
+        preview=False,
+    )
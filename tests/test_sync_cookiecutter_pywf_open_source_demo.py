@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from sync_cookiecutter_pywf_open_source_demo import copy_file, sync
+
+
+def write(path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_sync(tmp_path):
+    dir_src = tmp_path / "src"
+    dir_dst = tmp_path / "dst"
+    write(dir_src / "README.rst", "readme")
+    write(dir_src / "my_package" / "api.py", "X = 1")
+    write(dir_src / "my_package" / "sub" / "mod.py", "Y = 1")
+    write(dir_src / ".venv" / "bin" / "python", "excluded")
+    write(dir_src / "my_package" / "__pycache__" / "api.pyc", "excluded")
+
+    assert sync(dir_src, dir_dst) == (3, 0, 0)
+    assert (dir_dst / "my_package" / "api.py").read_text() == "X = 1"
+    assert (dir_dst / ".venv").exists() is False
+    assert (dir_dst / "my_package" / "__pycache__").exists() is False
+    st = (dir_src / "README.rst").stat()
+    assert (dir_dst / "README.rst").stat().st_mtime_ns == st.st_mtime_ns
+
+    # nothing changed, nothing is touched
+    assert sync(dir_src, dir_dst) == (0, 0, 3)
+
+    # same content with a new mtime is not copied
+    os.utime(dir_src / "README.rst", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert sync(dir_src, dir_dst) == (0, 0, 3)
+
+    # changed content is copied, removed files are deleted with the empty folder
+    write(dir_src / "my_package" / "api.py", "X = 2")
+    (dir_src / "my_package" / "sub" / "mod.py").unlink()
+    assert sync(dir_src, dir_dst) == (1, 1, 1)
+    assert (dir_dst / "my_package" / "api.py").read_text() == "X = 2"
+    assert (dir_dst / "my_package" / "sub").exists() is False
+
+
+def make_short_copy_file_range():
+    calls = list()
+
+    # copy a few bytes on the first call then report EOF, like a file
+    # system that stops early
+    def copy_file_range(fd_src, fd_dst, count):
+        calls.append(count)
+        if len(calls) > 1:
+            return 0
+        return os.write(fd_dst, os.read(fd_src, 5))
+
+    return copy_file_range, calls
+
+
+@pytest.mark.parametrize(
+    "has_sendfile",
+    [True, False],
+)
+def test_copy_file_fallback(tmp_path, monkeypatch, has_sendfile):
+    path_src = tmp_path / "src.txt"
+    path_dst = tmp_path / "out" / "dst.txt"
+    path_src.write_bytes(b"hello world" * 1000)
+    copy_file_range, calls = make_short_copy_file_range()
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range, raising=False)
+    if has_sendfile is False:
+        monkeypatch.delattr(os, "sendfile", raising=False)
+    copy_file(path_src, path_dst, os.stat(path_src))
+    # the short copy is not kept, the full content is copied by a fallback
+    assert len(calls) == 2
+    assert path_dst.read_bytes() == path_src.read_bytes()
+    assert [p.name for p in path_dst.parent.iterdir()] == ["dst.txt"]
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "sync_cookiecutter_pywf_open_source_demo",
+        preview=False,
+    )
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import os
+from pathlib import Path
+
+from pywf_open_source.tool_table import ToolTable
+
+
+def make_tool(dir_bin: Path, name: str, script: str) -> Path:
+    dir_bin.mkdir(parents=True, exist_ok=True)
+    path = dir_bin / name
+    path.write_text(f"#!/bin/sh\n{script}\n")
+    path.chmod(0o755)
+    return path
+
+
+def test_resolve(tmp_path, monkeypatch):
+    dir_venv_bin = tmp_path / "venv" / "bin"
+    dir_global_bin = tmp_path / "global" / "bin"
+    dir_env_bin = tmp_path / "env" / "bin"
+    search_dirs = [dir_venv_bin, dir_global_bin]
+    monkeypatch.setenv("PATH", str(dir_env_bin))
+    path_cache = tmp_path / "tools.json"
+
+    table = ToolTable(path_cache=path_cache)
+    assert table.resolve("mytool", search_dirs).is_found is False
+    # "not found" is not persisted
+    assert path_cache.exists() is False
+
+    # found in $PATH, the absolute path is used
+    path_env_tool = make_tool(dir_env_bin, "mytool", "echo mytool 1.0")
+    # the result is kept in memory until revalidated
+    assert table.resolve("mytool", search_dirs).is_found is False
+    info = table.resolve("mytool", search_dirs, revalidate=True)
+    assert info.path == str(path_env_tool)
+    assert info.env_path == str(dir_env_bin)
+    assert table.resolve("mytool", search_dirs) is info
+
+    # a tool in a search folder has higher priority
+    path_global_tool = make_tool(dir_global_bin, "mytool", "echo mytool 2.0")
+    table.invalidate("mytool")
+    assert table.resolve("mytool", search_dirs).path == str(path_global_tool)
+    path_venv_tool = make_tool(dir_venv_bin, "mytool", "echo mytool 3.0")
+    info = table.resolve("mytool", search_dirs, revalidate=True)
+    assert info.path == str(path_venv_tool)
+
+    # the version is probed once and persisted
+    info = table.probe("mytool", search_dirs)
+    assert info.version == "mytool 3.0"
+    table = ToolTable(path_cache=path_cache)
+    assert table.resolve("mytool", search_dirs).version == "mytool 3.0"
+
+    # the binary is replaced, the version is probed again
+    path_venv_tool.unlink()
+    make_tool(dir_venv_bin, "mytool", "echo mytool 3.1")
+    assert table.resolve("mytool", search_dirs, revalidate=True).version is None
+    assert table.probe("mytool", search_dirs).version == "mytool 3.1"
+
+    # the tool is removed from the search folders, fall back to $PATH
+    os.remove(path_venv_tool)
+    os.remove(path_global_tool)
+    table.invalidate()
+    assert table.resolve("mytool", search_dirs).path == str(path_env_tool)
+
+
+def test_resolve_in_memory(tmp_path, monkeypatch):
+    dir_bin = tmp_path / "bin"
+    monkeypatch.setenv("PATH", "")
+    make_tool(dir_bin, "good", "echo good 1.2.3")
+    path_cache = tmp_path / "tools.json"
+
+    table = ToolTable(path_cache=path_cache)
+    assert table.resolve("good", [dir_bin]).is_found
+    assert table.resolve("missing", [dir_bin]).is_found is False
+    mtime_ns = path_cache.stat().st_mtime_ns
+
+    # a resolved tool, found or not, costs no stat and no write
+    stats = list()
+    monkeypatch.setattr(
+        "pywf_open_source.tool_table._stat", lambda path: stats.append(path)
+    )
+    for _ in range(3):
+        assert table.resolve("good", [dir_bin]).is_found
+        assert table.resolve("missing", [dir_bin]).is_found is False
+    assert stats == []
+    assert path_cache.stat().st_mtime_ns == mtime_ns
+    monkeypatch.undo()
+
+    # a new process validates the persisted table without rewriting it
+    table = ToolTable(path_cache=path_cache)
+    assert table.resolve("good", [dir_bin]).is_found
+    assert table.resolve("missing", [dir_bin], revalidate=True).is_found is False
+    assert path_cache.stat().st_mtime_ns == mtime_ns
+
+
+def test_probe_all(tmp_path, monkeypatch):
+    dir_bin = tmp_path / "bin"
+    monkeypatch.setenv("PATH", "")
+    make_tool(dir_bin, "good", "echo good 1.2.3")
+    make_tool(dir_bin, "bad", "echo broken >&2; exit 1")
+
+    table = ToolTable()
+    good, bad, missing = table.probe_all(["good", "bad", "missing"], [dir_bin])
+    assert good.is_ok and good.version == "good 1.2.3"
+    assert bad.is_found and not bad.is_ok
+    assert bad.error == "exit code 1: broken"
+    assert missing.is_found is False
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.tool_table",
+        preview=False,
+    )
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+
+import pytest
+
+from pywf_open_source.vendor.vislog import VisLog
+from pywf_open_source.trace import Tracer
+
+
+def test_tracer(tmp_path):
+    tracer = Tracer()
+    logger = VisLog(name="test_trace")
+    logger.add_block_listener(tracer.on_block)
+
+    @logger.emoji_block(msg="inner", emoji="📦")
+    def inner():
+        with tracer.span("run command: pytest", cat="subprocess") as args:
+            args["returncode"] = 0
+
+    @logger.emoji_block(msg="fail", emoji="🔥")
+    def fail():
+        raise ValueError("oops")
+
+    @logger.emoji_block(msg="outer", emoji="🚀")
+    def outer():
+        inner()
+        thread = threading.Thread(target=inner)
+        thread.start()
+        thread.join()
+        with pytest.raises(ValueError):
+            fail()
+
+    with logger.disabled():
+        outer()
+
+    events = tracer.events
+    assert [(e["ph"], e["name"]) for e in events if e["tid"] == events[0]["tid"]] == [
+        ("B", "outer"),
+        ("B", "inner"),
+        ("X", "run command: pytest"),
+        ("E", "inner"),
+        ("B", "fail"),
+        ("E", "fail"),
+        ("E", "outer"),
+    ]
+    assert len({e["tid"] for e in events}) == 2
+    span = next(e for e in events if e["ph"] == "X")
+    assert span["args"] == {"returncode": 0}
+    assert span["dur"] >= 0
+    assert events[-2]["args"] == {"status": "error"}
+
+    path = tmp_path / "trace.json"
+    tracer.save(path)
+    tracer.save(path, merge=True)
+    data = json.loads(path.read_text())
+    assert len(data["traceEvents"]) == 2 * len(events)
+
+
+def test_tracer_threads():
+    """
+    Two blocks overlap in two threads, the end events are paired with the
+    block of their own thread.
+    """
+    tracer = Tracer()
+    logger = VisLog(name="test_trace_threads")
+    logger.add_block_listener(tracer.on_block)
+    a_started = threading.Event()
+    b_started = threading.Event()
+    a_done = threading.Event()
+    current_blocks = dict()
+
+    @logger.emoji_block(msg="a", emoji="🅰")
+    def a():
+        a_started.set()
+        b_started.wait(timeout=5)
+        current_blocks["a"] = logger.current_block
+
+    @logger.emoji_block(msg="b", emoji="🅱")
+    def b():
+        a_started.wait(timeout=5)
+        b_started.set()
+        a_done.wait(timeout=5)
+        current_blocks["b"] = logger.current_block
+
+    def run_a():
+        a()
+        a_done.set()
+
+    with logger.disabled():
+        threads = [threading.Thread(target=run_a), threading.Thread(target=b)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert current_blocks == {"a": "a", "b": "b"}
+    assert logger.current_block is None
+    by_tid = dict()
+    for event in tracer.events:
+        by_tid.setdefault(event["tid"], []).append((event["ph"], event["name"]))
+    assert sorted(by_tid.values()) == [
+        [("B", "a"), ("E", "a")],
+        [("B", "b"), ("E", "b")],
+    ]
+
+
+def test_tracer_disabled():
+    tracer = Tracer(enabled=False)
+    tracer.begin("a")
+    with tracer.span("b") as args:
+        args["x"] = 1
+    tracer.end("a")
+    assert tracer.events == []
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.trace",
+        preview=False,
+    )
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+import typing as T
+import io
+import re
+import json
+import uuid
+import logging
+import threading
+
+from pywf_open_source.vendor.vislog import VisLog
+from pywf_open_source.vendor.vislog.impl import BufferedStreamHandler
+
+
+def make_logger(**kwargs) -> T.Tuple[VisLog, io.StringIO]:
+    """
+    Create a logger that writes to a string buffer.
+    """
+    logger = VisLog(name=f"test_vislog_{uuid.uuid4().hex}", **kwargs)
+    stream = io.StringIO()
+    logger._logger.handlers[0].stream = stream
+    return logger, stream
+
+
+def run_nested_blocks(logger: VisLog):
+    @logger.emoji_block(msg="inner", emoji="📦")
+    def inner():
+        logger.info("e")
+
+    @logger.emoji_block(msg="outer", emoji="🚀")
+    def outer():
+        logger.info("a")
+        with logger.indent():
+            logger.info("b")
+        with logger.nested():
+            logger.info("c")
+        inner()
+        logger.info("d")
+
+    outer()
+
+
+NESTED_BLOCKS_OUTPUT = """\
++----- 🕑 🚀 Start 'outer' ------------------------------------------------------+
+🚀 
+🚀 a
+🚀   b
+🚀 | c
++----- 🕑 📦 Start 'inner' ------------------------------------------------------+
+📦 
+📦 e
+📦 
++----- ⏰ ✅ 📦 End 'inner', elapsed = 0.00 sec ----------------------------------+
+🚀 d
+🚀 
++----- ⏰ ✅ 🚀 End 'outer', elapsed = 0.00 sec ----------------------------------+
+"""
+
+
+def normalize_elapsed(output: str) -> str:
+    return re.sub(r"elapsed = \d+\.\d\d sec", "elapsed = 0.00 sec", output)
+
+
+def test_buffered():
+    logger, stream = make_logger(log_format="%(message)s")
+    run_nested_blocks(logger)
+    buffered_logger, buffered_stream = make_logger(
+        log_format="%(message)s",
+        buffered=True,
+    )
+    assert isinstance(buffered_logger._logger.handlers[0], BufferedStreamHandler)
+    run_nested_blocks(buffered_logger)
+    buffered_logger.flush()
+
+    output = normalize_elapsed(stream.getvalue())
+    assert output == NESTED_BLOCKS_OUTPUT
+    assert normalize_elapsed(buffered_stream.getvalue()) == output
+    # the cached prefix is back to the top level pipe
+    assert buffered_logger._prefix == "| "
+    buffered_logger._logger.handlers[0].close()
+
+
+def test_buffered_stream_handler_batch():
+    stream = io.StringIO()
+    handler = BufferedStreamHandler(stream=stream, max_batch=3)
+    logger = logging.getLogger(f"test_vislog_{uuid.uuid4().hex}")
+    logger.addHandler(handler)
+    logger.parent = None
+    for i in range(10):
+        logger.warning(str(i))
+    handler.flush()
+    assert stream.getvalue().split() == [str(i) for i in range(10)]
+    handler.close()
+    assert handler._thread.is_alive() is False
+
+
+def test_json_lines():
+    logger, stream = make_logger(json_lines=True)
+    run_nested_blocks(logger)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [
+        (r["event"], r["depth"], r["block"], r["indent"], r["msg"])
+        for r in records
+        if r["event"] == "log"
+    ] == [
+        ("log", 1, "outer", 0, "a"),
+        ("log", 1, "outer", 1, "b"),
+        ("log", 1, "outer", 0, "c"),
+        ("log", 2, "inner", 0, "e"),
+        ("log", 1, "outer", 0, "d"),
+    ]
+    blocks = [
+        (r["event"], r["depth"], r["block"])
+        for r in records
+        if r["event"].startswith("block_")
+    ]
+    assert blocks == [
+        ("block_start", 1, "outer"),
+        ("block_start", 2, "inner"),
+        ("block_end", 2, "inner"),
+        ("block_end", 1, "outer"),
+    ]
+    for record in records:
+        assert record["level"] == "info"
+        assert isinstance(record["ts"], float)
+        assert ("elapsed" in record) is (record["event"] == "block_end")
+
+    # the error event of a failed block
+    logger, stream = make_logger(json_lines=True)
+
+    @logger.emoji_block(msg="fail", emoji="🔥")
+    def fail():
+        raise ValueError("oops")
+
+    try:
+        fail()
+    except ValueError:
+        pass
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["event"] for r in records] == ["block_start", "block_error"]
+    assert logger.current_block is None
+
+
+def test_threads_layout():
+    """
+    Two overlapping blocks in two threads don't change the pipe and
+    indentation of each other, nor of the main thread.
+    """
+    logger, stream = make_logger(log_format="%(message)s")
+    a_started = threading.Event()
+    b_started = threading.Event()
+    a_done = threading.Event()
+
+    @logger.emoji_block(msg="a", emoji="🅰")
+    def a():
+        a_started.set()
+        b_started.wait(timeout=5)
+
+    @logger.emoji_block(msg="b", emoji="🅱")
+    def b():
+        a_started.wait(timeout=5)
+        b_started.set()
+        a_done.wait(timeout=5)
+        with logger.indent():
+            logger.info("in b")
+
+    def run_a():
+        a()
+        a_done.set()
+
+    @logger.emoji_block(msg="main", emoji="🚀")
+    def main():
+        threads = [threading.Thread(target=run_a), threading.Thread(target=b)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.info("after")
+
+    main()
+    main()
+    lines = stream.getvalue().splitlines()
+    assert "🅱   in b" in lines
+    assert lines.count("🚀 after") == 2
+    assert logger._pipes == ["| "]
+    assert logger._indent == 0
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.vendor.vislog",
+        preview=False,
+    )
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import queue
+import shutil
+import threading
+
+import pytest
+
+from pywf_open_source.watch import (
+    DEFAULT_IGNORE_DIRS,
+    take_snapshot,
+    diff_snapshot,
+    iter_changes,
+)
+
+
+def test_snapshot(tmp_path):
+    dir_src = tmp_path / "src"
+    dir_src.mkdir()
+    path_a = dir_src / "a.py"
+    path_b = dir_src / "b.rst"
+    path_a.write_text("a = 1")
+    path_b.write_text("title")
+    dir_src.joinpath("__pycache__").mkdir()
+    dir_src.joinpath("__pycache__", "a.pyc").write_bytes(b"")
+
+    snapshot = take_snapshot([dir_src, tmp_path / "not-exists"])
+    assert set(snapshot) == {str(path_a), str(path_b)}
+    assert set(take_snapshot([dir_src], suffixes=[".py"])) == {str(path_a)}
+    assert diff_snapshot(snapshot, take_snapshot([dir_src])) == set()
+
+    path_a.write_text("a = 22")
+    st = path_a.stat()
+    os.utime(path_a, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    path_b.unlink()
+    path_c = dir_src / "c.py"
+    path_c.write_text("c = 1")
+    changed = diff_snapshot(snapshot, take_snapshot([dir_src]))
+    assert changed == {str(path_a), str(path_b), str(path_c)}
+
+    # a full path only skips this folder, not the others with the same name
+    dir_src.joinpath("api").mkdir()
+    dir_src.joinpath("api", "a.rst").write_text("")
+    dir_src.joinpath("sub", "api").mkdir(parents=True)
+    dir_src.joinpath("sub", "api", "b.rst").write_text("")
+    ignore_dirs = {str(dir_src / "api")}
+    assert set(take_snapshot([dir_src], [".rst"], ignore_dirs)) == {
+        str(dir_src / "sub" / "api" / "b.rst")
+    }
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="requires Linux"
+            ),
+        ),
+    ],
+)
+def test_iter_changes(tmp_path, use_inotify):
+    dir_src = tmp_path / "src"
+    dir_src.mkdir()
+    path_a = dir_src / "a.py"
+    path_a.write_text("a = 1")
+    batches = queue.Queue()
+
+    def watch():
+        for changed in iter_changes(
+            [dir_src],
+            suffixes=[".py"],
+            interval=0.05,
+            debounce=0.2,
+            use_inotify=use_inotify,
+        ):
+            batches.put(changed)
+
+    threading.Thread(target=watch, daemon=True).start()
+    # wait for the watcher to take the first snapshot
+    threading.Event().wait(0.3)
+    path_a.write_text("a = 22")
+    dir_src.joinpath("b.txt").write_text("b")
+    dir_sub = dir_src / "sub"
+    dir_sub.mkdir()
+    dir_sub.joinpath("c.py").write_text("c = 1")
+    assert batches.get(timeout=5) == {str(path_a), str(dir_sub / "c.py")}
+
+    dir_sub.joinpath("c.py").unlink()
+    assert batches.get(timeout=5) == {str(dir_sub / "c.py")}
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="requires Linux"
+            ),
+        ),
+    ],
+)
+def test_iter_changes_during_processing(tmp_path, use_inotify):
+    """
+    A change made while the consumer processes a batch is not lost.
+    """
+    dir_src = tmp_path / "src"
+    dir_src.mkdir()
+    path_a = dir_src / "a.py"
+    path_b = dir_src / "b.py"
+    path_a.write_text("a = 1")
+    path_b.write_text("b = 1")
+    batches = queue.Queue()
+
+    def watch():
+        for changed in iter_changes(
+            [dir_src],
+            suffixes=[".py"],
+            interval=0.05,
+            debounce=0.1,
+            use_inotify=use_inotify,
+        ):
+            if changed == {str(path_a)}:
+                # the user saves another file during the rebuild
+                path_b.write_text("b = 22")
+                threading.Event().wait(0.3)
+            batches.put(changed)
+
+    threading.Thread(target=watch, daemon=True).start()
+    threading.Event().wait(0.3)
+    path_a.write_text("a = 22")
+    assert batches.get(timeout=5) == {str(path_a)}
+    assert batches.get(timeout=5) == {str(path_b)}
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="requires Linux"
+            ),
+        ),
+    ],
+)
+def test_iter_changes_ignore_generated_dir(tmp_path, use_inotify):
+    """
+    The consumer regenerates an ignored folder in the watched directory,
+    like ``docfly`` does for ``docs/source/api`` on every doc build, it
+    doesn't trigger another batch.
+    """
+    dir_src = tmp_path / "source"
+    dir_api = dir_src / "api"
+    dir_api.mkdir(parents=True)
+    path_index = dir_src / "index.rst"
+    path_index.write_text("title")
+    batches = queue.Queue()
+
+    def build():
+        shutil.rmtree(dir_api)
+        dir_api.mkdir()
+        dir_api.joinpath("module.rst").write_text("module")
+
+    def watch():
+        for changed in iter_changes(
+            [dir_src],
+            ignore_dirs=DEFAULT_IGNORE_DIRS | {str(dir_api)},
+            interval=0.05,
+            debounce=0.1,
+            use_inotify=use_inotify,
+        ):
+            build()
+            batches.put(changed)
+
+    threading.Thread(target=watch, daemon=True).start()
+    threading.Event().wait(0.3)
+    path_index.write_text("new title")
+    assert batches.get(timeout=5) == {str(path_index)}
+    with pytest.raises(queue.Empty):
+        batches.get(timeout=1)
+
+
+if __name__ == "__main__":
+    from pywf_open_source.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "pywf_open_source.watch",
+        preview=False,
+    )